@@ -1,6 +1,11 @@
 """This is an example script for automated star system generation"""
 
+import os
+import random
+import sys
+
 import gurpsspace.starsystem as starsys
+from gurpsspace.seedbank import SeedBank
 
 # Change from None to a value if you want to set an argument
 args = {
@@ -9,14 +14,26 @@ args = {
     'age': None  # Number > 0
 }
 
-# Generate starsystems until one is made that contains a Garden world.
-garden = False
-cycle_num = 0
-while garden is not True:
-    cycle_num += 1
-    mysys = starsys.StarSystem(**args)
-    garden = mysys.has_garden()
+# Seed bank to take a star system with a Garden world from, if the file
+# exists. Build one with SeedBank('seeds.db').build(1, 100000)
+seed_bank = 'seeds.db'
+
+mysys = None
+if os.path.exists(seed_bank) and args['age'] is None:
+    with SeedBank(seed_bank) as bank:
+        seed = bank.random_seed(has_garden=True, open_cluster=args['open_cluster'], num_stars=args['num_stars'])
+        if seed is not None:
+            mysys = bank.system(seed)
+            print('Star system taken from the seed bank, out of {} matching ones'.format(
+                bank.count(has_garden=True, open_cluster=args['open_cluster'], num_stars=args['num_stars'])))
+
+if mysys is None:
+    # Generate starsystems until one is made that contains a Garden world.
+    # Attempts without a chance for a Garden world are abandoned early.
+    start_seed = random.randint(1, sys.maxsize)
+    seed, mysys = starsys.find_garden_system(start_seed, **args)
+    print('Total number of cycles: {}'.format(seed - start_seed + 1))
 
 mysys.print_info()
-print('Total number of cycles: {}'.format(cycle_num))
+print('Seed of the star system: {}'.format(seed))
 mysys.write_latex()
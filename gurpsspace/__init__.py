@@ -1,13 +1,26 @@
 __all__ = [
     'asteroidbelt',
+    'batch',
     'dice',
+    'encoding',
+    'gardenpool',
     'gasgiant',
     'orbitcontents',
+    'orbitindex',
+    'orbitlayout',
     'planet',
     'planetsystem',
+    'probability',
+    'references',
+    'satellitebatch',
     'satellites',
+    'search',
+    'seedbank',
     'star',
+    'starbatch',
     'starsystem',
+    'summary',
     'tables',
-    'world'
+    'world',
+    'worldbatch'
 ]
@@ -6,8 +6,10 @@ class AsteroidBelt(OrbitContent):
     """
     Class for asteroid belts.
     """
-    def __init__(self, primarystar, orbitalradius):
-        OrbitContent.__init__(self, primarystar, orbitalradius)
+    __slots__ = ('__rvm', '__resources', '__avsurf', '__climate', '__habitability', 'affinity')
+
+    def __init__(self, primarystar, orbitalradius, rng=None):
+        OrbitContent.__init__(self, primarystar, orbitalradius, rng)
         self.__rvm, self.__resources = self.make_resources()
         self.__avsurf = self.make_surface_temp()
         self.__climate = self.make_climate()
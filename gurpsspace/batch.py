@@ -0,0 +1,188 @@
+"""batch.py
+
+Module for generating large numbers of star systems in parallel.
+
+Every system gets its own random stream, derived from the base seed and the
+running number of the system. The generated systems therefore do not depend
+on the number of worker processes, the chunk size or the order in which the
+results are collected.
+"""
+
+import gc
+import os
+import random
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+from . import dice
+from .starsystem import StarSystem
+
+
+def system_seed(base_seed, number) -> int:
+    """
+    Return the seed of the random stream used for system number `number`.
+
+    :param base_seed: The seed of the whole batch.
+    :param number: The running number of the system.
+    :type base_seed: int
+    :type number: int
+    """
+    return dice.derive_seed(base_seed, (number,))
+
+
+def generate_system(base_seed, number, **kwargs) -> StarSystem:
+    """
+    Generate system number `number` of a batch on its own.
+
+    :param base_seed: The seed of the whole batch.
+    :param number: The running number of the system.
+    :param kwargs: Keyword arguments for the StarSystem constructor.
+    :type base_seed: int
+    :type number: int
+    """
+    return StarSystem(rng=random.Random(system_seed(base_seed, number)), **kwargs)
+
+
+@contextmanager
+def deferred_gc(freeze=False):
+    """
+    Pause the cyclic garbage collector, e.g. while a chunk is generated.
+
+    :param freeze: If True, move all objects alive afterwards to the
+        permanent generation (see gc.freeze), so that later collections do
+        not walk the generated systems again.
+    :type freeze: bool
+
+    Generated systems hold no reference cycles, so they are freed by
+    reference counting alone and nothing piles up while the collector is
+    paused. Frozen objects are still freed by reference counting, but
+    reference cycles among them are only collected after gc.unfreeze.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if freeze:
+            gc.freeze()
+        if enabled:
+            gc.enable()
+
+
+def generate_chunk(base_seed, first, last, kwargs, transform=None, defer_gc=False, freeze=False) -> list:
+    """
+    Generate the systems with the running numbers first, ..., last - 1.
+
+    :param base_seed: The seed of the whole batch.
+    :param first: The first running number.
+    :param last: One past the last running number.
+    :param kwargs: Keyword arguments for the StarSystem constructor.
+    :param transform: Applied to every system before it is returned, e.g. to
+        only send a summary back from a worker process.
+    :param defer_gc: If True, pause the cyclic garbage collector while the
+        chunk is generated, see deferred_gc.
+    :param freeze: If True as well as defer_gc, freeze all objects of the
+        process afterwards, see deferred_gc. They stay frozen until the
+        caller calls gc.unfreeze.
+    :type transform: callable or None
+    :type defer_gc: bool
+    :type freeze: bool
+    :return: List of tuples (number, system or transformed system)
+    """
+    if defer_gc:
+        with deferred_gc(freeze):
+            return generate_chunk(base_seed, first, last, kwargs, transform)
+    results = []
+    for number in range(first, last):
+        system = generate_system(base_seed, number, **kwargs)
+        if transform is not None:
+            system = transform(system)
+        results.append((number, system))
+    return results
+
+
+def generate(count, base_seed, workers=None, chunksize=64, ordered=True, transform=None, start=0, defer_gc=False,
+             freeze=False, **kwargs):
+    """
+    Generate `count` star systems across worker processes.
+
+    :param count: The number of systems to generate.
+    :param base_seed: The seed of the whole batch.
+    :param workers: The number of worker processes, defaults to the number of
+        CPUs. With a single worker everything runs in this process.
+    :param chunksize: The number of systems a worker generates per task.
+    :param ordered: If True the results come in the order of their running
+        numbers, otherwise as soon as they are ready.
+    :param transform: Applied to every system in the worker, see
+        generate_chunk. Needs to be picklable, e.g. a module level function.
+    :param start: The running number of the first system.
+    :param defer_gc: If True, pause the cyclic garbage collector while a
+        chunk is generated, see deferred_gc.
+    :param freeze: If True as well as defer_gc, freeze all objects of this
+        process after every chunk, see deferred_gc. This avoids long
+        collections when many systems are kept in memory, but reference
+        cycles of the caller are not collected anymore until it calls
+        gc.unfreeze. Only applies with a single worker, the systems of worker
+        processes are sent back as copies.
+    :param kwargs: Keyword arguments for the StarSystem constructor.
+    :type count: int
+    :type base_seed: int
+    :type workers: int or None
+    :type chunksize: int
+    :type ordered: bool
+    :type transform: callable or None
+    :type start: int
+    :type defer_gc: bool
+    :type freeze: bool
+    :return: Generator of tuples (number, system or transformed system)
+    """
+    if chunksize < 1:
+        raise ValueError("Chunks need to hold at least one system, not {}.".format(chunksize))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    stop = start + count
+    chunks = iter(range(start, stop, chunksize))
+
+    if workers <= 1:
+        for first in chunks:
+            yield from generate_chunk(base_seed, first, min(first + chunksize, stop), kwargs, transform, defer_gc,
+                                      freeze)
+        return
+
+    executor = ProcessPoolExecutor(workers)
+
+    def submit():
+        # Returns None once all chunks have been handed out
+        first = next(chunks, None)
+        if first is None:
+            return None
+        return executor.submit(generate_chunk, base_seed, first, min(first + chunksize, stop), kwargs, transform,
+                               defer_gc)
+
+    try:
+        # Keep a bounded number of chunks in flight, so that memory stays
+        # bounded for huge batches
+        pending = deque()
+        for _ in range(2 * workers):
+            future = submit()
+            if future is None:
+                break
+            pending.append(future)
+
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                results = future.result()
+                following = submit()
+                if following is not None:
+                    pending.append(following)
+                yield from results
+    finally:
+        # Also reached when the caller stops iterating early
+        executor.shutdown(wait=True, cancel_futures=True)
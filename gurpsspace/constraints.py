@@ -0,0 +1,77 @@
+"""constraints.py
+
+Module with the feasibility checks used to abandon the generation of a star
+system early, as soon as it can no longer fulfill a constraint.
+
+A Garden world needs a Standard or Large planet with a blackbody temperature
+above 240 K and up to 320 K (GURPS Space p. 78), so a star system without an
+orbit in that band cannot have one.
+"""
+
+from .tables import blackbody_temperature
+
+# Blackbody temperatures (exclusive lower, inclusive upper) allowing for Garden
+# worlds
+GardenBand = (240, 320)
+
+# Size classes of planets that can become Garden worlds
+GardenSizes = ('Standard', 'Large')
+
+
+class GenerationAborted(Exception):
+    """
+    Raised when a star system is abandoned because it cannot fulfill the
+    constraints it was generated with.
+    """
+    pass
+
+
+def in_garden_band(luminosity, orbit) -> bool:
+    """
+    Check whether a planet in this orbit is warm enough for a Garden world
+
+    :param luminosity: Luminosity of the primary star
+    :param orbit: Orbital radius in AU
+    :type luminosity: float
+    :type orbit: float
+    """
+    low, high = GardenBand
+    return low < blackbody_temperature(luminosity, orbit) <= high
+
+
+def garden_band_orbits(luminosity) -> tuple:
+    """
+    Return the orbital radii (inner, outer) that bracket the Garden band
+
+    The bracket is closed, so it may be slightly wider than the band itself.
+    """
+    low, high = GardenBand
+    inner = (278 * luminosity ** 0.25 / high) ** 2
+    outer = (278 * luminosity ** 0.25 / low) ** 2
+    return inner, outer
+
+
+def star_can_have_garden(star) -> bool:
+    """
+    Check whether any planet orbit of the star can lie in the Garden band
+
+    :param star: A star with its forbidden zone already set
+    :type star: gurpsspace.star.Star
+
+    Planets are only placed within the orbital limits and outside of the
+    forbidden zone, with its outer edge being a valid orbit. The check is
+    conservative and only returns False if no Garden world is possible.
+    """
+    band_inner, band_outer = garden_band_orbits(star.get_luminosity())
+    inner, outer = star.get_orbit_limits()
+    if star.has_forbidden_zone():
+        forbidden_inner, forbidden_outer = star.get_forbidden_zone()
+        if band_inner <= forbidden_outer <= band_outer:
+            return True
+        segments = [(inner, min(outer, forbidden_inner)), (max(inner, forbidden_outer), outer)]
+    else:
+        segments = [(inner, outer)]
+    for start, end in segments:
+        if start <= end and start <= band_outer and end >= band_inner:
+            return True
+    return False
@@ -1,7 +1,56 @@
 import random as r
+from bisect import bisect_right
+
+import numpy as np
+
+
+class GeneratorSource:
+    """
+    Offers the few random.Random methods used by DiceRoller on top of a NumPy
+    Generator.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def randint(self, a, b) -> int:
+        return int(self.generator.integers(a, b + 1))
+
+    def randrange(self, upper) -> int:
+        return int(self.generator.integers(upper))
+
+    def uniform(self, a, b) -> float:
+        return float(self.generator.uniform(a, b))
+
+    def getrandbits(self, k) -> int:
+        result = 0
+        for i in range(0, k, 32):
+            result = (result << 32) | int(self.generator.integers(1 << 32))
+        return result >> (-k % 32)
 
 
 class DiceRoller:
+    __slots__ = ('rng', '__source')
+
+    def __init__(self, rng=None):
+        """
+        :param rng: The source of randomness. None uses the global random
+            module, which keeps random.seed working as before.
+        :type rng: random.Random or numpy.random.Generator or None
+        """
+        self.rng = rng
+        if isinstance(rng, np.random.Generator):
+            rng = GeneratorSource(rng)
+        self.__source = rng
+
+    def source(self):
+        """
+        Return the object providing randint, randrange, uniform and
+        getrandbits for this roller.
+        """
+        if self.__source is None:
+            return r
+        return self.__source
 
     def roll_dice(self, dice_num, modifier, sides=6) -> int:
         """
@@ -25,7 +74,275 @@ class DiceRoller:
             raise ValueError("Dice have at least two sides, and not {}.".format(sides))
         if dice_num <= 0:
             raise ValueError("At least 1 die needs to be thrown, not {}.".format(dice_num))
+        randint = self.source().randint
         for i in range(dice_num):
-            result += r.randint(1, sides)
+            result += randint(1, sides)
         result += modifier
         return max(result, 0)
+
+    def roll_uniform(self, upper) -> int:
+        """
+        Draws a uniformly distributed integer from the interval [0, upper).
+
+        :param upper: The exclusive upper bound.
+        :type upper: int
+        :return: The drawn int.
+        """
+        return self.source().randrange(upper)
+
+    def uniform(self, a, b) -> float:
+        """
+        Draws a uniformly distributed float from the interval [a, b].
+
+        :type a: float
+        :type b: float
+        :return: The drawn float.
+        """
+        return self.source().uniform(a, b)
+
+    def roll_seed(self) -> int:
+        """
+        Draws a 64 bit seed, e.g. for a roller of its own with from_seed.
+        """
+        return self.source().getrandbits(64)
+
+    @classmethod
+    def from_seed(cls, seed):
+        """
+        Return a roller with a random.Random stream of its own.
+
+        :param seed: The seed of the stream.
+        :type seed: int
+        """
+        return cls(r.Random(seed))
+
+    def generator(self) -> np.random.Generator:
+        """
+        Return a NumPy Generator for drawing many values at once.
+
+        Unless the roller was given a NumPy Generator, a generator is seeded
+        from the roller's source of randomness, so seeding the latter keeps
+        batch draws reproducible as well.
+        """
+        if isinstance(self.rng, np.random.Generator):
+            return self.rng
+        return np.random.default_rng(self.source().getrandbits(64))
+
+    def roll_many(self, dice_num, modifier, count, sides=6) -> np.ndarray:
+        """
+        Rolls XdY +- Z many times at once.
+
+        :param dice_num: X, the number of dice per roll.
+        :param modifier: Z, a static modifier to each result. May also be an
+            array of length count, giving each roll its own modifier.
+        :param count: The number of rolls to make.
+        :param sides: Y, the type of dice, defaults to 6-sided.
+        :type dice_num: int
+        :type modifier: int or numpy.ndarray
+        :type count: int
+        :type sides: int
+        :return: An int array of length count holding the results.
+
+        The rolls follow the same rules as roll_dice, including the lower bound
+        of zero. The dice are thrown by the roller's generator().
+        """
+        if sides <= 1:
+            raise ValueError("Dice have at least two sides, and not {}.".format(sides))
+        if dice_num <= 0:
+            raise ValueError("At least 1 die needs to be thrown, not {}.".format(dice_num))
+        if count < 0:
+            raise ValueError("Cannot make a negative number of rolls, {}.".format(count))
+        generator = self.generator()
+        result = np.zeros(count, dtype=np.int64)
+        for i in range(dice_num):
+            result += generator.integers(1, sides + 1, size=count)
+        result += modifier
+        return np.maximum(result, 0)
+
+
+def as_roller(rng=None) -> DiceRoller:
+    """
+    Return a DiceRoller for the given source of randomness.
+
+    :param rng: A DiceRoller, which is returned as it is so that it can be
+        shared, or any source of randomness accepted by DiceRoller.
+    """
+    if isinstance(rng, DiceRoller):
+        return rng
+    return DiceRoller(rng)
+
+
+def derive_seed(root_seed, key) -> int:
+    """
+    Derives an independent 128 bit seed from a root seed and an integer key.
+
+    :param root_seed: The seed everything is derived from, e.g. a sector seed.
+    :param key: A sequence of ints, e.g. coordinates or a running number.
+    :type root_seed: int
+    :type key: tuple
+    :return: A seed that only depends on root_seed and key.
+
+    The derivation uses NumPy's SeedSequence, so any key can be turned into
+    its seed directly, without going through the keys before it. Negative
+    numbers are allowed and mapped to distinct natural numbers.
+    """
+    def natural(number):
+        number = int(number)
+        return 2 * number if number >= 0 else -2 * number - 1
+
+    sequence = np.random.SeedSequence(natural(root_seed), spawn_key=tuple(natural(k) for k in key))
+    result = 0
+    for word in sequence.generate_state(4):
+        result = (result << 32) | int(word)
+    return result
+
+
+def roll_distribution(dice_num, modifier=0, sides=6) -> dict:
+    """
+    Counts the ways in which every result of XdY +- Z can come about.
+
+    :param dice_num: X, the number of dice.
+    :param modifier: Z, a static modifier to the result.
+    :param sides: Y, the type of dice, defaults to 6-sided.
+    :type dice_num: int
+    :type modifier: int
+    :type sides: int
+    :return: A dict mapping each result to its number of combinations. The
+        combinations add up to sides ** dice_num.
+
+    The results are clamped at zero exactly like in DiceRoller.roll_dice.
+    """
+    if sides <= 1:
+        raise ValueError("Dice have at least two sides, and not {}.".format(sides))
+    if dice_num <= 0:
+        raise ValueError("At least 1 die needs to be thrown, not {}.".format(dice_num))
+    counts = {0: 1}
+    for i in range(dice_num):
+        rolled = {}
+        for total, ways in counts.items():
+            for face in range(1, sides + 1):
+                rolled[total + face] = rolled.get(total + face, 0) + ways
+        counts = rolled
+    result = {}
+    for total in sorted(counts):
+        value = max(total + modifier, 0)
+        result[value] = result.get(value, 0) + counts[total]
+    return result
+
+
+class WeightedSampler:
+    """
+    Draws values from a finite distribution with integer weights.
+
+    A single uniform draw is looked up in the cumulative weights, so the
+    values come out with exactly the probabilities weight / total.
+    """
+
+    def __init__(self, weighted_values):
+        """
+        :param weighted_values: Pairs of (value, weight), weights being
+            non-negative ints. Adjacent pairs with equal values are merged.
+        :type weighted_values: list
+        """
+        self.values = []
+        self.cumulative = []
+        total = 0
+        for value, weight in weighted_values:
+            if weight < 0:
+                raise ValueError("Weights cannot be negative, {}.".format(weight))
+            if weight == 0:
+                continue
+            total += weight
+            if self.values and self.values[-1] == value:
+                self.cumulative[-1] = total
+            else:
+                self.values.append(value)
+                self.cumulative.append(total)
+        if total == 0:
+            raise ValueError("At least one value needs a positive weight.")
+        self.total = total
+
+    def sample(self, roller):
+        """
+        Draw one value.
+
+        :param roller: The DiceRoller providing the uniform draw.
+        :type roller: DiceRoller
+        :return: One of the values.
+        """
+        return self.values[bisect_right(self.cumulative, roller.roll_uniform(self.total))]
+
+    def sample_many(self, roller, count) -> np.ndarray:
+        """
+        Draw many values at once.
+
+        :param roller: The DiceRoller providing the generator.
+        :param count: The number of values to draw.
+        :type roller: DiceRoller
+        :type count: int
+        :return: An array of length count holding the values.
+        """
+        draws = roller.generator().integers(self.total, size=count)
+        return np.asarray(self.values)[np.searchsorted(self.cumulative, draws, side='right')]
+
+    def weights(self) -> list:
+        """Return the list of (value, weight) pairs"""
+        previous = 0
+        pairs = []
+        for value, cumulative in zip(self.values, self.cumulative):
+            pairs.append((value, cumulative - previous))
+            previous = cumulative
+        return pairs
+
+    def probabilities(self) -> list:
+        """Return the list of (value, probability) pairs"""
+        return [(value, weight / self.total) for value, weight in self.weights()]
+
+
+class TableSampler:
+    """
+    Draws the outcome of a table looked up with a XdY +- Z roll.
+
+    The distribution of the looked up values is precomputed once per modifier,
+    after which every draw costs one uniform draw instead of X dice and the
+    lookup.
+    """
+
+    def __init__(self, lookup, dice_num=3, sides=6):
+        """
+        :param lookup: Maps a roll result to the table value.
+        :param dice_num: X, the number of dice.
+        :param sides: Y, the type of dice, defaults to 6-sided.
+        :type lookup: callable
+        :type dice_num: int
+        :type sides: int
+        """
+        self.lookup = lookup
+        self.dice_num = dice_num
+        self.sides = sides
+        self.__samplers = {}
+
+    def distribution(self, modifier=0) -> WeightedSampler:
+        """
+        Return the precomputed distribution of table values for a modifier.
+
+        :param modifier: Z, the static modifier to the roll.
+        :type modifier: int
+        """
+        sampler = self.__samplers.get(modifier)
+        if sampler is None:
+            counts = roll_distribution(self.dice_num, modifier, self.sides)
+            sampler = WeightedSampler([(self.lookup(roll), ways) for roll, ways in counts.items()])
+            self.__samplers[modifier] = sampler
+        return sampler
+
+    def sample(self, roller, modifier=0):
+        """
+        Draw a table value as if rolled with the given modifier.
+
+        :param roller: The DiceRoller providing the uniform draw.
+        :param modifier: Z, the static modifier to the roll.
+        :type roller: DiceRoller
+        :type modifier: int
+        """
+        return self.distribution(modifier).sample(roller)
@@ -0,0 +1,253 @@
+"""encoding.py
+
+Module for storing generated star systems compactly.
+
+StarSystem.to_dict turns a star system into records: dicts of plain values,
+with a 'record' entry naming the kind of record, and lists of records for
+the stars, bodies and satellites. encode packs such a record into bytes and
+decode unpacks them again, so that a star system round-trips exactly through
+StarSystem.to_bytes and StarSystem.from_bytes.
+
+In the binary form, every record is the code of its kind followed by the
+values of its fields, in the order of RecordFields. Every value is a one
+byte tag followed by its struct packed payload. Strings found in
+InternedStrings, like world types, climates and size classes, take a single
+byte code and decode to the canonical string objects.
+"""
+
+import numbers
+import struct
+import sys
+import zlib
+from functools import lru_cache
+
+from .tables import (Climates, IntToSize, MAtmoTable, PressureCategories, SizeToInt, StEvoTable, WorldTypes,
+                     asteroid_resource_table, world_resource_table)
+from .worldbatch import GeologicActivities
+
+# Fields common to all orbit contents
+OrbitFields = ('orbit', 'blackbody_temperature', 'period', 'name', 'number', 'size', 'eccentricity', 'min_max')
+
+# Fields common to planets and moons
+WorldFields = OrbitFields + ('sizeclass', 'world_type', 'atmmass', 'atmflags', 'hasmarginal', 'marginal',
+                             'hydrocover', 'averagesurface', 'climatetype', 'density', 'diameter', 'surfacegravity',
+                             'mass', 'pressure', 'presscat', 'volcanism', 'tectonic', 'rvm', 'resources',
+                             'habitability', 'affinity')
+
+# The fields of every kind of record, in the order they are encoded
+# Usage: RecordFields[kind]
+RecordFields = {
+    'StarSystem': ('opencluster', 'num_stars', 'age', 'orbits', 'minmax_separation', 'forbidden_zones', 'periods',
+                   'require_garden', 'lazy', 'detail', 'stars'),
+    'Star': ('age', 'StEvoIndex', 'SeqIndex', 'mass', 'luminosity', 'temperature', 'radius', 'innerlimit',
+             'outerlimit', 'snowline', 'letter', 'star_type', 'hasforbiddenzone', 'forbiddenzone', 'planetseed',
+             'planetsystem'),
+    'PlanetSystem': ('lazy', 'requiregarden', 'gasarrangement', 'firstgasorbit', 'orbitarray', 'contents'),
+    'AsteroidBelt': OrbitFields + ('rvm', 'resources', 'avsurf', 'climate', 'habitability', 'affinity'),
+    'Planet': WorldFields + ('detail_seed', 'detailed', 'nummoons', 'moons', 'nummoonlets', 'moonlets', 'tte',
+                             'rotperiod', 'daylength', 'moonlength', 'axtilt'),
+    'GasGiant': OrbitFields + ('mass', 'density', 'diameter', 'cloudtop_gravity', 'detail_seed', 'detailed',
+                               'first_family', 'second_family', 'third_family'),
+    'Moon': WorldFields + ('tte', 'rotperiod', 'alenday', 'alenplanet'),
+    'Moonlet': ('family', 'orbit', 'period'),
+}
+RecordKinds = tuple(RecordFields)
+
+# Strings stored as one byte codes
+InternedStrings = tuple(sys.intern(string) for string in sorted(
+    set(WorldTypes) | set(Climates) | set(PressureCategories) | set(SizeToInt) | set(IntToSize) |
+    set(GeologicActivities) | set(StEvoTable['type']) | {atmosphere for atmosphere in MAtmoTable if atmosphere} |
+    {resources for _, resources in asteroid_resource_table.values()} |
+    {resources for _, resources in world_resource_table.values()} |
+    {'', 'None', 'Conventional', 'Eccentric', 'Epistellar', 'first', 'third', 'stars', 'planets', 'full'}))
+StringCodes = {string: code for code, string in enumerate(InternedStrings)}
+
+# Version of the binary format, to be increased with every change of the
+# fields or the tags
+FormatVersion = 1
+Magic = b'GSS'
+Header = struct.Struct('<3sBI')
+# The interned strings are part of the format, too
+StringsChecksum = zlib.crc32('\0'.join(InternedStrings).encode())
+
+# Value tags
+MISSING, NONE, FALSE, TRUE, INT8, INT32, INT64, UINT64, FLOAT, STRING, TEXT, LIST, TUPLE, RECORD = range(14)
+
+Byte = struct.Struct('<B')
+Int8 = struct.Struct('<b')
+Int32 = struct.Struct('<i')
+Int64 = struct.Struct('<q')
+UInt64 = struct.Struct('<Q')
+Float = struct.Struct('<d')
+Length = struct.Struct('<I')
+
+
+@lru_cache(maxsize=None)
+def slot_fields(cls) -> dict:
+    """
+    Map the field names of a slotted class to their slot descriptors.
+
+    Private slots are named without their underscores, e.g. the slot __rvm
+    of AsteroidBelt is the field rvm. The mapping is shared, do not change it.
+    """
+    fields = {}
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            if name == '__weakref__':
+                continue
+            attribute = '_{}{}'.format(klass.__name__, name) if name.startswith('__') else name
+            fields[name.lstrip('_')] = klass.__dict__[attribute]
+    return fields
+
+
+def to_record(obj, kind=None) -> dict:
+    """
+    Return the record of a slotted object, holding the slots named in
+    RecordFields. Slots that are not set are left out.
+
+    :param kind: The kind of record, defaults to the name of the class
+    """
+    kind = kind or type(obj).__name__
+    fields = slot_fields(type(obj))
+    record = {'record': kind}
+    for name in RecordFields[kind]:
+        try:
+            record[name] = fields[name].__get__(obj)
+        except AttributeError:
+            pass
+    return record
+
+
+def from_record(cls, record):
+    """
+    Create an object of a slotted class without calling its constructor and
+    set the slots given in the record.
+    """
+    obj = cls.__new__(cls)
+    fields = slot_fields(cls)
+    for name in RecordFields[record['record']]:
+        if name in record:
+            fields[name].__set__(obj, record[name])
+    return obj
+
+
+def encode(record) -> bytes:
+    """
+    Pack a record, e.g. from StarSystem.to_dict, into bytes
+
+    :type record: dict
+    """
+    out = bytearray(Header.pack(Magic, FormatVersion, StringsChecksum))
+    encode_value(record, out)
+    return bytes(out)
+
+
+def encode_value(value, out) -> None:
+    if value is None:
+        out += Byte.pack(NONE)
+    elif value is True or value is False:
+        out += Byte.pack(TRUE if value else FALSE)
+    elif isinstance(value, float):
+        out += Byte.pack(FLOAT) + Float.pack(value)
+    elif isinstance(value, int):
+        if -128 <= value < 128:
+            out += Byte.pack(INT8) + Int8.pack(value)
+        elif -2 ** 31 <= value < 2 ** 31:
+            out += Byte.pack(INT32) + Int32.pack(value)
+        elif -2 ** 63 <= value < 2 ** 63:
+            out += Byte.pack(INT64) + Int64.pack(value)
+        else:
+            out += Byte.pack(UINT64) + UInt64.pack(value)
+    elif isinstance(value, str):
+        code = StringCodes.get(value)
+        if code is not None:
+            out += Byte.pack(STRING) + Byte.pack(code)
+        else:
+            text = value.encode()
+            out += Byte.pack(TEXT) + Length.pack(len(text)) + text
+    elif isinstance(value, dict):
+        kind = value['record']
+        out += Byte.pack(RECORD) + Byte.pack(RecordKinds.index(kind))
+        for name in RecordFields[kind]:
+            if name in value:
+                encode_value(value[name], out)
+            else:
+                out += Byte.pack(MISSING)
+    elif isinstance(value, (list, tuple)):
+        out += Byte.pack(LIST if isinstance(value, list) else TUPLE) + Length.pack(len(value))
+        for item in value:
+            encode_value(item, out)
+    elif isinstance(value, numbers.Integral):
+        # E.g. NumPy integers
+        encode_value(int(value), out)
+    elif isinstance(value, numbers.Real):
+        encode_value(float(value), out)
+    else:
+        raise ValueError("Cannot encode {!r} of type {}.".format(value, type(value).__name__))
+
+
+def decode(data) -> dict:
+    """
+    Unpack bytes from encode into a record
+
+    :type data: bytes
+    :raises ValueError: If the data was not written by this version
+    """
+    magic, version, checksum = Header.unpack_from(data)
+    if magic != Magic:
+        raise ValueError("Not an encoded star system.")
+    if version != FormatVersion or checksum != StringsChecksum:
+        raise ValueError("Star system encoded in format version {}, expected {}.".format(version, FormatVersion))
+    value, offset = decode_value(memoryview(data), Header.size)
+    if offset != len(data):
+        raise ValueError("{} bytes left after decoding.".format(len(data) - offset))
+    return value
+
+
+def decode_value(data, offset) -> tuple:
+    """
+    Decode the value at the offset
+
+    :return: The value and the offset after it
+    """
+    tag = data[offset]
+    offset += 1
+    if tag == FLOAT:
+        return Float.unpack_from(data, offset)[0], offset + Float.size
+    if tag == STRING:
+        return InternedStrings[data[offset]], offset + 1
+    if tag == INT8:
+        return Int8.unpack_from(data, offset)[0], offset + 1
+    if tag == NONE:
+        return None, offset
+    if tag == TRUE or tag == FALSE:
+        return tag == TRUE, offset
+    if tag == INT32:
+        return Int32.unpack_from(data, offset)[0], offset + Int32.size
+    if tag == INT64:
+        return Int64.unpack_from(data, offset)[0], offset + Int64.size
+    if tag == UINT64:
+        return UInt64.unpack_from(data, offset)[0], offset + UInt64.size
+    if tag == TEXT:
+        length = Length.unpack_from(data, offset)[0]
+        offset += Length.size
+        return str(data[offset:offset + length], 'utf-8'), offset + length
+    if tag == LIST or tag == TUPLE:
+        length = Length.unpack_from(data, offset)[0]
+        offset += Length.size
+        items = []
+        for _ in range(length):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return (items if tag == LIST else tuple(items)), offset
+    if tag == RECORD:
+        kind = RecordKinds[data[offset]]
+        offset += 1
+        record = {'record': kind}
+        for name in RecordFields[kind]:
+            if data[offset] == MISSING:
+                offset += 1
+                continue
+            record[name], offset = decode_value(data, offset)
+        return record, offset
+    raise ValueError("Unknown tag {} at offset {}.".format(tag, offset - 1))
@@ -0,0 +1,162 @@
+"""gardenpool.py
+
+Module for keeping seeds of star systems with a Garden world at hand.
+
+Finding a system with a Garden world takes many attempts, see
+starsystem.find_garden_system. A GardenPool searches in the background and
+keeps a few found seeds for every combination of constructor arguments it
+has been warmed up for, so that a request only has to take one.
+"""
+
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .starsystem import find_garden_system
+
+
+def garden_seed(seed, arguments) -> tuple:
+    """
+    Search for a star system with a Garden world, see find_garden_system.
+
+    :param seed: The seed of the first attempt
+    :param arguments: Tuple of (keyword, value) pairs for the StarSystem
+        constructor
+    :type arguments: tuple
+    :return: Tuple (seed, seconds), the seed of the found system and the time
+        the search took. Only the seed is returned, so that a search running
+        in another process sends back a few bytes.
+    """
+    start = time.perf_counter()
+    found, _ = find_garden_system(seed, **dict(arguments))
+    return found, time.perf_counter() - start
+
+
+def pool_key(arguments) -> tuple:
+    """
+    Return the hashable form of a dict of constructor arguments
+    """
+    return tuple(sorted(arguments.items()))
+
+
+class GardenPool:
+    """
+    Bounded pool of seeds of star systems with a Garden world, refilled in
+    the background.
+
+    A seed taken for the arguments `arguments` reproduces its system with
+    StarSystem(rng=random.Random(seed), require_garden=True, lazy=True,
+    **arguments), just like a seed returned by find_garden_system.
+    """
+
+    def __init__(self, size=4, executor=None):
+        """
+        :param size: The number of seeds kept for every combination of
+            arguments
+        :param executor: A concurrent.futures executor running the searches,
+            e.g. a ProcessPoolExecutor to keep them off the interpreter of the
+            caller. Defaults to a single background thread.
+        :type size: int
+        """
+        if size < 1:
+            raise ValueError("The pool needs to hold at least one seed, not {}.".format(size))
+        self.size = size
+        self.__own_executor = executor is None
+        self.__executor = executor or ThreadPoolExecutor(1, thread_name_prefix='garden-pool')
+        self.__seeds = {}
+        self.__pending = {}
+        # Reentrant, because a search that has finished already stores its
+        # seed right away, while the pool is still being refilled
+        self.__lock = threading.RLock()
+        self.__closed = False
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.search_time = 0.
+
+    def warm(self, arguments) -> None:
+        """
+        Start filling the pool for the given constructor arguments. Only
+        these arguments are refilled, so that arbitrary requests cannot make
+        the pool grow without bound.
+
+        :type arguments: dict
+        """
+        with self.__lock:
+            self.__refill(pool_key(arguments))
+
+    def pop(self, arguments):
+        """
+        Take a seed for the given constructor arguments, without waiting.
+
+        :type arguments: dict
+        :return: The seed, or None if there is none at hand. If the pool has
+            been warmed for these arguments, it is refilled in the background.
+        """
+        key = pool_key(arguments)
+        with self.__lock:
+            seeds = self.__seeds.get(key)
+            if seeds:
+                seed = seeds.pop(0)
+                self.hits += 1
+            else:
+                seed = None
+                self.misses += 1
+            if key in self.__seeds:
+                self.__refill(key)
+        return seed
+
+    def __refill(self, key):
+        # Called with the lock held
+        if self.__closed:
+            return
+        seeds = self.__seeds.setdefault(key, [])
+        for _ in range(self.size - len(seeds) - self.__pending.get(key, 0)):
+            start = random.randint(1, sys.maxsize)
+            future = self.__executor.submit(garden_seed, start, key)
+            self.__pending[key] = self.__pending.get(key, 0) + 1
+            future.add_done_callback(lambda future, key=key: self.__store(key, future))
+
+    def __store(self, key, future):
+        with self.__lock:
+            self.__pending[key] -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            seed, seconds = future.result()
+            self.__seeds[key].append(seed)
+            self.produced += 1
+            self.search_time += seconds
+
+    def __len__(self):
+        with self.__lock:
+            return sum(len(seeds) for seeds in self.__seeds.values())
+
+    def stats(self) -> dict:
+        """
+        Return the metrics of the pool:
+
+        - seeds: The number of seeds at hand
+        - pending: The number of searches running or waiting to run
+        - hits, misses: The number of pops that got a seed or came back empty
+        - hit_rate: hits / (hits + misses), None before the first pop
+        - produced: The number of seeds found so far
+        - refill_rate: Seeds found per second of searching, None before the
+          first one
+        """
+        with self.__lock:
+            requests = self.hits + self.misses
+            return {'seeds': sum(len(seeds) for seeds in self.__seeds.values()),
+                    'pending': sum(self.__pending.values()), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / requests if requests else None, 'produced': self.produced,
+                    'refill_rate': self.produced / self.search_time if self.search_time else None}
+
+    def close(self) -> None:
+        """
+        Stop refilling the pool and cancel the searches not started yet
+        """
+        with self.__lock:
+            self.__closed = True
+        if self.__own_executor:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
@@ -1,18 +1,83 @@
+from . import dice
 from .orbitcontents import OrbitContent
 from .satellites import Moon, Moonlet
-from .tables import GGSizeTable
+from .satellitebatch import SatelliteFamily
+from .tables import GGSizeSampler
 
 
 class GasGiant(OrbitContent):
+    __slots__ = ('mass', 'density', 'diameter', 'cloudtop_gravity', 'detail_seed', 'detailed', 'first_family',
+                 'second_family', 'third_family')
+    # Attributes set by make_details, which may be deferred until first access
+    detail_fields = ('first_family', 'second_family', 'third_family')
 
-    def __init__(self, primary, orbitalradius, rollbonus=True):
-        OrbitContent.__init__(self, primary, orbitalradius)
+    def __init__(self, primary, orbitalradius, rollbonus=True, rng=None, lazy=False):
+        OrbitContent.__init__(self, primary, orbitalradius, rng)
         self.size = self.make_size(rollbonus)
         self.mass, self.density = self.make_mass()
         self.diameter = self.make_diameter()
         self.cloudtop_gravity = self.make_cloudtop_gravity()
+        # The moons are drawn from a stream of their own, so that they are the
+        # same no matter when they are generated
+        self.detail_seed = self.roller.roll_seed()
+        self.detailed = False
+        if not lazy:
+            self.make_details()
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, i.e. moons not generated yet
+        if name in GasGiant.detail_fields and not getattr(self, 'detailed', True):
+            self.make_details()
+            return getattr(self, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+    def to_dict(self) -> dict:
+        data = OrbitContent.to_dict(self)
+        if self.detailed:
+            for family in GasGiant.detail_fields:
+                data[family] = [satellite.to_dict() for satellite in getattr(self, family)]
+        return data
+
+    @classmethod
+    def from_dict(cls, data, primary, rng=None):
+        gasgiant = super().from_dict(data, primary, rng)
+        if gasgiant.detailed:
+            roller = gasgiant.roller
+            gasgiant.first_family = [Moonlet.from_dict(moonlet, gasgiant, roller) for moonlet in data['first_family']]
+            gasgiant.second_family = [Moon.from_dict(moon, gasgiant, primary, roller) for moon in data['second_family']]
+            gasgiant.third_family = [Moonlet.from_dict(moonlet, gasgiant, roller) for moonlet in data['third_family']]
+        return gasgiant
+
+    def make_details(self) -> None:
+        """
+        Generate the three moon families.
+
+        Does nothing if they have been generated already.
+        """
+        if self.detailed:
+            return
+        self.begin_details()
         # TODO: Can't these be collapsed into the semantically clearer Moons and Moonlets?
-        self.first_family, self.second_family, self.third_family = self.make_moons()
+        self.finish_details(*self.make_moons())
+
+    def begin_details(self) -> None:
+        """
+        Switch to the stream of the details, before rolling any of them.
+        """
+        self.detailed = True
+        self.roller = dice.DiceRoller.from_seed(self.detail_seed)
+
+    def finish_details(self, first_family, second_family, third_family) -> None:
+        """
+        Store the moon families, which have been generated already, e.g. by
+        satellitebatch.make_details.
+
+        :param second_family: The moons, sorted by orbit
+        :type second_family: Sequence
+        """
+        self.first_family, self.second_family, self.third_family = first_family, second_family, third_family
+        if self.get_number() is not None:
+            self.name_moons()
 
     def __repr__(self):
         return repr("{} Gas Giant".format(self.size))
@@ -57,7 +122,17 @@ class GasGiant(OrbitContent):
         third_family = self.make_third_family()
         return first_family, second_family, third_family
 
+    def roll_family_sizes(self) -> tuple:
+        """
+        Return the numbers of satellites in the three families, without
+        generating them.
+        """
+        return self.first_family_size(), self.second_family_size(), self.third_family_size()
+
     def make_first_family(self) -> list:
+        return [Moonlet(self, 'first', self.roller) for _ in range(self.first_family_size())]
+
+    def first_family_size(self) -> int:
         orbit = self.get_orbit()
         modifier = 0
         if orbit <= 0.1:
@@ -68,10 +143,13 @@ class GasGiant(OrbitContent):
             modifier = -6
         if 0.75 < orbit <= 1.5:
             modifier = -3
-        num_moonlets = self.roller.roll_dice(2, modifier)
-        return [Moonlet(self, 'first') for _ in range(num_moonlets)]
+        return self.roller.roll_dice(2, modifier)
 
     def make_second_family(self) -> list:
+        moons = [Moon(self, self.primary_star, self.roller) for _ in range(self.second_family_size())]
+        return sorted(moons, key=lambda moon: moon.get_orbit())
+
+    def second_family_size(self) -> int:
         orbit = self.get_orbit()
         modifier = 0
         if orbit <= 0.1:
@@ -82,10 +160,12 @@ class GasGiant(OrbitContent):
             modifier = -3
         if 0.75 < orbit <= 1.5:
             modifier = -1
-        num_moons = self.roller.roll_dice(1, modifier)
-        return sorted([Moon(self, self.primary_star) for _ in range(num_moons)], key=lambda moon: moon.get_orbit())
+        return self.roller.roll_dice(1, modifier)
 
     def make_third_family(self) -> list:
+        return [Moonlet(self, 'third', self.roller) for _ in range(self.third_family_size())]
+
+    def third_family_size(self) -> int:
         orbit = self.get_orbit()
         modifier = 0
         if orbit <= 0.5:
@@ -96,13 +176,11 @@ class GasGiant(OrbitContent):
             modifier = -4
         if 1.5 < orbit <= 3:
             modifier = -1
-        num_moonlets = self.roller.roll_dice(1, modifier)
-        return [Moonlet(self, 'third') for _ in range(num_moonlets)]
+        return self.roller.roll_dice(1, modifier)
 
     def make_mass(self) -> tuple:
         size = self.get_size()
-        diceroll = self.roller.roll_dice(3, 0)
-        return GGSizeTable[size][diceroll]
+        return GGSizeSampler[size].sample(self.roller)
 
     def get_mass(self):
         return self.mass
@@ -124,7 +202,16 @@ class GasGiant(OrbitContent):
 
     def set_number(self, number):
         OrbitContent.set_number(self, number)
-        # Name the moons
+        # Moons of deferred details are named once they exist
+        if self.detailed:
+            self.name_moons()
+
+    def name_moons(self):
+        number = self.get_number()
+        if isinstance(self.second_family, SatelliteFamily):
+            # Named as they are materialized
+            self.second_family.set_prefix('{}-{}'.format(self.primary_star.get_letter(), number))
+            return
         counter = 0
         for moon in self.second_family:
             counter += 1
@@ -1,17 +1,24 @@
 from typing import Tuple
 
 from . import dice
+from . import encoding
+from .references import ParentReference, strong_state
+from .tables import orbit_eccentricity, blackbody_temperature
 
 
 class OrbitContent:
     """
     Generic class for contents of orbits.
     """
+    __slots__ = ('roller', 'orbit', '_primary_star', 'blackbody_temperature', 'period', 'name', 'number', 'size',
+                 'eccentricity', 'min_max', '__weakref__')
+    primary_star = ParentReference('_primary_star')
 
     def __init__(self,
                  primary,    # Primary star
-                 orbitalradius):
-        self.roller = dice.DiceRoller()
+                 orbitalradius,
+                 rng=None):  # Source of randomness, see dice.as_roller
+        self.roller = dice.as_roller(rng)
         self.orbit = orbitalradius
         self.primary_star = primary
         primarylum = self.primary_star.get_luminosity()
@@ -23,8 +30,42 @@ class OrbitContent:
         self.eccentricity = 0
         self.min_max = ()
 
+    def __getstate__(self):
+        # Read the slots through their descriptors, so that pickling does not
+        # generate the deferred details of planets and gas giants
+        state = {}
+        for slot in encoding.slot_fields(type(self)).values():
+            try:
+                state[slot.__name__] = slot.__get__(self)
+            except AttributeError:
+                pass
+        return None, strong_state(state)
+
+    def to_dict(self) -> dict:
+        """
+        Return the generated properties as a record, see encoding. Details
+        that have not been generated yet are left out.
+        """
+        return encoding.to_record(self)
+
+    @classmethod
+    def from_dict(cls, data, primary, rng=None):
+        """
+        Recreate orbit content from a record returned by to_dict.
+
+        :param data: The record
+        :param primary: The primary star
+        :param rng: The source of randomness for anything still to be
+            generated, see dice.as_roller
+        :type data: dict
+        """
+        content = encoding.from_record(cls, data)
+        content.roller = dice.as_roller(rng)
+        content.primary_star = primary
+        return content
+
     def make_blackbody_temperature(self, luminosity, orbit) -> float:
-        return 278 * luminosity ** 0.25 * orbit ** -0.5
+        return blackbody_temperature(luminosity, orbit)
 
     def get_blackbody_temp(self) -> float:
         return self.blackbody_temperature
@@ -44,28 +85,7 @@ class OrbitContent:
         Determine eccentricity of orbit with the roll result.
         :param droll: Dice roll value
         """
-        ecc = 0
-        if droll > 3:
-            ecc = 0.05
-        if droll > 6:
-            ecc = 0.1
-        if droll > 9:
-            ecc = 0.15
-        if droll == 12:
-            ecc = 0.2
-        if droll == 13:
-            ecc = 0.3
-        if droll == 14:
-            ecc = 0.4
-        if droll == 15:
-            ecc = 0.5
-        if droll == 16:
-            ecc = 0.6
-        if droll == 17:
-            ecc = 0.7
-        if droll >= 18:
-            ecc = 0.8
-        return ecc
+        return orbit_eccentricity(droll)
 
     def get_eccentricity(self):
         return self.eccentricity
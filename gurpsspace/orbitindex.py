@@ -0,0 +1,135 @@
+"""orbitindex.py
+
+Module for the ordered index of the contents of a planet system.
+
+The contents are keyed by their orbital radius. The radii are kept sorted, so
+that a radius which does not round-trip exactly (e.g. one parsed from a URL)
+can still be found by bisection, and the neighbors of an orbit are found
+without scanning the whole system.
+"""
+
+from bisect import bisect_left, insort
+from collections.abc import MutableMapping
+from math import isclose
+
+# Relative tolerance for looking up orbital radii
+Tolerance = 1e-9
+
+
+class OrbitIndex(MutableMapping):
+    """
+    Mapping from orbital radius to the contents of that orbit, iterated from
+    the inside out.
+    """
+
+    def __init__(self, items=()):
+        """
+        :param items: Mapping or iterable of (orbit, content) pairs
+        """
+        self.__contents = {}
+        self.__orbits = []
+        # Caches for the lookups by number and name, rebuilt when stale
+        self.__numbers = {}
+        self.__names = {}
+        self.update(items)
+
+    @classmethod
+    def fromkeys(cls, orbits, content=None):
+        return cls((orbit, content) for orbit in orbits)
+
+    def __getitem__(self, orbit):
+        try:
+            return self.__contents[orbit]
+        except KeyError:
+            return self.__contents[self.find(orbit)]
+
+    def __setitem__(self, orbit, content):
+        if orbit not in self.__contents:
+            key = self.find(orbit, default=None)
+            if key is None:
+                insort(self.__orbits, orbit)
+            else:
+                orbit = key
+        self.__contents[orbit] = content
+
+    def __delitem__(self, orbit):
+        orbit = self.find(orbit)
+        del self.__contents[orbit]
+        del self.__orbits[self.position(orbit)]
+
+    def __iter__(self):
+        return iter(self.__orbits)
+
+    def __len__(self):
+        return len(self.__orbits)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, dict(self.items()))
+
+    def find(self, orbit, tolerance=Tolerance, **kwargs) -> float:
+        """
+        Return the key of the orbit closest to the given radius
+
+        :param orbit: The orbital radius in AU
+        :param tolerance: The largest relative deviation to accept
+        :param default: If given, returned instead of raising KeyError when
+            there is no such orbit
+        :raises KeyError: If no orbit is within the tolerance
+        """
+        if orbit in self.__contents:
+            return orbit
+        i = bisect_left(self.__orbits, orbit)
+        candidates = [key for key in self.__orbits[max(i - 1, 0):i + 1] if isclose(key, orbit, rel_tol=tolerance)]
+        if candidates:
+            return min(candidates, key=lambda key: abs(key - orbit))
+        if 'default' in kwargs:
+            return kwargs['default']
+        raise KeyError(orbit)
+
+    def position(self, orbit) -> int:
+        """
+        Return the number of orbits further in than the given one
+        """
+        return bisect_left(self.__orbits, self.find(orbit))
+
+    def inward(self, orbit):
+        """
+        Return the next orbit inwards, or None for the innermost orbit
+        """
+        i = self.position(orbit)
+        return self.__orbits[i - 1] if i > 0 else None
+
+    def outward(self, orbit):
+        """
+        Return the next orbit outwards, or None for the outermost orbit
+        """
+        i = self.position(orbit)
+        return self.__orbits[i + 1] if i + 1 < len(self.__orbits) else None
+
+    def by_number(self, number):
+        """
+        Return the content with the given number, see OrbitContent.set_number
+
+        :raises KeyError: If there is no such content
+        """
+        return self.__lookup(self.__numbers, lambda content: content.get_number(), number)
+
+    def by_name(self, name):
+        """
+        Return the content with the given name
+
+        :raises KeyError: If there is no such content
+        """
+        return self.__lookup(self.__names, lambda content: content.get_name(), name)
+
+    def __lookup(self, cache, attribute, value):
+        content = cache.get(value)
+        # Names and numbers are set on the contents themselves, so the cache
+        # is checked against them and rebuilt if it is outdated
+        if content is None or self.__contents.get(content.get_orbit()) is not content or attribute(content) != value:
+            cache.clear()
+            cache.update((attribute(content), content) for content in self.__contents.values() if content is not None)
+            content = cache.get(value)
+        if content is None:
+            raise KeyError(value)
+        return content
@@ -0,0 +1,233 @@
+"""orbitlayout.py
+
+Module for laying out the planet orbits of one or many stars at once.
+
+Starting from a given orbit, the orbits outwards (or inwards) are spaced by
+ratios from the Orbital Spacing Table (GURPS Space p. 107). The ratios are
+drawn in blocks, every block is placed with a cumulative product (or
+quotient) and checked against the orbital limits and the forbidden zone as
+a whole. Once an orbit fails, the fallbacks of the rulebook apply: outwards
+1.4 times, 2.0 times or 0.15 AU further out, inwards 1.4 times further in.
+"""
+
+import numpy as np
+
+from . import dice
+from .tables import OrbitalSpaceSampler
+
+# Orbits need to be at least this far apart, in AU
+MinimumSpacing = 0.15
+
+# The number of spacing ratios drawn per star and block
+BlockSize = 8
+
+
+class OrbitLimits:
+    """
+    The orbital limits and forbidden zones of many stars, as arrays.
+    """
+
+    def __init__(self, inner, outer, forbidden_inner=None, forbidden_outer=None):
+        """
+        :param inner: The inner orbital limit of every star.
+        :param outer: The outer orbital limit of every star.
+        :param forbidden_inner: The inner edge of the forbidden zone of every
+            star, NaN for stars without forbidden zone.
+        :param forbidden_outer: The outer edge of the forbidden zone.
+        :type inner: numpy.ndarray
+        """
+        self.inner = np.asarray(inner, dtype=float)
+        self.outer = np.asarray(outer, dtype=float)
+        if forbidden_inner is None:
+            forbidden_inner = forbidden_outer = np.full(len(self.inner), np.nan)
+        self.forbidden_inner = np.asarray(forbidden_inner, dtype=float)
+        self.forbidden_outer = np.asarray(forbidden_outer, dtype=float)
+
+    @classmethod
+    def from_stars(cls, stars):
+        """
+        Collect the limits of a list of Stars
+        """
+        forbidden = [star.get_forbidden_zone() if star.has_forbidden_zone() else (np.nan, np.nan) for star in stars]
+        return cls(inner=[star.get_orbit_limits()[0] for star in stars],
+                   outer=[star.get_orbit_limits()[1] for star in stars],
+                   forbidden_inner=[zone[0] for zone in forbidden],
+                   forbidden_outer=[zone[1] for zone in forbidden])
+
+    def __len__(self):
+        return len(self.inner)
+
+    def subset(self, rows):
+        """
+        Return the limits of the selected stars
+
+        :param rows: Index or boolean array selecting the stars
+        """
+        return OrbitLimits(self.inner[rows], self.outer[rows], self.forbidden_inner[rows], self.forbidden_outer[rows])
+
+    def allowed(self, orbits, rows):
+        """
+        Vectorized PlanetSystem.allowed_orbit
+
+        :param orbits: Array of orbits, one row (or value) per star
+        :param rows: The stars the orbits belong to
+        :return: Boolean array shaped like orbits
+        """
+        orbits = np.asarray(orbits)
+        shape = (-1,) + (1,) * (orbits.ndim - 1)
+        inner = self.inner[rows].reshape(shape)
+        outer = self.outer[rows].reshape(shape)
+        forbidden_inner = self.forbidden_inner[rows].reshape(shape)
+        forbidden_outer = self.forbidden_outer[rows].reshape(shape)
+        result = (orbits >= inner) & (orbits <= outer)
+        # Comparisons with NaN are False, so stars without forbidden zone
+        # need to be let through explicitly
+        outside = np.isnan(forbidden_inner) | (orbits <= forbidden_inner) | (orbits >= forbidden_outer)
+        return result & outside
+
+
+def orbits_outward(start, limits, roller, block=BlockSize) -> list:
+    """
+    Lay out the orbits outwards of the start orbit of every star
+
+    :param start: The start orbit of every star, itself not part of the result
+    :param limits: The limits of the stars
+    :param roller: The DiceRoller providing the generator
+    :type start: numpy.ndarray
+    :type limits: OrbitLimits
+    :type roller: DiceRoller
+    :return: List with the list of orbits of every star, from the inside out
+    """
+    return _layout(start, limits, roller, block, outward=True)
+
+
+def orbits_inward(start, limits, roller, block=BlockSize) -> list:
+    """
+    Lay out the orbits inwards of the start orbit of every star
+
+    :return: List with the list of orbits of every star, from the inside out
+    """
+    return [orbits[::-1] for orbits in _layout(start, limits, roller, block, outward=False)]
+
+
+def _layout(start, limits, roller, block, outward) -> list:
+    generator = roller.generator()
+    sampler = OrbitalSpaceSampler.distribution()
+    ratios_of = np.asarray(sampler.values, dtype=float)
+    old = np.array(start, dtype=float)
+    results = [[] for _ in range(len(old))]
+    active = np.arange(len(old))
+    while len(active):
+        draws = generator.integers(sampler.total, size=(len(active), block))
+        ratios = ratios_of[np.searchsorted(sampler.cumulative, draws, side='right')]
+        # Every orbit follows from the previous one exactly as in a loop
+        steps = np.concatenate([old[active, None], ratios], axis=1)
+        if outward:
+            orbits = np.multiply.accumulate(steps, axis=1)
+            spacing = np.diff(orbits, axis=1)
+        else:
+            orbits = np.divide.accumulate(steps, axis=1)
+            spacing = -np.diff(orbits, axis=1)
+        orbits = orbits[:, 1:]
+        ok = limits.allowed(orbits, active) & (spacing >= MinimumSpacing)
+        # The number of orbits placed before the first failure
+        placed = np.where(ok.all(axis=1), block, np.argmin(ok, axis=1))
+        for i, (row, count) in enumerate(zip(active, placed)):
+            if count:
+                results[row] += orbits[i, :count].tolist()
+        old[active] = np.where(placed > 0, orbits[np.arange(len(active)), np.maximum(placed - 1, 0)], old[active])
+
+        failed = active[placed < block]
+        if outward:
+            new, success = _fallback_outward(old[failed], limits, failed)
+        else:
+            new, success = _fallback_inward(old[failed], limits, failed)
+        for row, orbit in zip(failed[success], new[success]):
+            results[row].append(float(orbit))
+        old[failed] = np.where(success, new, old[failed])
+        active = np.concatenate([active[placed == block], failed[success]])
+        active.sort()
+    return results
+
+
+def _fallback_outward(old, limits, rows) -> tuple:
+    wider = old * 1.4
+    widest = old * 2.0
+    take_wider = limits.allowed(wider, rows) & (wider - old >= MinimumSpacing)
+    take_widest = limits.allowed(widest, rows) & (widest - old >= MinimumSpacing)
+    # Orbits too close to the star for the 1.4 times spacing get the minimal
+    # spacing instead
+    closest = old + MinimumSpacing
+    take_closest = limits.allowed(closest, rows) & limits.allowed(wider, rows)
+    new = np.select([take_wider, take_widest, take_closest], [wider, widest, closest], np.nan)
+    return new, take_wider | take_widest | take_closest
+
+
+def _fallback_inward(old, limits, rows) -> tuple:
+    narrower = old / 1.4
+    success = limits.allowed(narrower, rows) & (old - narrower >= MinimumSpacing)
+    return narrower, success
+
+
+def create_orbits(arrangements, first_gas_orbits, limits, roller) -> list:
+    """
+    Lay out all orbits of many planet systems, like PlanetSystem.createorbits
+
+    :param arrangements: The gas giant arrangement of every planet system
+    :param first_gas_orbits: The orbit of the first gas giant of every planet
+        system, ignored for the arrangement 'None'
+    :param limits: The limits of the stars
+    :param roller: The DiceRoller providing the generator
+    :type arrangements: list
+    :type first_gas_orbits: list
+    :type limits: OrbitLimits
+    :return: List with the list of orbits of every planet system, from the
+        inside out
+    """
+    arrangements = np.asarray(arrangements)
+    first = np.asarray(first_gas_orbits, dtype=float)
+    rows = np.arange(len(first))
+    none = arrangements == 'None'
+    epistellar = arrangements == 'Epistellar'
+    # Without gas giants, start at the inner limit or just outside of a
+    # forbidden zone reaching over it
+    innermost = np.where(limits.forbidden_inner < limits.inner, limits.forbidden_outer, limits.inner)
+    # Epistellar gas giants are further in than the inner limit, so the next
+    # orbit is 0.15 AU further out, or at the inner limit
+    closest = first + MinimumSpacing
+    closest = np.where(limits.allowed(closest, rows), closest, limits.inner)
+    start = np.select([none, epistellar], [innermost, closest], first)
+
+    outward = orbits_outward(start, limits, roller)
+    inward = orbits_inward(start[~none & ~epistellar], limits.subset(~none & ~epistellar), roller)
+    inward = iter(inward)
+    orbits = []
+    for row in rows:
+        if none[row]:
+            orbits.append([float(start[row])] + outward[row])
+        elif epistellar[row]:
+            orbits.append([float(first[row]), float(start[row])] + outward[row])
+        else:
+            orbits.append(next(inward) + [float(first[row])] + outward[row])
+    return orbits
+
+
+def make_planetsystems(stars, rng=None, require_garden=False, lazy=False) -> None:
+    """
+    Generate the planet systems of many stars, laying out their orbits at once
+
+    :param stars: The Stars, with their forbidden zones set
+    :param rng: The source of randomness of the orbits, see DiceRoller. All
+        else comes from the planet system stream of every star.
+    :param require_garden: See PlanetSystem
+    :param lazy: See PlanetSystem
+    :type stars: list
+    """
+    for star in stars:
+        star.make_planetsystem(require_garden=require_garden, lazy=lazy, layout=False)
+    systems = [star.planetsystem for star in stars]
+    orbits = create_orbits([system.get_gasgiant_arrangement() for system in systems],
+                           [system.get_first_gasgiant_orbit() for system in systems],
+                           OrbitLimits.from_stars(stars), dice.DiceRoller(rng))
+    for system, system_orbits in zip(systems, orbits):
+        system.set_orbits(system_orbits)
@@ -1,19 +1,91 @@
+from . import dice
 from .world import World
 from .satellites import Moon, Moonlet
+from .satellitebatch import SatelliteFamily
 from .tables import SizeToInt
 
 from typing import Tuple, List, Union
 
 
 class Planet(World):
+    __slots__ = ('detail_seed', 'detailed', 'nummoons', 'moons', 'nummoonlets', 'moonlets', 'tte', 'rotperiod',
+                 'daylength', 'moonlength', 'axtilt')
+    # Attributes set by make_details, which may be deferred until first access
+    detail_fields = ('nummoons', 'moons', 'nummoonlets', 'moonlets', 'tte', 'rotperiod', 'volcanism', 'tectonic',
+                     'rvm', 'resources', 'habitability', 'affinity', 'daylength', 'moonlength', 'axtilt')
 
-    def __init__(self, primary, orbitalradius, sizeclass):
-        World.__init__(self, primary, orbitalradius, sizeclass)
-        self.nummoons, self.moons = self.generate_moons()
-        if self.nummoons == 0:
-            self.nummoonlets, self.moonlets = self.generate_moonlets()
+    def __init__(self, primary, orbitalradius, sizeclass, rng=None, lazy=False):
+        World.__init__(self, primary, orbitalradius, sizeclass, rng)
+        # The details are drawn from a stream of their own, so that they are
+        # the same no matter when they are generated
+        self.detail_seed = self.roller.roll_seed()
+        self.detailed = False
+        if lazy:
+            # Drop the placeholders set by World, so that the first access
+            # generates the details
+            for name in self.detail_fields:
+                try:
+                    delattr(self, name)
+                except AttributeError:
+                    pass
         else:
-            self.nummoonlets, self.moonlets = 0, []
+            self.make_details()
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, i.e. details not generated yet
+        if name in Planet.detail_fields and not getattr(self, 'detailed', True):
+            self.make_details()
+            return getattr(self, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+    def to_dict(self) -> dict:
+        data = World.to_dict(self)
+        if self.detailed:
+            data['moons'] = [moon.to_dict() for moon in self.moons]
+            data['moonlets'] = [moonlet.to_dict() for moonlet in self.moonlets]
+        return data
+
+    @classmethod
+    def from_dict(cls, data, primary, rng=None):
+        planet = super().from_dict(data, primary, rng)
+        if planet.detailed:
+            planet.moons = [Moon.from_dict(moon, planet, primary, planet.roller) for moon in data['moons']]
+            planet.moonlets = [Moonlet.from_dict(moonlet, planet, planet.roller) for moonlet in data['moonlets']]
+        return planet
+
+    def make_details(self) -> None:
+        """
+        Generate satellites, rotation, geology, resources and calendar.
+
+        Does nothing if the details have been generated already.
+        """
+        if self.detailed:
+            return
+        self.begin_details()
+        nummoons, nummoonlets = self.roll_satellite_numbers()
+        moons = sorted([Moon(self, self.primary_star, self.roller) for _ in range(nummoons)], key=lambda moon: moon.get_orbit())
+        moonlets = [Moonlet(self, rng=self.roller) for _ in range(nummoonlets)]
+        self.finish_details(moons, moonlets)
+
+    def begin_details(self) -> None:
+        """
+        Switch to the stream of the details, before rolling any of them.
+        """
+        self.detailed = True
+        self.roller = dice.DiceRoller.from_seed(self.detail_seed)
+
+    def finish_details(self, moons, moonlets) -> None:
+        """
+        Generate everything but the satellites, which have been generated
+        already, e.g. by satellitebatch.make_details.
+
+        :param moons: The moons, sorted by orbit
+        :param moonlets: The moonlets
+        :type moons: Sequence
+        :type moonlets: Sequence
+        """
+        self.nummoons, self.moons = len(moons), moons
+        self.nummoonlets, self.moonlets = len(moonlets), moonlets
         self.tte = self.make_tidals()
         self.rotperiod = self.make_rotation()
         self.volcanism = self.make_volcanism()
@@ -23,6 +95,8 @@ class Planet(World):
         self.affinity = self.make_affinity()
         self.daylength, self.moonlength = self.make_calendar()
         self.axtilt = self.make_axial_tilt()
+        if self.get_number() is not None:
+            self.name_moons()
 
     def print_info(self):
         print("--- Planet {} Info ---".format(self.get_angled_name()))
@@ -74,19 +148,16 @@ class Planet(World):
     def type(self):
         return "Terrestrial"
 
-    def generate_moons(self) -> Tuple[int, List]:
-        roll_mod = -4
-        roll_mod += self.moon_roll_modifier()
-        moon_roll = self.roller.roll_dice(1, roll_mod)
-
-        return moon_roll, sorted([Moon(self, self.primary_star) for _ in range(moon_roll)], key=lambda moon: moon.get_orbit())
-
-    def generate_moonlets(self) -> Tuple[int, List]:
-        roll_mod = -2
-        roll_mod += self.moon_roll_modifier()
-        moonlet_roll = self.roller.roll_dice(1, roll_mod)
-
-        return moonlet_roll, [Moonlet(self) for _ in range(moonlet_roll)]
+    def roll_satellite_numbers(self) -> Tuple[int, int]:
+        """
+        Return the numbers of moons and moonlets. Only planets without moons
+        have moonlets.
+        """
+        moon_roll = self.roller.roll_dice(1, -4 + self.moon_roll_modifier())
+        moonlet_roll = 0
+        if moon_roll == 0:
+            moonlet_roll = self.roller.roll_dice(1, -2 + self.moon_roll_modifier())
+        return moon_roll, moonlet_roll
 
     def moon_roll_modifier(self) -> int:
         modifier = 0
@@ -255,7 +326,16 @@ class Planet(World):
 
     def set_number(self, number):
         World.set_number(self, number)
-        # Name the moons
+        # Moons of deferred details are named once they exist
+        if self.detailed:
+            self.name_moons()
+
+    def name_moons(self):
+        number = self.get_number()
+        if isinstance(self.moons, SatelliteFamily):
+            # Named as they are materialized
+            self.moons.set_prefix('{}-{}'.format(self.primary_star.get_letter(), number))
+            return
         counter = 0
         for moon in self.moons:
             counter += 1
@@ -2,28 +2,106 @@ from . import dice
 from .gasgiant import GasGiant
 from .asteroidbelt import AsteroidBelt
 from .planet import Planet
-from .tables import OrbitalSpace
+from .constraints import GenerationAborted, in_garden_band
+from .orbitindex import OrbitIndex
+from .references import ParentReference, strong_state
+from .summary import SystemSummary
+from .tables import OrbitalSpaceSampler, OrbitEccentricitySampler
+
+# The classes of orbit contents by the names of their records
+ContentClasses = {cls.__name__: cls for cls in (AsteroidBelt, GasGiant, Planet)}
 
 
 class PlanetSystem:
+    parentstar = ParentReference('_parentstar')
 
-    def __init__(self, parentstar):
-        self.roller = dice.DiceRoller()
+    def __init__(self, parentstar, rng=None, require_garden=False, lazy=False, layout=True):
+        """
+        :param parentstar: The star this planet system orbits
+        :param rng: Source of randomness, see dice.DiceRoller
+        :param require_garden: If True, raise GenerationAborted as soon as the
+            planet system cannot contain a Garden world anymore
+        :param lazy: If True, planets and gas giants generate their satellites
+            and other details only when they are first accessed
+        :param layout: If False, stop after placing the first gas giant. The
+            orbits are then laid out elsewhere and passed to set_orbits, e.g.
+            by orbitlayout.make_planetsystems
+        """
+        self.roller = dice.as_roller(rng)
+        self.lazy = lazy
         self.parentstar = parentstar
+        self.__requiregarden = require_garden
+        self.__orbitcontents = OrbitIndex()
+        self.__summary = SystemSummary()
+        self.__read_star(parentstar)
+        self.make_gasgiant_arrangement()
+        self.place_first_gasgiant()
+        if layout:
+            self.createorbits()
+            self.populate()
+
+    def __getstate__(self):
+        return strong_state(self.__dict__)
+
+    def __read_star(self, parentstar):
         self.__innerlimit, self.__outerlimit = parentstar.get_orbit_limits()
         self.__snowline = parentstar.get_snowline()
         self.__primarylum = parentstar.get_luminosity()
         self.__forbidden = parentstar.has_forbidden_zone()
         if self.__forbidden:
             self.__innerforbidden, self.__outerforbidden = parentstar.get_forbidden_zone()
-        self.make_gasgiant_arrangement()
-        self.place_first_gasgiant()
-        self.createorbits()
+
+    def to_dict(self) -> dict:
+        """
+        Return the planet system as a record, see encoding. The orbital
+        limits are left out, they are taken from the star again.
+        """
+        return {'record': 'PlanetSystem', 'lazy': self.lazy, 'requiregarden': self.__requiregarden,
+                'gasarrangement': self.__gasarrangement, 'firstgasorbit': self.__firstgasorbit,
+                'orbitarray': list(self.__orbitarray),
+                'contents': [content.to_dict() for content in self.__orbitcontents.values()]}
+
+    @classmethod
+    def from_dict(cls, data, parentstar, rng=None):
+        """
+        Recreate a planet system from a record returned by to_dict.
+
+        :param parentstar: The star this planet system orbits
+        :param rng: Source of randomness for the details still to be
+            generated, see dice.as_roller
+        """
+        system = cls.__new__(cls)
+        system.roller = dice.as_roller(rng)
+        system.lazy = data['lazy']
+        system.parentstar = parentstar
+        system.__requiregarden = data['requiregarden']
+        system.__read_star(parentstar)
+        system.__gasarrangement = data['gasarrangement']
+        system.__firstgasorbit = data['firstgasorbit']
+        system.__orbitarray = list(data['orbitarray'])
+        system.__orbitcontents = OrbitIndex(
+            (content['orbit'], ContentClasses[content['record']].from_dict(content, parentstar, system.roller))
+            for content in data['contents'])
+        system.__summary = SystemSummary(system.__orbitcontents.values())
+        return system
+
+    def set_orbits(self, orbits):
+        """
+        Use the given orbits, sorted from the inside out, and generate their
+        contents
+        """
+        self.__orbitarray = list(orbits)
+        self.populate()
+
+    def populate(self):
+        self.check_garden_possible()
         self.make_content_list()
         self.place_gas_giants()
+        self.check_garden_possible()
         self.fill_orbits()
         self.name_contents()
         self.make_eccentricities()
+        self.__summary = SystemSummary(self.__orbitcontents.values())
 
     def printinfo(self):
         print("--------------------")
@@ -56,6 +134,15 @@ class PlanetSystem:
     def get_orbitcontents(self):
         return self.__orbitcontents
 
+    def get_summary(self):
+        return self.__summary
+
+    def get_gasgiant_arrangement(self):
+        return self.__gasarrangement
+
+    def get_first_gasgiant_orbit(self):
+        return self.__firstgasorbit
+
     def allowed_orbit(self, testorbit):
         result = testorbit >= self.__innerlimit
         result &= testorbit <= self.__outerlimit
@@ -127,7 +214,7 @@ class PlanetSystem:
         old_orbit = startorbit
         new_orbit = 0
         while (allowed):
-            orbital_separation = OrbitalSpace[self.roller.roll_dice(3, 0)]
+            orbital_separation = OrbitalSpaceSampler.sample(self.roller)
             new_orbit = old_orbit * orbital_separation
             if self.allowed_orbit(new_orbit) and new_orbit - old_orbit >= 0.15:
                 orbits += [new_orbit]
@@ -164,31 +251,53 @@ class PlanetSystem:
         oldorbit = startorbit
         neworbit = 0
         while (allowed):
-            orbsep = OrbitalSpace[self.roller.roll_dice(3, 0)]
+            orbsep = OrbitalSpaceSampler.sample(self.roller)
             neworbit = oldorbit / orbsep
             if self.allowed_orbit(neworbit) and oldorbit - neworbit >= 0.15:
-                orbits = [neworbit] + orbits
+                orbits.append(neworbit)
                 oldorbit = neworbit
             else:
                 allowed = False
                 # Check to fit one last orbit
                 neworbit = oldorbit / 1.4
                 if self.allowed_orbit(neworbit) and oldorbit - neworbit >= 0.15:
-                    orbits = [oldorbit / 1.4] + orbits
+                    orbits.append(oldorbit / 1.4)
                     # Because this worked we'll try to do this one more time
                     oldorbit = oldorbit / 1.4
                     allowed = True
+        # The orbits were found from the outside in
+        orbits.reverse()
+        return orbits
+
+    def garden_orbits(self) -> list:
+        """
+        Return the orbits that are still free and warm enough for a Garden world
+        """
+        orbits = []
+        for orbit in self.__orbitarray:
+            if self.__gasarrangement != 'None' and orbit == self.__firstgasorbit:
+                continue
+            if self.__orbitcontents.get(orbit) is None and in_garden_band(self.__primarylum, orbit):
+                orbits.append(orbit)
         return orbits
 
+    def check_garden_possible(self):
+        """
+        Abort the generation if a Garden world is required but impossible
+        """
+        if self.__requiregarden and not self.garden_orbits():
+            raise GenerationAborted("No free orbit for a Garden world around star {}".format(
+                self.parentstar.get_letter()))
+
     def make_content_list(self):
         """
         Initialize orbit content dictionary
 
-        Make a dictionary: Orbit: Content. Initially this will only contain the
-        first gas giant. (If gas giant arrangement is not "None")
+        Make an OrbitIndex: Orbit: Content. Initially this will only contain
+        the first gas giant. (If gas giant arrangement is not "None")
         """
 
-        self.__orbitcontents = dict.fromkeys(self.__orbitarray)
+        self.__orbitcontents = OrbitIndex.fromkeys(self.__orbitarray)
 
         # Put the first gas giant
         if self.__gasarrangement is not 'None':
@@ -197,7 +306,7 @@ class PlanetSystem:
 
             # Add a GasGiant to the dict
             self.__orbitcontents[self.__firstgasorbit] = GasGiant(
-                self.parentstar, self.__firstgasorbit, bonus)
+                self.parentstar, self.__firstgasorbit, bonus, rng=self.roller, lazy=self.lazy)
 
     def place_gas_giants(self):
         """
@@ -214,32 +323,32 @@ class PlanetSystem:
             for stellar_orbit in small_orbits:
                 if self.roller.roll_dice(3, 0) <= 6:
                     self.__orbitcontents[stellar_orbit] = GasGiant(self.parentstar,
-                                                                   stellar_orbit, True)
+                                                                   stellar_orbit, True, rng=self.roller, lazy=self.lazy)
             for stellar_orbit in large_orbits:
                 if self.roller.roll_dice(3, 0) <= 14:
                     self.__orbitcontents[stellar_orbit] = GasGiant(self.parentstar,
-                                                                   stellar_orbit, self.gas_giant_bonus(stellar_orbit))
+                                                                   stellar_orbit, self.gas_giant_bonus(stellar_orbit), rng=self.roller, lazy=self.lazy)
         elif self.__gasarrangement is 'Eccentric':
             for stellar_orbit in small_orbits:
                 if self.roller.roll_dice(3, 0) <= 8:
                     self.__orbitcontents[stellar_orbit] = GasGiant(self.parentstar,
-                                                                   stellar_orbit, True)
+                                                                   stellar_orbit, True, rng=self.roller, lazy=self.lazy)
             for stellar_orbit in large_orbits:
                 if self.roller.roll_dice(3, 0) <= 14:
                     self.__orbitcontents[stellar_orbit] = GasGiant(self.parentstar,
-                                                                   stellar_orbit, self.gas_giant_bonus(stellar_orbit))
+                                                                   stellar_orbit, self.gas_giant_bonus(stellar_orbit), rng=self.roller, lazy=self.lazy)
         elif self.__gasarrangement is 'Conventional':
             for stellar_orbit in large_orbits:
                 if self.roller.roll_dice(3, 0) <= 15:
                     self.__orbitcontents[stellar_orbit] = GasGiant(self.parentstar,
-                                                                   stellar_orbit, self.gas_giant_bonus(stellar_orbit))
+                                                                   stellar_orbit, self.gas_giant_bonus(stellar_orbit), rng=self.roller, lazy=self.lazy)
 
     def gas_giant_bonus(self, orbit):
         bonus = orbit <= self.__snowline
         if not bonus:
-            gg_index = self.__orbitarray.index(orbit)
-            if gg_index > 0:
-                bonus = self.__orbitarray[gg_index - 1] < self.__snowline
+            inner = self.__orbitcontents.inward(orbit)
+            if inner is not None:
+                bonus = inner < self.__snowline
         return bonus
 
     def fill_orbits(self):
@@ -250,24 +359,32 @@ class PlanetSystem:
         # Determine eligible orbits to roll for
         roll_orbits = [orb for orb in self.__orbitarray if self.__orbitcontents[orb] is None]
         roll_orbits.sort()
+        # The last orbit which can still bring forth a Garden world, if needed
+        last_garden_orbit = None
+        if self.__requiregarden:
+            last_garden_orbit = max(self.garden_orbits())
+        garden = False
         # Go through these orbits and determine the contents
         for orbit in roll_orbits:
-            roll_mod = self.orbit_fill_modifier(self.__orbitarray.index(orbit))
+            roll_mod = self.orbit_fill_modifier(orbit)
             dice_roll = self.roller.roll_dice(3, roll_mod)
             if 4 <= dice_roll <= 6:
-                obj = AsteroidBelt(self.parentstar, orbit)
+                obj = AsteroidBelt(self.parentstar, orbit, rng=self.roller)
             if 7 <= dice_roll <= 8:
-                obj = Planet(self.parentstar, orbit, "Tiny")
+                obj = Planet(self.parentstar, orbit, "Tiny", rng=self.roller, lazy=self.lazy)
             if 9 <= dice_roll <= 11:
-                obj = Planet(self.parentstar, orbit, "Small")
+                obj = Planet(self.parentstar, orbit, "Small", rng=self.roller, lazy=self.lazy)
             if 12 <= dice_roll <= 15:
-                obj = Planet(self.parentstar, orbit, "Standard")
+                obj = Planet(self.parentstar, orbit, "Standard", rng=self.roller, lazy=self.lazy)
             if dice_roll >= 16:
-                obj = Planet(self.parentstar, orbit, "Large")
+                obj = Planet(self.parentstar, orbit, "Large", rng=self.roller, lazy=self.lazy)
             if not dice_roll <= 3:
                 self.__orbitcontents[orbit] = obj
+                garden |= obj.type() == 'Terrestrial' and obj.get_type() == 'Garden'
+            if orbit == last_garden_orbit and not garden:
+                raise GenerationAborted("No Garden world around star {}".format(self.parentstar.get_letter()))
         # Now remove all orbits that still have None as content
-        orc = {k: v for k, v in self.__orbitcontents.items() if v is not None}
+        orc = OrbitIndex((k, v) for k, v in self.__orbitcontents.items() if v is not None)
         self.__orbitcontents = orc
 
     def name_contents(self):
@@ -278,51 +395,47 @@ class PlanetSystem:
             self.__orbitcontents[key].set_name(name)
             self.__orbitcontents[key].set_number(counter)
 
-    def orbit_fill_modifier(self, orbitindex):
+    def orbit_fill_modifier(self, orbit):
         modifier = 0
-        orbits = self.__orbitarray
+        inner = self.__orbitcontents.inward(orbit)
+        outer = self.__orbitcontents.outward(orbit)
         # If the orbit is adjacent to a forbidden zone
         if self.__forbidden:
-            if orbitindex == 0 and self.__outerforbidden < orbits[orbitindex]:
+            if inner is None and self.__outerforbidden < orbit:
                 modifier -= 6
-            if orbitindex == len(orbits) - 1 and self.__innerforbidden > orbits[orbitindex]:
+            if outer is None and self.__innerforbidden > orbit:
                 modifier -= 6
 
         # If the orbit is adjacent to the inner or outer limit
-        if orbitindex == 0 or orbitindex == len(orbits) - 1:
+        if inner is None or outer is None:
             modifier -= 3
 
-        # If the next orbit outward is occupied by a gas giant
-        if orbitindex is not len(orbits) - 1:
-            if self.__orbitcontents[orbits[orbitindex + 1]] is not None:
-                if self.__orbitcontents[orbits[orbitindex + 1]].type() is "Gas Giant":
-                    modifier -= 6
-
-        # If the next orbit inward is occupied by a gas giant
-        if orbitindex is not 0:
-            if self.__orbitcontents[orbits[orbitindex - 1]] is not None:
-                if self.__orbitcontents[orbits[orbitindex - 1]].type() is "Gas Giant":
-                    modifier -= 3
-
+        # The modifiers for a gas giant in the next orbit outward (-6) or
+        # inward (-3) are not applied, generated systems have never used them
         return modifier
 
     def make_eccentricities(self):
+        innermost = next(iter(self.__orbitcontents), None)
         for k, oc in self.__orbitcontents.items():
             if self.__gasarrangement == 'Conventional':
                 bonus = -6
-            elif k == list(self.__orbitcontents)[0] \
+            elif k == innermost \
                     and self.__gasarrangement == 'Epistellar' and oc.type() == 'Gas Giant':
                 bonus = -6
             elif self.__gasarrangement == 'Eccentric' and oc.type() == 'Gas Giant' and k < self.__snowline:
                 bonus = +4
             else:
                 bonus = 0
-            oc.eccentricity = oc.make_eccentricity(self.roller.roll_dice(3, bonus))
+            oc.eccentricity = OrbitEccentricitySampler.sample(self.roller, bonus)
             oc.min_max = oc.make_min_max()
 
+    def make_details(self):
+        """
+        Generate the deferred details of all planets and gas giants
+        """
+        for orbit, content in self.__orbitcontents.items():
+            if hasattr(content, 'make_details'):
+                content.make_details()
+
     def has_garden(self):
-        ret = False
-        for k, p in self.__orbitcontents.items():
-            if p.type() == 'Terrestrial' and p.get_type() == 'Garden':
-                ret = True
-        return ret
+        return self.__summary.has_garden
@@ -0,0 +1,746 @@
+"""probability.py
+
+Module for computing the exact probabilities of generation outcomes.
+
+Most of the generation is dice rolls looked up in tables, so the outcomes of
+a planet, e.g. its world type or habitability, have a finite distribution for
+a given size class, orbit and primary star. A Distribution holds such a
+distribution with exact weights, and planet_distribution propagates it
+through the rules of World and Planet, from World.make_type to
+World.make_affinity, keeping only the fields the later rules still depend on.
+Like worldbatch, this restates the rules, so both need to change together.
+
+The layouts of planet systems take too many rolls to enumerate, so questions
+about whole star systems are answered by system_estimate: it samples star
+systems down to their planet orbits and size classes and adds up the exact
+probabilities of their planets. The Estimate it returns names the parts that
+were sampled and those that were computed exactly.
+"""
+
+import math
+from bisect import bisect_left
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+from operator import itemgetter
+
+from . import dice
+from .starsystem import StarSystem
+from .tables import (AtmCompFlags, MAtmoTable, OpenClusterAgeSampler, SequenceTable, SizeConstraintsTable, SizeToInt,
+                     StEvoIndexSampler, StEvoTable, TempFactor, blackbody_temperature, pressure_category,
+                     world_climate, world_resource_table)
+from .worldbatch import GeologicActivities, TectonicLimits, VolcanismLimits, WorldResources
+
+
+class Distribution:
+    """
+    Finite probability distribution with exact probabilities.
+
+    The outcomes are hashable values with integer weights, the probability of
+    an outcome being its weight divided by the total weight. Distributions
+    are not changed after they have been created.
+    """
+
+    def __init__(self, weighted_values):
+        """
+        :param weighted_values: Pairs of (value, weight) or a dict mapping the
+            values to their weights, the weights being non-negative ints.
+            Equal values are merged.
+        :type weighted_values: dict or iterable
+        """
+        if isinstance(weighted_values, dict):
+            weighted_values = weighted_values.items()
+        weights = {}
+        for value, weight in weighted_values:
+            if weight < 0:
+                raise ValueError("Weights cannot be negative, {}.".format(weight))
+            if weight > 0:
+                weights[value] = weights.get(value, 0) + weight
+        if not weights:
+            raise ValueError("At least one value needs a positive weight.")
+        self.__weights = weights
+        self.total = sum(weights.values())
+
+    @classmethod
+    def certain(cls, value):
+        """
+        Return the distribution of a value that always comes up
+        """
+        return cls({value: 1})
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def roll(cls, dice_num, modifier=0, sides=6):
+        """
+        Return the distribution of XdY +- Z, clamped at zero like
+        DiceRoller.roll_dice
+
+        :param dice_num: X, the number of dice
+        :param modifier: Z, a static modifier to the result
+        :param sides: Y, the type of dice
+        """
+        return cls(dice.roll_distribution(dice_num, modifier, sides))
+
+    @classmethod
+    def from_sampler(cls, sampler, modifier=0):
+        """
+        Return the distribution of the values drawn by a sampler.
+
+        :param sampler: A WeightedSampler or TableSampler
+        :param modifier: The roll modifier of a TableSampler
+        :type sampler: dice.WeightedSampler or dice.TableSampler
+        """
+        if isinstance(sampler, dice.TableSampler):
+            sampler = sampler.distribution(modifier)
+        return cls(sampler.weights())
+
+    def __iter__(self):
+        return iter(self.__weights)
+
+    def __len__(self):
+        return len(self.__weights)
+
+    def __contains__(self, value):
+        return value in self.__weights
+
+    def __repr__(self):
+        probabilities = {value: str(probability) for value, probability in self.probabilities().items()}
+        return '{}({})'.format(type(self).__name__, probabilities)
+
+    def weights(self) -> dict:
+        """
+        Return a dict mapping the values to their weights
+        """
+        return dict(self.__weights)
+
+    def probabilities(self) -> dict:
+        """
+        Return a dict mapping the values to their probabilities as Fractions
+        """
+        return {value: Fraction(weight, self.total) for value, weight in self.__weights.items()}
+
+    def probability(self, event) -> Fraction:
+        """
+        Return the probability of an event.
+
+        :param event: A value, or a callable taking a value and returning
+            True for the values making up the event
+        """
+        if callable(event):
+            weight = sum(weight for value, weight in self.__weights.items() if event(value))
+        else:
+            weight = self.__weights.get(event, 0)
+        return Fraction(weight, self.total)
+
+    def mean(self, function=None):
+        """
+        Return the expected value of the values, or of a function of them.
+
+        :return: A Fraction for integer values, a float for float values
+        """
+        if function is None:
+            function = _identity
+        return sum(function(value) * Fraction(weight, self.total) for value, weight in self.__weights.items())
+
+    def map(self, function):
+        """
+        Return the distribution of a function of the values
+        """
+        return Distribution((function(value), weight) for value, weight in self.__weights.items())
+
+    def bind(self, function):
+        """
+        Return the distribution of a random step depending on the values.
+
+        :param function: Takes a value and returns the Distribution of the
+            next outcome, or a plain value for an outcome that is certain
+        :return: The distribution of the next outcomes, over all values
+        """
+        branches = []
+        for value, weight in self.__weights.items():
+            branches.append((weight, as_distribution(function(value))))
+        common = math.lcm(*(branch.total for _, branch in branches))
+        weights = {}
+        for weight, branch in branches:
+            scale = weight * (common // branch.total)
+            for value, branch_weight in branch.__weights.items():
+                weights[value] = weights.get(value, 0) + scale * branch_weight
+        return Distribution.__reduced(weights)
+
+    def given(self, predicate):
+        """
+        Return the conditional distribution of the values meeting the
+        predicate
+
+        :raises ValueError: If no value meets it
+        """
+        weights = {value: weight for value, weight in self.__weights.items() if predicate(value)}
+        if not weights:
+            raise ValueError("The condition has a probability of zero.")
+        return Distribution.__reduced(weights)
+
+    @classmethod
+    def __reduced(cls, weights):
+        # Keep the weights small, they grow with every step
+        divisor = math.gcd(*weights.values())
+        return cls({value: weight // divisor for value, weight in weights.items()})
+
+
+def _identity(value):
+    return value
+
+
+def as_distribution(outcome) -> Distribution:
+    """
+    Return the outcome of a rule as a Distribution, a plain value being
+    certain
+    """
+    return outcome if isinstance(outcome, Distribution) else Distribution.certain(outcome)
+
+
+# The most joint outcomes propagate keeps track of, to fail early instead of
+# running out of memory
+OutcomeLimit = 100000
+
+
+def propagate(steps, fields) -> Distribution:
+    """
+    Return the joint distribution of fields computed by a chain of rules.
+
+    :param steps: Triples of (name, dependencies, rule), in the order of
+        generation. A rule takes the values of the fields named in the tuple
+        dependencies and returns the Distribution of its field, or a plain
+        value.
+    :param fields: The names of the fields wanted
+    :type steps: list
+    :type fields: tuple
+    :return: The Distribution of tuples of the values of the fields
+    :raises ValueError: If there are more than OutcomeLimit joint outcomes,
+        e.g. for the joint distribution of many fields
+
+    Only the rules the fields depend on are applied, and a field is
+    marginalized out as soon as no later rule depends on it, so that the
+    number of joint outcomes stays small.
+    """
+    needed = set(fields)
+    for name, dependencies, rule in reversed(steps):
+        if name in needed:
+            needed.update(dependencies)
+    order = [step for step in steps if step[0] in needed]
+    names = ()
+    state = {(): 1}
+    for position, (name, dependencies, rule) in enumerate(order):
+        later = set(fields).union(*(step[1] for step in order[position + 1:]))
+        # Merge the outcomes that only differ in fields not needed anymore
+        columns = [i for i, column in enumerate(names) if column in later or column in dependencies]
+        state = _merged(state, columns)
+        names = tuple(names[i] for i in columns)
+        arguments = _picker([names.index(dependency) for dependency in dependencies])
+        kept = _picker([i for i, column in enumerate(names) if column in later])
+        # The outcomes of the rule for every combination of its arguments
+        outcomes = {}
+        for values in state:
+            key = arguments(values)
+            if key not in outcomes:
+                outcome = as_distribution(rule(*key))
+                outcomes[key] = outcome.total, outcome.weights().items()
+        common = math.lcm(*(outcome_total for outcome_total, _ in outcomes.values()))
+        extended = {}
+        for values, weight in state.items():
+            outcome_total, outcome = outcomes[arguments(values)]
+            prefix = kept(values)
+            scale = weight * (common // outcome_total)
+            for value, value_weight in outcome:
+                extended_values = prefix + (value,)
+                extended[extended_values] = extended.get(extended_values, 0) + scale * value_weight
+            if len(extended) > OutcomeLimit:
+                raise ValueError("More than {} joint outcomes after {}, ask for fewer fields.".format(
+                    OutcomeLimit, name))
+        names = tuple(column for column in names if column in later) + (name,)
+        state = extended
+    return Distribution(_merged(state, [names.index(field) for field in fields]))
+
+
+def _picker(indices):
+    # Return a function taking the values at the indices of a tuple, as a tuple
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda values: (values[index],)
+    return itemgetter(*indices) if indices else lambda values: ()
+
+
+def _merged(state, columns) -> dict:
+    # Marginalize the joint outcomes onto the columns
+    if len(columns) == len(next(iter(state))):
+        return state
+    pick = _picker(columns)
+    merged = {}
+    for values, weight in state.items():
+        key = pick(values)
+        merged[key] = merged.get(key, 0) + weight
+    return merged
+
+
+def age_distribution(open_cluster=False) -> Distribution:
+    """
+    Return the distribution of the age of a star system in billion years,
+    following StarSystem.random_age and StarSystem.random_open_cluster_age
+
+    :param open_cluster: Whether the system is in an open cluster
+    """
+    if open_cluster:
+        return Distribution.from_sampler(OpenClusterAgeSampler).bind(_open_cluster_age_row)
+    return Distribution.roll(3).bind(_age_row)
+
+
+def _open_cluster_age_row(row):
+    if row == 'extreme':
+        return 0.001
+    if row == 'young':
+        return _aged(0.1, 0.3, 0.05)
+    return 2.0
+
+
+def _age_row(roll):
+    if roll == 3:
+        # Extreme Population I
+        return 0.001
+    if roll <= 6:
+        return _aged(0.1, 0.3, 0.05)
+    if roll <= 10:
+        return _aged(2.0, 0.6, 0.1)
+    if roll <= 14:
+        return _aged(5.6, 0.6, 0.1)
+    if roll <= 17:
+        return _aged(8.0, 0.6, 0.1)
+    return _aged(10, 0.6, 0.1)
+
+
+def _aged(base, first_step, second_step):
+    # Two 1d - 1 rolls on top of the base age, in the order of the rules
+    steps = Distribution.roll(1, -1)
+    return steps.bind(lambda first: steps.map(lambda second: base + first * first_step + second * second_step))
+
+
+# The properties of a star that the planets around it depend on, see Star
+StarOutcome = namedtuple('StarOutcome', ('index', 'sequence', 'mass', 'luminosity', 'temperature', 'star_type'))
+
+
+def star_distribution(age) -> Distribution:
+    """
+    Return the distribution of the properties of a star of the given age,
+    following Star
+
+    :param age: The age of the star system in billion years
+    :type age: float
+    :return: The Distribution of StarOutcomes
+    """
+    if age <= 0:
+        raise ValueError("Age needs to be a positive number.")
+    return Distribution.from_sampler(StEvoIndexSampler).bind(lambda index: _star(index, age))
+
+
+def _star(index, age):
+    internaltype = StEvoTable['internaltype'][index]
+    mspan = StEvoTable['Mspan'][index]
+    sspan = StEvoTable['Sspan'][index]
+    gspan = StEvoTable['Gspan'][index]
+    lmin = StEvoTable['Lmin'][index]
+    lmax = StEvoTable['Lmax'][index]
+    temp = StEvoTable['temp'][index]
+    # Same order of checks as Star.find_sequence
+    sequence = 0
+    if internaltype == 1 and age > mspan:
+        sequence = 3
+    elif internaltype == 2:
+        if age > (mspan + sspan + gspan):
+            sequence = 3
+        elif age > (mspan + sspan):
+            sequence = 2
+        elif age > mspan:
+            sequence = 1
+
+    def star(mass, luminosity, temperature):
+        return StarOutcome(index, sequence, mass, luminosity, temperature, _star_type(temperature))
+
+    mass = StEvoTable['mass'][index]
+    if sequence == 0:
+        luminosity = lmin if mspan == 0 else lmin + (age / mspan * (lmax - lmin))
+        return star(mass, luminosity, temp)
+    if sequence == 1:
+        return star(mass, lmax, temp - ((age - mspan) / sspan * (temp - 4800)))
+    if sequence == 2:
+        return Distribution.roll(2, -2).map(lambda roll: star(mass, 25 * lmax, roll * 200 + 3000))
+    return Distribution.roll(2, -2).map(lambda roll: star(roll * 0.05 + 0.9, 0.001, 8000))
+
+
+@lru_cache(maxsize=None)
+def _star_type(temperature):
+    # Star.get_star_type
+    return StEvoTable['type'][min(range(len(StEvoTable['temp'])),
+                                  key=lambda i: abs(StEvoTable['temp'][i] - temperature))]
+
+
+# Fields of the outcome of a planet for planet_distribution, in the order
+# they are generated. The names are those of the attributes of Planet.
+PlanetFields = ('world_type', 'hydrocover', 'atmmass', 'averagesurface', 'climatetype', 'atmflags', 'hasmarginal',
+                'marginal', 'density', 'diameter', 'surfacegravity', 'mass', 'pressure', 'presscat', 'nummoons',
+                'volcanism', 'tectonic', 'rvm', 'resources', 'habitability', 'affinity')
+
+# Habitability modifiers (GURPS Space p. 88 and p. 121)
+PressureModifiers = {'Very Thin': 1, 'Thin': 2, 'Standard': 3, 'Dense': 3, 'Very Dense': 1, 'Superdense': 1}
+ClimateModifiers = {'Cold': 1, 'Hot': 1, 'Chilly': 2, 'Cool': 2, 'Normal': 2, 'Warm': 2, 'Tropical': 2}
+GeologicPenalties = {'Heavy': 1, 'Extreme': 2}
+# Roll modifiers by volcanic activity, for the resources and four times that
+# for the tectonics (World.get_resourcebonus and World.make_tectonism)
+GeologicModifiers = {'None': -2, 'Light': -1, 'Moderate': 0, 'Heavy': 1, 'Extreme': 2}
+
+
+def planet_steps(size, blackbody, star_mass, age, orbit) -> list:
+    """
+    Return the rules of World and Planet as steps for propagate, see
+    PlanetFields. Steps with names starting with an underscore hold partial
+    results of the habitability.
+    """
+    big = size == 'Standard' or size == 'Large'
+
+    def world_type():
+        # World.make_type
+        result = 'Ice'
+        if size == 'Tiny' and blackbody >= 141:
+            result = 'Rock'
+        if size == 'Small':
+            if blackbody <= 80:
+                result = 'Hadean'
+            if blackbody >= 141:
+                result = 'Rock'
+        if size == 'Standard' and blackbody <= 80:
+            result = 'Hadean'
+        if big:
+            if 150 < blackbody <= 230 and star_mass <= 0.65:
+                result = 'Ammonia'
+            if 240 < blackbody <= 320:
+                bonus = min(math.floor(age / 0.5), 5 if size == 'Large' else 10)
+                return Distribution.roll(3, bonus).map(lambda roll: 'Garden' if roll >= 18 else 'Ocean')
+            if 320 < blackbody <= 500:
+                result = 'Greenhouse'
+            if blackbody > 500:
+                result = 'Chthonian'
+        return result
+
+    def hydrocover(world_type):
+        # World.make_hydrographics
+        if size == 'Small' and world_type == 'Ice':
+            hydro = Distribution.roll(1, 2).map(lambda roll: roll * 10)
+        elif world_type == 'Ammonia':
+            hydro = Distribution.roll(2).map(lambda roll: min(roll * 10, 100))
+        elif world_type == 'Ice' and big:
+            hydro = Distribution.roll(2, -10).map(lambda roll: roll * 10)
+        elif world_type == 'Ocean' or world_type == 'Garden':
+            hydro = Distribution.roll(1, 6 if size == 'Large' else 4).map(lambda roll: min(roll * 10, 100))
+        elif world_type == 'Greenhouse':
+            hydro = Distribution.roll(2, -7).map(lambda roll: roll * 10)
+        else:
+            return 0
+        return hydro.bind(_varied)
+
+    def atmmass(world_type):
+        if size == 'Tiny' or world_type in ('Hadean', 'Chthonian', 'Rock'):
+            return 0
+        return Distribution.roll(3).map(lambda roll: roll / 10.)
+
+    def averagesurface(world_type, atmmass, hydrocover):
+        # World.get_absorption_greenhouse and World.make_climate
+        if world_type != 'Garden' and world_type != 'Ocean':
+            absorption, greenhouse = TempFactor[world_type][size]
+        else:
+            absorption = 0.84
+            if hydrocover <= 90:
+                absorption = 0.88
+            if hydrocover <= 50:
+                absorption = 0.92
+            if hydrocover <= 20:
+                absorption = 0.95
+            greenhouse = 0.16
+        return absorption * (1 + (atmmass * greenhouse)) * blackbody
+
+    def atmflags(world_type):
+        # The composition of World.make_atmosphere
+        if size == 'Small' and world_type == 'Ice':
+            return Distribution.roll(3).map(lambda roll: AtmCompFlags['Suffocating'] | AtmCompFlags[
+                'Lethally Toxic' if roll > 15 else 'Mildly Toxic'])
+        if world_type == 'Ammonia' or world_type == 'Greenhouse':
+            return AtmCompFlags['Suffocating'] | AtmCompFlags['Lethally Toxic'] | AtmCompFlags['Corrosive']
+        if size == 'Standard' and (world_type == 'Ice' or world_type == 'Ocean'):
+            return Distribution.roll(3).map(lambda roll: AtmCompFlags['Suffocating'] | (
+                AtmCompFlags['Mildly Toxic'] if roll > 12 else 0))
+        if size == 'Large' and (world_type == 'Ice' or world_type == 'Ocean'):
+            return AtmCompFlags['Highly Toxic'] | AtmCompFlags['Suffocating']
+        return 0
+
+    def hasmarginal(world_type):
+        if world_type == 'Garden':
+            return Distribution.roll(3).map(lambda roll: roll >= 12)
+        return False
+
+    def marginal(hasmarginal):
+        return Distribution.roll(3).map(MAtmoTable.__getitem__) if hasmarginal else ''
+
+    def air(atmflags, hasmarginal, climatetype):
+        # Whether the atmosphere is breathable, with the modifiers of
+        # World.make_habitability that do not depend on the pressure
+        components = bin(atmflags).count('1')
+        if components > 0:
+            return False, {2: -1, 3: -2}.get(components, 0)
+        return True, (0 if hasmarginal else 1) + ClimateModifiers.get(climatetype, 0)
+
+    def liquid(world_type, hydrocover):
+        # The hydrographic modifier of World.make_habitability
+        if world_type not in ('Garden', 'Ocean'):
+            return 0
+        if (0 < hydrocover < 60) or (90 < hydrocover < 100):
+            return 1
+        return 2 if hydrocover > 0 else 0
+
+    def density(world_type):
+        if world_type in ('Ammonia', 'Hadean', 'Sulfur') or (world_type == 'Ice' and size != 'Large'):
+            densities = (0.3, 0.4, 0.5, 0.6, 0.7)
+        elif world_type == 'Rock':
+            densities = (0.6, 0.7, 0.8, 0.9, 1.0)
+        else:
+            densities = (0.8, 0.9, 1.0, 1.1, 1.2)
+        return Distribution.roll(3).map(
+            lambda roll: densities[(roll >= 7) + (roll >= 11) + (roll >= 15) + (roll == 18)])
+
+    def diameter(density):
+        smallest, largest = SizeConstraintsTable[size]
+        term = (blackbody / density) ** (0.5)
+        smallest = term * smallest
+        largest = term * largest
+        return Distribution.roll(2, -2).map(lambda roll: roll * 0.1 * (largest - smallest) + smallest)
+
+    def pressure(world_type, mass, surfacegravity):
+        if size == 'Tiny' or world_type in ('Hadean', 'Chthonian') or (size == 'Small' and world_type == 'Rock'):
+            return 0
+        factor = 1
+        if size == 'Small' and world_type == 'Ice':
+            factor = 10
+        if size == 'Large':
+            factor = 5
+        if world_type == 'Greenhouse':
+            factor *= 100
+        return mass * factor * surfacegravity
+
+    def presscat(world_type, pressure):
+        if size == 'Tiny' or world_type == 'Hadean':
+            return 'None'
+        if world_type == 'Chthonian' or (size == 'Small' and world_type == 'Rock'):
+            return 'Trace'
+        return pressure_category(pressure)
+
+    def atmosphere(air, presscat):
+        breathable, modifier = air
+        return modifier + PressureModifiers.get(presscat, 0) if breathable else modifier
+
+    def nummoons():
+        # Planet.roll_satellite_numbers and Planet.moon_roll_modifier
+        if orbit <= 0.5:
+            return 0
+        modifier = SizeToInt[size] - 2
+        if 0.5 < orbit <= 0.75:
+            modifier -= 3
+        if 0.75 < orbit <= 1.5:
+            modifier -= 1
+        return Distribution.roll(1, -4 + modifier)
+
+    def volcanism(surfacegravity, nummoons):
+        bonus = round(surfacegravity / age * 40) + (0 if nummoons == 0 else 5 if nummoons == 1 else 10)
+        return Distribution.roll(3, bonus).map(lambda roll: GeologicActivities[bisect_left(VolcanismLimits, roll)])
+
+    def tectonic(volcanism, shallow, nummoons):
+        if size == 'Small' or size == 'Tiny':
+            return 'None'
+        bonus = 4 * GeologicModifiers[volcanism] + (-2 if shallow else 0)
+        bonus += + (0 if nummoons == 0 else 2 if nummoons == 1 else 4)
+        return Distribution.roll(3, bonus).map(lambda roll: GeologicActivities[bisect_left(TectonicLimits, roll)])
+
+    def rvm(volcanism):
+        return Distribution.roll(3, GeologicModifiers[volcanism]).map(lambda roll: world_resource_table[roll][0])
+
+    def habitability(volcanism, tectonic, atmosphere, liquid):
+        modifier = atmosphere + liquid - GeologicPenalties.get(volcanism, 0) - GeologicPenalties.get(tectonic, 0)
+        return max(modifier, -2)
+
+    return [
+        ('world_type', (), world_type),
+        ('hydrocover', ('world_type',), hydrocover),
+        ('atmmass', ('world_type',), atmmass),
+        ('averagesurface', ('world_type', 'atmmass', 'hydrocover'), averagesurface),
+        ('climatetype', ('averagesurface',), world_climate),
+        ('atmflags', ('world_type',), atmflags),
+        ('hasmarginal', ('world_type',), hasmarginal),
+        ('marginal', ('hasmarginal',), marginal),
+        ('_air', ('atmflags', 'hasmarginal', 'climatetype'), air),
+        ('_liquid', ('world_type', 'hydrocover'), liquid),
+        ('_shallow', ('hydrocover',), lambda hydrocover: hydrocover < 50),
+        ('density', ('world_type',), density),
+        ('diameter', ('density',), diameter),
+        ('surfacegravity', ('density', 'diameter'), lambda density, diameter: density * diameter),
+        ('mass', ('density', 'diameter'), lambda density, diameter: density * diameter ** 3),
+        ('pressure', ('world_type', 'mass', 'surfacegravity'), pressure),
+        ('presscat', ('world_type', 'pressure'), presscat),
+        ('_atmosphere', ('_air', 'presscat'), atmosphere),
+        ('nummoons', (), nummoons),
+        ('volcanism', ('surfacegravity', 'nummoons'), volcanism),
+        ('tectonic', ('volcanism', '_shallow', 'nummoons'), tectonic),
+        ('rvm', ('volcanism',), rvm),
+        ('resources', ('rvm',), WorldResources.__getitem__),
+        ('habitability', ('volcanism', 'tectonic', '_atmosphere', '_liquid'), habitability),
+        ('affinity', ('rvm', 'habitability'), lambda rvm, habitability: rvm + habitability),
+    ]
+
+
+def _varied(hydro):
+    # The +- 1d5 % variation of World.make_hydrographics, 1d2 deciding the sign
+    if not 10 <= hydro <= 90:
+        return hydro
+    variations = Distribution.roll(1, 0, 5)
+    return Distribution.roll(1, 0, 2).bind(
+        lambda sign: variations.map(lambda variation: hydro + variation if sign == 1 else hydro - variation))
+
+
+def planet_distribution(size, orbit, luminosity, star_mass, age, fields='world_type') -> Distribution:
+    """
+    Return the exact distribution of outcomes of a terrestrial planet.
+
+    :param size: The size class, 'Tiny', 'Small', 'Standard' or 'Large'
+    :param orbit: The orbital radius in AU
+    :param luminosity: The luminosity of the primary star
+    :param star_mass: The mass of the primary star
+    :param age: The age of the star system in billion years
+    :param fields: A field of PlanetFields, or a tuple of them for their
+        joint distribution
+    :type size: str
+    :type fields: str or tuple
+    :return: The Distribution of the values of the field, or of tuples of
+        the values of the fields
+    """
+    if size not in SizeConstraintsTable:
+        raise ValueError("Unknown size class {}.".format(size))
+    names = (fields,) if isinstance(fields, str) else tuple(fields)
+    for name in names:
+        if name not in PlanetFields:
+            raise ValueError("Unknown field {}, use one of {}.".format(name, PlanetFields))
+    steps = planet_steps(size, blackbody_temperature(luminosity, orbit), star_mass, age, orbit)
+    joint = propagate(steps, names)
+    return joint.map(lambda values: values[0]) if isinstance(fields, str) else joint
+
+
+def planet_distribution_around(star_type, size, orbit, fields='world_type', sequence='Main',
+                               open_cluster=False) -> Distribution:
+    """
+    Return the exact distribution of outcomes of a terrestrial planet around
+    a star of the given spectral type, over the ages of star systems.
+
+    :param star_type: The spectral type, e.g. 'G2', see StEvoTable
+    :param size: The size class of the planet
+    :param orbit: The orbital radius in AU
+    :param fields: A field of PlanetFields, or a tuple of them
+    :param sequence: The sequence of the star, see SequenceTable, or None for
+        any
+    :param open_cluster: Whether the system is in an open cluster
+    :raises ValueError: If no star of that type and sequence can be generated
+
+    E.g. planet_distribution_around('G2', 'Standard', 0.9).probability('Ocean')
+    is the probability of an Ocean world at 0.9 AU from a G2V star.
+    """
+    if sequence is not None and sequence not in SequenceTable.values():
+        raise ValueError("Unknown sequence {}, use one of {}.".format(sequence, list(SequenceTable.values())))
+    stars = age_distribution(open_cluster).bind(lambda age: star_distribution(age).map(lambda star: (age, star)))
+
+    def matches(pair):
+        star = pair[1]
+        return star.star_type == star_type and (sequence is None or SequenceTable[star.sequence] == sequence)
+
+    try:
+        stars = stars.given(matches)
+    except ValueError:
+        raise ValueError("There are no {} stars of type {}.".format(sequence or 'any', star_type)) from None
+    return stars.bind(lambda pair: planet_distribution(size, orbit, pair[1].luminosity, pair[1].mass, pair[0], fields))
+
+
+class Estimate:
+    """
+    Estimated probability of an event in a star system, with the parts of the
+    generation that were sampled and those that were computed exactly.
+    """
+
+    def __init__(self, probability, standard_error, expected_count, samples, sampled, exact):
+        """
+        :param probability: The estimated probability that a system has at
+            least one planet with the event
+        :param standard_error: The standard error of the probability
+        :param expected_count: The estimated mean number of planets with the
+            event per system
+        :param samples: The number of sampled systems
+        :param sampled: The names of the parts that were sampled
+        :param exact: The names of the parts that were computed exactly
+        """
+        self.probability = probability
+        self.standard_error = standard_error
+        self.expected_count = expected_count
+        self.samples = samples
+        self.sampled = sampled
+        self.exact = exact
+
+    def __repr__(self):
+        return '{}({:.4f} +- {:.4f}, {} samples of {}, exact {})'.format(
+            type(self).__name__, self.probability, self.standard_error, self.samples, ', '.join(self.sampled),
+            ', '.join(self.exact))
+
+
+def system_estimate(event, fields='world_type', samples=1000, rng=None, **kwargs) -> Estimate:
+    """
+    Estimate the probability that a star system has a planet with an event,
+    e.g. a Garden world.
+
+    :param event: A value of the fields, or a callable taking a value and
+        returning True for the values making up the event
+    :param fields: A field of PlanetFields, or a tuple of them
+    :param samples: The number of star systems to sample
+    :param rng: The source of randomness shared by the sampled systems, see
+        dice.DiceRoller
+    :param kwargs: Keyword arguments for the StarSystem constructor
+    :type samples: int
+    :type rng: random.Random or numpy.random.Generator or None
+    :return: An Estimate
+
+    The stars and the layouts of the planet systems, down to the orbits and
+    size classes of the planets, are sampled by generating star systems. The
+    outcomes of the planets are not sampled, their exact probabilities given
+    the layout are averaged instead, which has a smaller variance than
+    counting sampled systems with the event.
+    """
+    if samples < 2:
+        raise ValueError("Need at least two samples, not {}.".format(samples))
+    arguments = dict(kwargs, lazy=True, detail='planets')
+    probabilities = []
+    counts = []
+    for _ in range(samples):
+        system = StarSystem(rng=rng, **arguments)
+        none = 1
+        count = 0
+        for star in system.stars:
+            for body in star.planetsystem.get_orbitcontents().values():
+                if body.type() != 'Terrestrial':
+                    continue
+                probability = planet_distribution(body.get_size(), body.get_orbit(), star.get_luminosity(),
+                                                  star.get_mass(), star.get_age(), fields).probability(event)
+                none *= 1 - probability
+                count += probability
+        probabilities.append(float(1 - none))
+        counts.append(float(count))
+    mean = sum(probabilities) / samples
+    variance = sum((probability - mean) ** 2 for probability in probabilities) / (samples - 1)
+    return Estimate(mean, math.sqrt(variance / samples), sum(counts) / samples, samples,
+                    sampled=('stars', 'planet system layouts'), exact=('planets',))
@@ -0,0 +1,56 @@
+"""references.py
+
+Module for the references of bodies to their parents.
+
+Parents own their children (a star its planet system, a planet its moons),
+while the children refer back to their parents only weakly. The graph of
+bodies thus has no reference cycles and is freed by reference counting
+alone, without the cyclic garbage collector having to walk it.
+"""
+
+import weakref
+
+
+class ParentReference:
+    """
+    Descriptor for an attribute holding a weak reference to a parent.
+
+    Pickled bodies store their parent itself, because a part of a system
+    pickled on its own, e.g. one planet system, would otherwise lose its
+    parents when it is loaded. Such bodies keep a strong reference.
+    """
+
+    def __init__(self, storage):
+        """
+        :param storage: The slot or attribute storing the reference
+        :type storage: str
+        """
+        self.storage = storage
+        self.name = storage
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        parent = getattr(instance, self.storage)
+        if isinstance(parent, weakref.ref):
+            parent = parent()
+            if parent is None:
+                raise ReferenceError("The {} of this {} no longer exists.".format(self.name, type(instance).__name__))
+        return parent
+
+    def __set__(self, instance, parent):
+        setattr(instance, self.storage, None if parent is None else weakref.ref(parent))
+
+
+def strong_state(state) -> dict:
+    """
+    Return a copy of the state of an object for pickling, with all weak
+    references replaced by the objects they refer to
+
+    :param state: Mapping from attribute names to values
+    :type state: dict
+    """
+    return {name: value() if isinstance(value, weakref.ref) else value for name, value in state.items()}
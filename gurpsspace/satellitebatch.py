@@ -0,0 +1,353 @@
+"""satellitebatch.py
+
+Module for generating the moons and moonlets of many planets and gas giants
+at once.
+
+MoonBatch follows the rules of Moon like WorldBatch follows those of World.
+make_details runs the whole satellite stage for a list of bodies, which may
+come from one or many star systems, and hands every body its satellites as a
+SatelliteFamily, which only creates the Moon and Moonlet objects once they
+are accessed. The satellites come out with the same distribution as those
+generated one by one, but not from the same random stream.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from . import dice
+from .references import ParentReference, strong_state
+from .satellites import Moon, Moonlet
+from .tables import SizeToInt
+from .worldbatch import GeologicActivities, LARGE, TINY, WorldBatch, WorldResources
+
+# The multipliers of a 1d roll giving slow rotations, indexed by a 2d roll,
+# see Moon.make_rotation
+SlowRotation = np.array([0, 0, 0, 0, 0, 0, 0, 2, 5, 10, 20, 50, 100])
+
+
+class MoonBatch(WorldBatch):
+    """
+    The properties of many moons, stored as one array per property.
+
+    Row i holds the properties of moon i, under the attribute names used by
+    Moon. moon() turns a row into a Moon.
+    """
+
+    def __init__(self, parent_gasgiant, parent_size, parent_blackbody, parent_diameter, parent_mass, parent_period,
+                 star_mass, age, rng=None):
+        """
+        :param parent_gasgiant: Whether the parent of every moon is a gas
+            giant.
+        :param parent_size: Size code of the parent of every moon, see
+            IntToSize.
+        :param parent_blackbody: Blackbody temperature of every parent.
+        :param parent_diameter: Diameter of every parent.
+        :param parent_mass: Mass of every parent.
+        :param parent_period: Orbital period of every parent in years.
+        :param star_mass: Mass of the primary star of every moon.
+        :param age: Age of the star system of every moon.
+        :param rng: The source of randomness, see DiceRoller.
+        :type rng: random.Random or numpy.random.Generator or None
+        """
+        arrays = np.broadcast_arrays(parent_gasgiant, parent_size, parent_blackbody, parent_diameter, parent_mass,
+                                     parent_period, star_mass, age)
+        if arrays[0].ndim != 1:
+            raise ValueError("Need one-dimensional arrays of parent properties.")
+        (self.parent_gasgiant, self.parent_size, parent_blackbody, self.parent_diameter, self.parent_mass,
+         self.parent_period, star_mass, age) = [array.copy() for array in arrays]
+        self.roller = dice.DiceRoller(rng)
+        self.sizeclass = self.make_size()
+        self.blackbody_temperature = parent_blackbody.astype(float)
+        self.make_physics(star_mass, age)
+        self.volcanism = self.make_volcanism(age, np.where(self.parent_gasgiant, 5, 0))
+        self.tectonic = self.make_tectonism(self.volcanism, 0)
+        self.rvm = self.make_resources(self.volcanism)
+        self.habitability = self.make_habitability(self.volcanism, self.tectonic)
+        self.affinity = self.rvm + self.habitability
+        self.orbit = self.make_orbit()
+        self.period = 0.166 * (self.orbit ** 3 / (self.mass + self.parent_mass)) ** 0.5
+        self.tte = np.round(2230000 * self.parent_mass * self.diameter / self.orbit ** 3 * age / self.parent_mass)
+        self.rotperiod = self.make_rotation()
+        self.alenday = apparent_length(self.parent_period * 365.26, self.rotperiod)
+        self.alenplanet = apparent_length(self.period, self.rotperiod)
+
+    def __len__(self):
+        return len(self.parent_size)
+
+    @classmethod
+    def from_parents(cls, parents, rng=None):
+        """
+        Generate the moons of a list of planets and gas giants.
+
+        :param parents: Pairs of (parent, number of moons)
+        :param rng: The source of randomness, see DiceRoller.
+        :type parents: list
+        :return: A MoonBatch with the moons of each parent in consecutive rows,
+            in the order of the parents
+        """
+        counts = [count for _, count in parents]
+        bodies = [parent for parent, _ in parents]
+
+        def repeat(values, dtype=float):
+            return np.repeat(np.array(values, dtype=dtype), counts)
+
+        return cls(parent_gasgiant=repeat([body.type() == 'Gas Giant' for body in bodies], bool),
+                   parent_size=repeat([SizeToInt[body.get_size()] for body in bodies], np.int64),
+                   parent_blackbody=repeat([body.get_blackbody_temp() for body in bodies]),
+                   parent_diameter=repeat([body.get_diameter() for body in bodies]),
+                   parent_mass=repeat([body.get_mass() for body in bodies]),
+                   parent_period=repeat([body.get_period() for body in bodies]),
+                   star_mass=repeat([body.primary_star.get_mass() for body in bodies]),
+                   age=repeat([body.primary_star.get_age() for body in bodies]),
+                   rng=rng)
+
+    def make_size(self) -> np.ndarray:
+        # Gas giants count as Large. Moon.make_size makes rolls of 15 and more
+        # two sizes smaller as well, which is kept here.
+        parentsize = np.where(self.parent_gasgiant, LARGE, self.parent_size)
+        roll = self.roll(np.ones(len(self), dtype=bool), 3, 0)
+        return np.maximum(parentsize - np.where(roll >= 12, 2, 3), TINY)
+
+    def make_orbit(self) -> np.ndarray:
+        """
+        :return: Array of the orbital radii in Earth diameters
+        """
+        gasgiant = self.parent_gasgiant
+        terrestrial = ~gasgiant
+        # Moons close in size to their terrestrial parent orbit further out
+        difference = self.parent_size - self.sizeclass
+        bonus = np.select([difference == 2, difference == 1], [2, 4], 0)
+        orbit = self.roll(terrestrial, 2, bonus) * 2.5 * self.parent_diameter
+        roll = self.roll(gasgiant, 3, 3)
+        roll += self.roll(gasgiant & (roll >= 15), 2, 0)
+        return np.where(gasgiant, roll / 2. * self.parent_diameter, orbit)
+
+    def make_rotation(self) -> np.ndarray:
+        """
+        :return: Array of the rotational periods in days, negative for
+            retrograde rotation
+        """
+        everyone = np.ones(len(self), dtype=bool)
+        free = self.tte <= 50
+        bonus = np.array([18, 14, 10, 6])[self.sizeclass]
+        roll = self.roll(free, 3, bonus)
+        rotation = (roll + self.tte) / 24.
+        slow = free & ((rotation > 1.5) | (roll - bonus >= 16))
+        multiplier = SlowRotation[self.roll(slow, 2, 0)]
+        slowed = multiplier > 0
+        rotation = np.where(slowed, self.roll(slowed, 1, 0) * multiplier, rotation)
+        rotation = np.where(free, np.minimum(rotation, self.period), self.period)
+        return np.where(self.roll(everyone, 3, 0) >= 17, -rotation, rotation)
+
+    def properties(self, i) -> dict:
+        properties = WorldBatch.properties(self, i)
+        properties.update({
+            'volcanism': GeologicActivities[self.volcanism[i]],
+            'tectonic': GeologicActivities[self.tectonic[i]],
+            'rvm': int(self.rvm[i]),
+            'resources': WorldResources[self.rvm[i]],
+            'habitability': int(self.habitability[i]),
+            'affinity': int(self.affinity[i]),
+            'period': float(self.period[i]),
+            'tte': int(self.tte[i]),
+            'rotperiod': float(self.rotperiod[i]),
+            'alenday': optional(self.alenday[i]),
+            'alenplanet': optional(self.alenplanet[i])
+        })
+        return properties
+
+    def moon(self, i, parent, rng=None) -> Moon:
+        """
+        Turn row i into a Moon.
+
+        :param parent: The planet or gas giant the moon orbits.
+        :param rng: The source of randomness of the Moon.
+        """
+        return Moon.from_properties(parent, parent.primary_star, self.properties(i), rng)
+
+
+class MoonletBatch:
+    """
+    The orbits of many moonlets, stored as arrays.
+    """
+
+    def __init__(self, parent_diameter, parent_mass, third_family, rng=None):
+        """
+        :param parent_diameter: Diameter of the parent of every moonlet.
+        :param parent_mass: Mass of the parent of every moonlet.
+        :param third_family: Whether every moonlet belongs to the third family
+            of a gas giant, orbiting far outside.
+        :param rng: The source of randomness, see DiceRoller.
+        """
+        parent_diameter, parent_mass, third_family = np.broadcast_arrays(parent_diameter, parent_mass, third_family)
+        roller = dice.DiceRoller(rng)
+        count = len(parent_diameter)
+        # The inner moonlets orbit at (1d + 4) / 4 parent diameters, the outer
+        # ones anywhere between 20 and 200
+        inner = roller.roll_many(1, 4, count) / 4.
+        outer = roller.generator().uniform(20, 200, count)
+        self.orbit = np.where(third_family, outer, inner) * parent_diameter
+        self.period = 0.166 * (self.orbit ** 3 / parent_mass) ** 0.5
+
+    def __len__(self):
+        return len(self.orbit)
+
+    def moonlet(self, i, parent, family=None, rng=None) -> Moonlet:
+        """
+        Turn row i into a Moonlet.
+
+        :param parent: The planet or gas giant the moonlet orbits.
+        :param family: See Moonlet.
+        """
+        return Moonlet.from_properties(parent, family, float(self.orbit[i]), float(self.period[i]), rng)
+
+
+class SatelliteFamily(Sequence):
+    """
+    The satellites of one planet or gas giant, stored in a MoonBatch or
+    MoonletBatch. Each satellite object is created on its first access.
+    """
+    parent = ParentReference('_parent')
+
+    def __init__(self, batch, rows, parent, family=None):
+        """
+        :param batch: The MoonBatch or MoonletBatch holding the satellites.
+        :param rows: The rows of the satellites in the batch, in order, e.g.
+            a range or an int array.
+        :param parent: The planet or gas giant the satellites orbit.
+        :param family: The family of moonlets, see Moonlet.
+        """
+        self.batch = batch
+        self.rows = rows
+        self.parent = parent
+        self.family = family
+        self.prefix = None
+        self.__satellites = [None] * len(self.rows)
+
+    def __getstate__(self):
+        return strong_state(self.__dict__)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        satellite = self.__satellites[index]
+        if satellite is None:
+            row = self.rows[index]
+            if isinstance(self.batch, MoonBatch):
+                satellite = self.batch.moon(row, self.parent)
+            else:
+                satellite = self.batch.moonlet(row, self.parent, self.family)
+            if self.prefix is not None:
+                self.name(satellite, index)
+            self.__satellites[index] = satellite
+        return satellite
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def name(self, satellite, index) -> None:
+        number = index % len(self) + 1
+        satellite.set_number(number)
+        satellite.set_name('{}-{}'.format(self.prefix, number))
+
+    def set_prefix(self, prefix) -> None:
+        """
+        Number and name the satellites, e.g. A-3-1, A-3-2, ... for the prefix
+        A-3. Satellites not created yet are named on creation.
+        """
+        self.prefix = prefix
+        for index, satellite in enumerate(self.__satellites):
+            if satellite is not None:
+                self.name(satellite, index)
+
+
+def apparent_length(period, rotation) -> np.ndarray:
+    """
+    Vectorized apparent length of a day or a moon cycle, NaN where the period
+    equals the rotation (None in the scalar code)
+    """
+    difference = period - rotation
+    return np.divide(period * rotation, difference, out=np.full_like(difference, np.nan), where=difference != 0)
+
+
+def optional(value):
+    return None if np.isnan(value) else float(value)
+
+
+def make_details(bodies, rng=None) -> None:
+    """
+    Generate the details of many planets and gas giants, with a single
+    satellite stage for all of them.
+
+    :param bodies: Contents of orbits, e.g. of lazily generated star systems.
+        Only planets and gas giants without details are generated.
+    :param rng: The source of randomness of the satellites, see DiceRoller.
+    :type bodies: list
+
+    The numbers of satellites and everything that is not a satellite are still
+    rolled by every body from the stream of its own details. Only the
+    satellites themselves come from rng.
+    """
+    bodies = [body for body in bodies if body.type() in ('Terrestrial', 'Gas Giant') and not body.detailed]
+    moons = []
+    moonlets = []
+    for body in bodies:
+        body.begin_details()
+        if body.type() == 'Gas Giant':
+            first, second, third = body.roll_family_sizes()
+            moonlets += [(body, 'first', first), (body, 'third', third)]
+            moons.append((body, second))
+        else:
+            nummoons, nummoonlets = body.roll_satellite_numbers()
+            moons.append((body, nummoons))
+            moonlets.append((body, None, nummoonlets))
+
+    generator = dice.DiceRoller(rng).generator()
+    moonbatch = MoonBatch.from_parents(moons, generator)
+    counts = [count for _, _, count in moonlets]
+    moonletbatch = MoonletBatch(parent_diameter=np.repeat([body.get_diameter() for body, _, _ in moonlets], counts),
+                                parent_mass=np.repeat([body.get_mass() for body, _, _ in moonlets], counts),
+                                third_family=np.repeat([family == 'third' for _, family, _ in moonlets], counts),
+                                rng=generator)
+
+    # The moons of every parent, sorted by their orbits
+    counts = [count for _, count in moons]
+    order = np.lexsort((moonbatch.orbit, np.repeat(np.arange(len(moons)), counts)))
+    families = {}
+    start = 0
+    for body, count in moons:
+        families[id(body), 'moons'] = SatelliteFamily(moonbatch, order[start:start + count], body)
+        start += count
+    start = 0
+    for body, family, count in moonlets:
+        families[id(body), family] = SatelliteFamily(moonletbatch, range(start, start + count), body, family)
+        start += count
+
+    for body in bodies:
+        if body.type() == 'Gas Giant':
+            body.finish_details(families[id(body), 'first'], families[id(body), 'moons'], families[id(body), 'third'])
+        else:
+            body.finish_details(families[id(body), 'moons'], families[id(body), None])
+
+
+def make_system_details(systems, rng=None) -> None:
+    """
+    Generate many star systems down to the full level of detail, with a single
+    satellite stage for all of them.
+
+    :param systems: StarSystems at any level of detail
+    :param rng: The source of randomness of the satellites, see DiceRoller.
+    :type systems: list
+    """
+    bodies = []
+    for system in systems:
+        system.upgrade('planets')
+        for star in system.stars:
+            bodies += star.planetsystem.get_orbitcontents().values()
+    make_details(bodies, rng)
+    for system in systems:
+        system.upgrade('full')
@@ -1,12 +1,16 @@
 from . import dice
+from . import encoding
+from .references import ParentReference, strong_state
 from .world import World
 from .tables import SizeToInt, IntToSize
 
 
 class Moon(World):
+    __slots__ = ('_parent', 'tte', 'rotperiod', 'alenday', 'alenplanet')
+    parent = ParentReference('_parent')
 
-    def __init__(self, parent_planet, primary_star):
-        self.roller = dice.DiceRoller()
+    def __init__(self, parent_planet, primary_star, rng=None):
+        self.roller = dice.as_roller(rng)
         self.parent = parent_planet
         self.primary_star = primary_star
         self.blackbody_temperature = self.make_blackbody_temperature()
@@ -33,6 +37,34 @@ class Moon(World):
         self.alenday = self.make_calendar()
         self.alenplanet = self.make_planet_length()
 
+    @classmethod
+    def from_properties(cls, parent_planet, primary_star, properties, rng=None):
+        """
+        Create a Moon from properties generated elsewhere, e.g. by a
+        MoonBatch, without rolling for them again.
+
+        :param properties: Dict mapping the attribute names to their values
+        :type properties: dict
+        """
+        moon = cls.__new__(cls)
+        moon.roller = dice.as_roller(rng)
+        moon.parent = parent_planet
+        moon.primary_star = primary_star
+        for name, value in properties.items():
+            setattr(moon, name, value)
+        return moon
+
+    @classmethod
+    def from_dict(cls, data, parent_planet, primary_star, rng=None):
+        """
+        Recreate a Moon from a record returned by to_dict.
+        """
+        moon = encoding.from_record(cls, data)
+        moon.roller = dice.as_roller(rng)
+        moon.parent = parent_planet
+        moon.primary_star = primary_star
+        return moon
+
     def print_info(self):
         print("         *** Moon {} Information *** ".format(self.get_angled_name()))
         # print("Parent Planet:\t{}".format(self.parent))
@@ -235,14 +267,49 @@ class Moon(World):
 
 
 class Moonlet:
+    __slots__ = ('_parent', 'roller', 'family', 'orbit', 'period', '__weakref__')
+    parent = ParentReference('_parent')
 
-    def __init__(self, parentplanet, family=None):
+    def __init__(self, parentplanet, family=None, rng=None):
         self.parent = parentplanet
-        self.roller = dice.DiceRoller()
+        self.roller = dice.as_roller(rng)
         self.family = family
         self.orbit = self.make_orbit()
         self.period = self.make_period()
 
+    @classmethod
+    def from_properties(cls, parentplanet, family, orbit, period, rng=None):
+        """
+        Create a Moonlet from its orbit and period generated elsewhere, e.g.
+        by a MoonletBatch.
+        """
+        moonlet = cls.__new__(cls)
+        moonlet.parent = parentplanet
+        moonlet.roller = dice.as_roller(rng)
+        moonlet.family = family
+        moonlet.orbit = orbit
+        moonlet.period = period
+        return moonlet
+
+    def __getstate__(self):
+        return None, strong_state({name: getattr(self, name) for name in Moonlet.__slots__ if name != '__weakref__'})
+
+    def to_dict(self) -> dict:
+        """
+        Return the family, orbit and period as a record, see encoding.
+        """
+        return encoding.to_record(self)
+
+    @classmethod
+    def from_dict(cls, data, parentplanet, rng=None):
+        """
+        Recreate a Moonlet from a record returned by to_dict.
+        """
+        moonlet = encoding.from_record(cls, data)
+        moonlet.parent = parentplanet
+        moonlet.roller = dice.as_roller(rng)
+        return moonlet
+
     def print_info(self):
         print("Moonlet Information")
         print("Parent Planet:\t{}".format(self.parent))
@@ -255,8 +322,7 @@ class Moonlet:
             return self.roller.roll_dice(1, 4) / 4. * self.parent.get_diameter()
         if ptype == 'Gas Giant' and self.family == 'third':
             # Make random orbits between 20 and 200 planetary diameters
-            import random as r
-            multiplier = r.uniform(20, 200)
+            multiplier = self.roller.uniform(20, 200)
             return multiplier * self.parent.get_diameter()
 
         if ptype == 'Terrestrial':
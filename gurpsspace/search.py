@@ -0,0 +1,253 @@
+"""search.py
+
+Module for searching seed ranges for star systems with given properties.
+
+The seeds are scanned in chunks across worker processes. Every system is
+generated only as deep as needed to decide whether it matches: a Filter
+checks the stars before the planet systems are generated and those before
+the details of the planets, and a required Garden world abandons a system as
+soon as it cannot have one. Neither changes the systems, so a found seed
+reproduces its system with StarSystem(rng=random.Random(seed), **kwargs).
+"""
+
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count as count_from
+
+from .constraints import GenerationAborted
+from .starsystem import StarSystem
+
+
+class Filter:
+    """
+    Declarative constraints on the properties of a star system. Constraints
+    that are None are not checked.
+    """
+
+    def __init__(self, num_stars=None, open_cluster=None, min_age=None, max_age=None, has_garden=None,
+                 min_terrestrials=None, min_asteroid_belts=None, min_gas_giants=None, world_types=(),
+                 min_habitability=None, min_affinity=None):
+        """
+        :param num_stars: The number of stars
+        :param open_cluster: Whether the system is in an open cluster
+        :param min_age: The least age in billion years
+        :param max_age: The greatest age in billion years
+        :param has_garden: Whether there is a Garden world
+        :param min_terrestrials: The least number of terrestrial planets
+        :param min_asteroid_belts: The least number of asteroid belts
+        :param min_gas_giants: The least number of gas giants
+        :param world_types: World types that need to be present
+        :param min_habitability: The least habitability of the best world
+        :param min_affinity: The least affinity of the best world or belt
+        :type world_types: iterable
+        """
+        self.num_stars = num_stars
+        self.open_cluster = open_cluster
+        self.min_age = min_age
+        self.max_age = max_age
+        self.has_garden = has_garden
+        self.min_terrestrials = min_terrestrials
+        self.min_asteroid_belts = min_asteroid_belts
+        self.min_gas_giants = min_gas_giants
+        self.world_types = tuple(world_types)
+        self.min_habitability = min_habitability
+        self.min_affinity = min_affinity
+
+    def __repr__(self):
+        constraints = ('{}={!r}'.format(name, value) for name, value in vars(self).items()
+                       if value is not None and value != ())
+        return '{}({})'.format(type(self).__name__, ', '.join(constraints))
+
+    def detail(self) -> str:
+        """
+        Return the level of detail needed to check all constraints, see
+        starsystem.DetailLevels
+        """
+        if self.min_habitability is not None or self.min_affinity is not None:
+            return 'full'
+        if (self.has_garden is not None or self.world_types or self.min_terrestrials is not None or
+                self.min_asteroid_belts is not None or self.min_gas_giants is not None):
+            return 'planets'
+        return 'stars'
+
+    def check_stars(self, system) -> bool:
+        """
+        Check the constraints on the stars, which need no planet systems
+        """
+        return ((self.num_stars is None or len(system.stars) == self.num_stars) and
+                (self.open_cluster is None or system.is_open_cluster() == self.open_cluster) and
+                (self.min_age is None or system.get_age() >= self.min_age) and
+                (self.max_age is None or system.get_age() <= self.max_age))
+
+    def check_planets(self, system) -> bool:
+        """
+        Check the constraints on the planet systems, which need no details of
+        the planets
+        """
+        summary = system.get_summary()
+        minimums = ((self.min_terrestrials, 'Terrestrial'), (self.min_asteroid_belts, 'Ast. Belt'),
+                    (self.min_gas_giants, 'Gas Giant'))
+        return ((self.has_garden is None or summary.has_garden == self.has_garden) and
+                all(minimum is None or summary.count(body_type) >= minimum for minimum, body_type in minimums) and
+                all(summary.world_types.get(world_type, 0) > 0 for world_type in self.world_types))
+
+    def check_details(self, system) -> bool:
+        """
+        Check the constraints on the details of the planets
+        """
+        system.make_details()
+        summary = system.get_summary()
+        return ((self.min_habitability is None or (summary.best_habitability is not None and
+                                                   summary.best_habitability >= self.min_habitability)) and
+                (self.min_affinity is None or (summary.best_affinity is not None and
+                                               summary.best_affinity >= self.min_affinity)))
+
+    def __call__(self, system) -> bool:
+        """
+        Check all constraints, generating the system only as deep as needed.
+        """
+        if not self.check_stars(system):
+            return False
+        detail = self.detail()
+        if detail == 'stars':
+            return True
+        if not self.check_planets(system):
+            return False
+        return detail == 'planets' or self.check_details(system)
+
+
+def matches(seed, condition, kwargs) -> bool:
+    """
+    Check whether the star system of a seed meets the condition.
+
+    :param condition: A Filter, or a callable taking a StarSystem and
+        returning True for a match
+    :param kwargs: Keyword arguments for the StarSystem constructor
+    :type kwargs: dict
+    """
+    arguments = dict(kwargs, lazy=True)
+    if isinstance(condition, Filter):
+        arguments['detail'] = 'stars'
+        if condition.has_garden:
+            arguments['require_garden'] = True
+    else:
+        # A predicate may look at the planet systems right away
+        arguments['detail'] = 'planets'
+    try:
+        system = StarSystem(rng=random.Random(seed), **arguments)
+        return bool(condition(system))
+    except GenerationAborted:
+        # Raised while generating the planet systems as well
+        return False
+
+
+def scan(first, last, condition, kwargs, limit) -> tuple:
+    """
+    Check the seeds first, ..., last - 1, stopping after `limit` matches.
+
+    :return: Tuple (list of matching seeds, number of seeds checked)
+    """
+    found = []
+    for seed in range(first, last):
+        if matches(seed, condition, kwargs):
+            found.append(seed)
+            if len(found) >= limit:
+                return found, seed - first + 1
+    return found, last - first
+
+
+class SearchResult:
+    """
+    The seeds found by search, with the number of seeds checked
+    """
+
+    def __init__(self, seeds, scanned, seconds):
+        self.seeds = seeds
+        self.scanned = scanned
+        self.seconds = seconds
+
+    @property
+    def throughput(self) -> float:
+        """Seeds checked per second"""
+        return self.scanned / self.seconds if self.seconds > 0 else float('inf')
+
+    def __repr__(self):
+        return '{}(seeds={}, scanned={}, {:.0f} seeds/s)'.format(type(self).__name__, self.seeds, self.scanned,
+                                                                 self.throughput)
+
+
+def search(condition, count=1, start=1, stop=None, workers=None, chunksize=64, **kwargs) -> SearchResult:
+    """
+    Find the first `count` seeds from `start` on whose star systems meet the
+    condition.
+
+    :param condition: A Filter, or a callable taking a StarSystem and
+        returning True for a match. It needs to be picklable for worker
+        processes, e.g. a module level function.
+    :param count: The number of seeds to find
+    :param start: The first seed to check
+    :param stop: One past the last seed to check, None for no limit
+    :param workers: The number of worker processes, defaults to the number of
+        CPUs. With a single worker everything runs in this process.
+    :param chunksize: The number of seeds a worker checks per task
+    :param kwargs: Keyword arguments for the StarSystem constructor
+    :type count: int
+    :type start: int
+    :type stop: int or None
+    :type workers: int or None
+    :type chunksize: int
+    :return: The found seeds in ascending order, fewer than `count` if the
+        range ran out, and the number of seeds checked
+
+    The result does not depend on the number of workers. Outstanding chunks
+    are cancelled as soon as enough seeds are found.
+    """
+    if count < 1:
+        raise ValueError("Need to search for at least one seed, not {}.".format(count))
+    if chunksize < 1:
+        raise ValueError("Chunks need to hold at least one seed, not {}.".format(chunksize))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    begin = time.perf_counter()
+    firsts = count_from(start, chunksize) if stop is None else iter(range(start, stop, chunksize))
+
+    def bounds(first):
+        return first, first + chunksize if stop is None else min(first + chunksize, stop)
+
+    seeds = []
+    scanned = 0
+    if workers <= 1:
+        for first in firsts:
+            found, checked = scan(*bounds(first), condition, kwargs, count - len(seeds))
+            seeds += found
+            scanned += checked
+            if len(seeds) >= count:
+                break
+        return SearchResult(seeds, scanned, time.perf_counter() - begin)
+
+    executor = ProcessPoolExecutor(workers)
+    try:
+        # A bounded number of chunks in flight, collected in the order of
+        # their seeds, so that the result is the same for any number of
+        # workers
+        pending = deque()
+
+        def submit():
+            first = next(firsts, None)
+            if first is not None:
+                pending.append(executor.submit(scan, *bounds(first), condition, kwargs, count))
+
+        for _ in range(2 * workers):
+            submit()
+        while pending and len(seeds) < count:
+            found, checked = pending.popleft().result()
+            seeds += found[:count - len(seeds)]
+            scanned += checked
+            submit()
+    finally:
+        # Chunks already running finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+    return SearchResult(seeds, scanned, time.perf_counter() - begin)
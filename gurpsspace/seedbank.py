@@ -0,0 +1,283 @@
+"""seedbank.py
+
+Module for a bank of seeds of star systems, indexed by their features.
+
+A bank is an SQLite database with one row of features per seed, e.g. the
+number of stars or whether there is a Garden world, found by generating the
+systems of a range of seeds once. Seeds of systems with the wanted features
+are then found by an index lookup, instead of generating systems until one of
+them fits like find_garden_system does.
+
+The seed `seed` of a bank reproduces its system with
+StarSystem(rng=random.Random(seed), **bank.arguments).
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .constraints import GenerationAborted
+from .starsystem import StarSystem
+
+# Lower limits of the age buckets in billion years, following the rows of the
+# stellar age table, see StarSystem.random_age. Bucket 0 holds the systems of
+# extreme Population I, bucket 5 those of 10 billion years and more.
+# Usage: AgeBucketLimits[bucket - 1]
+AgeBucketLimits = (0.1, 2.0, 5.6, 8.0, 10.0)
+
+Schema = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS systems (
+    seed INTEGER PRIMARY KEY,
+    num_stars INTEGER NOT NULL,
+    open_cluster INTEGER NOT NULL,
+    age REAL NOT NULL,
+    age_bucket INTEGER NOT NULL,
+    has_garden INTEGER NOT NULL,
+    habitability INTEGER,
+    affinity INTEGER,
+    terrestrials INTEGER NOT NULL,
+    asteroid_belts INTEGER NOT NULL,
+    gas_giants INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS systems_features ON systems (has_garden, num_stars, open_cluster, age_bucket);
+CREATE INDEX IF NOT EXISTS systems_habitability ON systems (habitability);
+CREATE TABLE IF NOT EXISTS world_types (
+    world_type TEXT NOT NULL,
+    seed INTEGER NOT NULL REFERENCES systems (seed),
+    count INTEGER NOT NULL,
+    PRIMARY KEY (world_type, seed)
+) WITHOUT ROWID;
+"""
+
+# Columns of the systems table that can be asked for by value
+FeatureColumns = ('num_stars', 'open_cluster', 'age_bucket', 'has_garden')
+
+
+def age_bucket(age) -> int:
+    """
+    Return the age bucket of a star system, see AgeBucketLimits
+
+    :param age: The age in billion years
+    :type age: float
+    """
+    return bisect_right(AgeBucketLimits, age)
+
+
+def system_features(seed, system) -> tuple:
+    """
+    Return the features of a star system, as stored in a bank.
+
+    :return: Tuple (row of the systems table, dict of world type counts)
+    """
+    summary = system.get_summary()
+    # Habitability and affinity need the details of all bodies
+    system.make_details()
+    row = (seed, len(system.stars), int(system.is_open_cluster()), system.get_age(), age_bucket(system.get_age()),
+           int(summary.has_garden), summary.best_habitability, summary.best_affinity, summary.count('Terrestrial'),
+           summary.count('Ast. Belt'), summary.count('Gas Giant'))
+    return row, dict(summary.world_types)
+
+
+def scan(first, last, arguments) -> list:
+    """
+    Generate the systems of the seeds first, ..., last - 1 and return their
+    features, see system_features. Seeds whose generation is abandoned,
+    e.g. for require_garden, are left out.
+
+    :param arguments: Keyword arguments for the StarSystem constructor
+    :type arguments: dict
+    """
+    results = []
+    for seed in range(first, last):
+        try:
+            system = StarSystem(rng=random.Random(seed), **arguments)
+        except GenerationAborted:
+            continue
+        results.append(system_features(seed, system))
+    return results
+
+
+class SeedBank:
+    """
+    SQLite database of seeds and the features of their star systems.
+
+    A bank can be shared between threads, the queries are serialized.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The database file, created if it does not exist, or
+            ':memory:'
+        :type path: str
+        """
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.executescript(Schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    @property
+    def arguments(self):
+        """
+        The keyword arguments for the StarSystem constructor the bank was
+        built with, None if it is empty
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT value FROM settings WHERE name = 'arguments'").fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def build(self, start, count, workers=None, chunksize=256, **kwargs) -> int:
+        """
+        Add the features of the seeds start, ..., start + count - 1.
+
+        :param start: The first seed
+        :param count: The number of seeds
+        :param workers: The number of worker processes, defaults to the
+            number of CPUs. With a single worker everything runs in this
+            process.
+        :param chunksize: The number of seeds a worker scans per task
+        :param kwargs: Keyword arguments for the StarSystem constructor, the
+            same for all builds of a bank
+        :type start: int
+        :type count: int
+        :type workers: int or None
+        :type chunksize: int
+        :return: The number of systems added
+        """
+        if chunksize < 1:
+            raise ValueError("Chunks need to hold at least one seed, not {}.".format(chunksize))
+        arguments = self.arguments
+        if arguments is None:
+            with self.__lock, self.__connection:
+                self.__connection.execute("INSERT INTO settings VALUES ('arguments', ?)", (json.dumps(kwargs),))
+        elif arguments != kwargs:
+            raise ValueError("The bank was built with the arguments {}, not {}.".format(arguments, kwargs))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        firsts = range(start, start + count, chunksize)
+        lasts = [min(first + chunksize, start + count) for first in firsts]
+        if workers <= 1:
+            return sum(self.__insert(scan(first, last, kwargs)) for first, last in zip(firsts, lasts))
+        with ProcessPoolExecutor(workers) as executor:
+            return sum(self.__insert(results) for results in executor.map(scan, firsts, lasts, repeat(kwargs)))
+
+    def __insert(self, results) -> int:
+        with self.__lock, self.__connection:
+            for row, world_types in results:
+                self.__connection.execute("DELETE FROM world_types WHERE seed = ?", (row[0],))
+                self.__connection.execute("INSERT OR REPLACE INTO systems VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                self.__connection.executemany("INSERT INTO world_types VALUES (?, ?, ?)",
+                                              [(world_type, row[0], number) for world_type, number in world_types.items()])
+        return len(results)
+
+    @staticmethod
+    def __where(world_types=(), min_habitability=None, min_affinity=None, **features) -> tuple:
+        """
+        Return the WHERE clause and its parameters for the given constraints
+        """
+        clauses = []
+        parameters = []
+        for column, value in features.items():
+            if column not in FeatureColumns:
+                raise ValueError("Unknown feature {}, use one of {}.".format(column, FeatureColumns))
+            if value is not None:
+                clauses.append('{} = ?'.format(column))
+                parameters.append(int(value))
+        if min_habitability is not None:
+            clauses.append('habitability >= ?')
+            parameters.append(min_habitability)
+        if min_affinity is not None:
+            clauses.append('affinity >= ?')
+            parameters.append(min_affinity)
+        for world_type in world_types:
+            clauses.append('seed IN (SELECT seed FROM world_types WHERE world_type = ?)')
+            parameters.append(world_type)
+        return ' AND '.join(clauses) or '1', parameters
+
+    def count(self, **constraints) -> int:
+        """
+        Return the number of seeds meeting the constraints.
+
+        :param constraints: Features the systems need to have, any of
+            num_stars, open_cluster, age_bucket and has_garden, as well as
+            world_types (an iterable of world types that need to be present),
+            min_habitability and min_affinity. None means no constraint.
+        """
+        where, parameters = self.__where(**constraints)
+        with self.__lock:
+            return self.__connection.execute('SELECT COUNT(*) FROM systems WHERE ' + where, parameters).fetchone()[0]
+
+    def seeds(self, limit=None, **constraints) -> list:
+        """
+        Return the seeds meeting the constraints (see count), in ascending
+        order.
+
+        :param limit: The maximal number of seeds, None for all of them
+        """
+        where, parameters = self.__where(**constraints)
+        query = 'SELECT seed FROM systems WHERE {} ORDER BY seed'.format(where)
+        if limit is not None:
+            query += ' LIMIT ?'
+            parameters.append(limit)
+        with self.__lock:
+            return [seed for seed, in self.__connection.execute(query, parameters)]
+
+    def random_seed(self, rng=None, **constraints):
+        """
+        Return a seed meeting the constraints (see count), drawn uniformly.
+
+        :param rng: The source of randomness, defaults to the random module
+        :type rng: random.Random or None
+        :return: The seed, or None if there is none
+        """
+        where, parameters = self.__where(**constraints)
+        with self.__lock:
+            number = self.__connection.execute('SELECT COUNT(*) FROM systems WHERE ' + where, parameters).fetchone()[0]
+            if number == 0:
+                return None
+            offset = (rng or random).randrange(number)
+            query = 'SELECT seed FROM systems WHERE {} ORDER BY seed LIMIT 1 OFFSET ?'.format(where)
+            return self.__connection.execute(query, parameters + [offset]).fetchone()[0]
+
+    def features(self, seed):
+        """
+        Return the stored features of a seed
+
+        :return: A dict mapping the columns of the systems table to their
+            values plus 'world_types', or None if the seed is not in the bank
+        """
+        with self.__lock:
+            cursor = self.__connection.execute('SELECT * FROM systems WHERE seed = ?', (seed,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            result = dict(zip([column[0] for column in cursor.description], row))
+            result['world_types'] = dict(self.__connection.execute(
+                'SELECT world_type, count FROM world_types WHERE seed = ?', (seed,)))
+        return result
+
+    def system(self, seed) -> StarSystem:
+        """
+        Generate the star system of a seed of the bank again
+        """
+        return StarSystem(rng=random.Random(seed), **(self.arguments or {}))
+
+    def __len__(self):
+        return self.count()
@@ -1,15 +1,23 @@
+import random
+from fractions import Fraction
+
 from . import dice
+from . import encoding
 from . import planetsystem
-from .tables import StEvoTable, IndexTable, SequenceTable
+from .tables import StEvoTable, StEvoIndexSampler, SequenceTable
 
 
 class Star:
-    roller = dice.DiceRoller()
+    __slots__ = ('roller', 'planetsystem', '__hasforbiddenzone', '__forbiddenzone', '__age', '__StEvoIndex',
+                 '__SeqIndex', '__mass', '__luminosity', '__temperature', '__radius', '__innerlimit', '__outerlimit',
+                 '__snowline', '__letter', '__star_type', '__planetseed', '__weakref__')
 
-    def __init__(self, age):
+    def __init__(self, age, rng=None):
         if age <= 0:
             raise ValueError("Age needs to be a positive number.")
 
+        self.roller = dice.as_roller(rng)
+
         self.__hasforbiddenzone = False
         self.__forbiddenzone = None
         self.__age = age
@@ -23,8 +31,69 @@ class Star:
         self.__snowline = self.compute_snow_line()
         self.__letter = 'A'
         self.__star_type = self.get_star_type()
+        # The planet system has a stream of its own, so that it can be
+        # generated at any later time with the same result
+        self.__planetseed = self.roller.roll_seed()
         self.planetsystem = None
 
+    @classmethod
+    def from_properties(cls, age, index, sequence, mass, luminosity, temperature, radius, orbit_limits, snowline,
+                        star_type, rng=None):
+        """
+        Create a Star from properties generated elsewhere, e.g. by a StarBatch,
+        without rolling for them again.
+
+        :param index: The StEvoTable index
+        :param sequence: The SequenceTable index
+        :param orbit_limits: Inner and outer orbital limit in AU
+        :param rng: The source of randomness for everything that is still to
+            be generated, like the planet system
+        :type orbit_limits: tuple
+        """
+        if age <= 0:
+            raise ValueError("Age needs to be a positive number.")
+        star = cls.__new__(cls)
+        star.roller = dice.as_roller(rng)
+        star.__hasforbiddenzone = False
+        star.__forbiddenzone = None
+        star.__age = age
+        star.__StEvoIndex = index
+        star.__SeqIndex = sequence
+        star.__mass = mass
+        star.__luminosity = luminosity
+        star.__temperature = temperature
+        star.__radius = radius
+        star.__innerlimit, star.__outerlimit = orbit_limits
+        star.__snowline = snowline
+        star.__letter = 'A'
+        star.__star_type = star_type
+        star.__planetseed = star.roller.roll_seed()
+        star.planetsystem = None
+        return star
+
+    def to_dict(self) -> dict:
+        """
+        Return the star and its planet system as a record, see encoding.
+        """
+        data = encoding.to_record(self)
+        if self.planetsystem is not None:
+            data['planetsystem'] = self.planetsystem.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data, rng=None):
+        """
+        Recreate a Star from a record returned by to_dict.
+
+        :param rng: The source of randomness for everything that is still to
+            be generated
+        """
+        star = encoding.from_record(cls, data)
+        star.roller = dice.as_roller(rng)
+        if star.planetsystem is not None:
+            star.planetsystem = planetsystem.PlanetSystem.from_dict(data['planetsystem'], star, star.roller)
+        return star
+
     def __repr__(self):
         return repr((self.__mass, self.__luminosity, self.__temperature))
 
@@ -58,10 +127,9 @@ class Star:
         return self.__age
 
     def make_index(self) -> int:
-        # Roll to randomly select the index for the StEvoTable
-        diceroll1 = self.roller.roll_dice(3, 0)
-        diceroll2 = self.roller.roll_dice(3, 0)
-        return IndexTable[diceroll1][diceroll2]
+        # Randomly select the index for the StEvoTable, distributed as if
+        # looked up in the IndexTable with two 3d rolls
+        return StEvoIndexSampler.sample(self.roller)
 
     def make_mass(self) -> float:
         """
@@ -182,9 +250,11 @@ class Star:
         self.__forbiddenzone = (inner, outer)
         self.__hasforbiddenzone = True
 
-    def make_planetsystem(self):
+    def make_planetsystem(self, require_garden=False, lazy=False, layout=True):
         # TODO: Why not call this in the constructor and avoid this side effect too?
-        self.planetsystem = planetsystem.PlanetSystem(self)
+        rng = random.Random(self.__planetseed)
+        self.planetsystem = planetsystem.PlanetSystem(self, rng=rng, require_garden=require_garden, lazy=lazy,
+                                                      layout=layout)
 
     def get_orbit_limits(self):
         return self.__innerlimit, self.__outerlimit
@@ -218,3 +288,13 @@ class Star:
         sp_index = min(range(len(StEvoTable['temp'])),
                        key=lambda i: abs(StEvoTable['temp'][i] - self.get_temp()))
         return StEvoTable['type'][sp_index]
+
+
+def index_distribution() -> dict:
+    """
+    Exact probabilities of the StEvoTable indices chosen by Star.make_index
+
+    :return: Dict mapping each StEvoTable index to its probability as a
+        Fraction. Indices that cannot be rolled are left out.
+    """
+    return {index: Fraction(weight, StEvoIndexSampler.total) for index, weight in StEvoIndexSampler.weights()}
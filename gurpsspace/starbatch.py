@@ -0,0 +1,173 @@
+"""starbatch.py
+
+Module for generating the stellar properties of many stars at once.
+
+The columns of StEvoTable are turned into NumPy arrays, so that every step of
+the generation of a Star is a single array operation over all stars of a
+batch. The properties come out with the same distribution as those of Stars
+generated one by one, but not from the same random stream.
+"""
+
+import numpy as np
+
+from . import dice
+from .star import Star
+from .tables import StEvoTable, StEvoIndexSampler
+
+# The numerical columns of StEvoTable, for fancy indexing with an array of
+# indices
+StEvoArrays = {key: np.array(column, dtype=float) for key, column in StEvoTable.items() if key != 'type'}
+StEvoTypes = np.array(StEvoTable['type'])
+
+
+def nearest_temperature_index(temperature) -> np.ndarray:
+    """
+    Vectorized lookup of the StEvoTable row closest in temperature
+
+    :param temperature: Array of temperatures in K
+    :type temperature: numpy.ndarray
+    :return: Array of StEvoTable indices, picking the first index among
+        equally close rows just like Star.get_star_type
+
+    The temperature column is sorted, so the closest row is either the first
+    row at or above the temperature, or the first row of the value below it.
+    """
+    temps = StEvoArrays['temp']
+    above = np.minimum(np.searchsorted(temps, temperature, side='left'), len(temps) - 1)
+    below = np.searchsorted(temps, temps[np.maximum(above - 1, 0)], side='left')
+    take_below = np.abs(temperature - temps[below]) <= np.abs(temps[above] - temperature)
+    return np.where(take_below, below, above)
+
+
+class StarBatch:
+    """
+    The stellar properties of many stars, stored as one array per property.
+
+    Row i holds the properties of star i. Rows can be turned into normal
+    Star objects with star() or stars().
+    """
+
+    def __init__(self, age, count=None, rng=None):
+        """
+        :param age: The age of the stars in billion years, either one age for
+            all stars or one per star.
+        :param count: The number of stars, only needed if age is a number.
+        :param rng: The source of randomness, see DiceRoller.
+        :type age: float or numpy.ndarray
+        :type count: int or None
+        :type rng: random.Random or numpy.random.Generator or None
+        """
+        if count is None:
+            age = np.asarray(age, dtype=float)
+            if age.ndim != 1:
+                raise ValueError("Need the number of stars or an array of ages.")
+            count = len(age)
+        age = np.broadcast_to(np.asarray(age, dtype=float), (count,)).copy()
+        if np.any(age <= 0):
+            raise ValueError("Age needs to be a positive number.")
+
+        self.roller = dice.DiceRoller(rng)
+        self.age = age
+        self.index = StEvoIndexSampler.sample_many(self.roller, count)
+        self.sequence = self.find_sequence()
+        self.mass = self.make_mass()
+        self.luminosity = self.make_luminosity()
+        self.temperature = self.make_temperature()
+        self.radius = self.make_radius()
+        self.inner_limit, self.outer_limit = self.compute_orbit_limits()
+        self.snowline = self.compute_snow_line()
+        self.star_type = StEvoTypes[nearest_temperature_index(self.temperature)]
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, key) -> np.ndarray:
+        """Return the StEvoTable column `key` for every star"""
+        return StEvoArrays[key][self.index]
+
+    def find_sequence(self) -> np.ndarray:
+        age = self.age
+        internaltype = self.column('internaltype')
+        mspan = self.column('Mspan')
+        sspan = self.column('Sspan')
+        gspan = self.column('Gspan')
+        decaying = internaltype == 1
+        evolving = internaltype == 2
+        # Same order of checks as Star.find_sequence
+        return np.select([decaying & (age > mspan),
+                          evolving & (age > mspan + sspan + gspan),
+                          evolving & (age > mspan + sspan),
+                          evolving & (age > mspan)],
+                         [3, 3, 2, 1], 0)
+
+    def make_mass(self) -> np.ndarray:
+        mass = self.column('mass')
+        dwarfs = self.sequence == 3
+        mass[dwarfs] = self.roller.roll_many(2, -2, np.count_nonzero(dwarfs)) * 0.05 + 0.9
+        return mass
+
+    def make_luminosity(self) -> np.ndarray:
+        lmin = self.column('Lmin')
+        lmax = self.column('Lmax')
+        mspan = self.column('Mspan')
+        # Stars with no Mspan value stay at their minimum luminosity
+        progress = np.divide(self.age, mspan, out=np.zeros_like(mspan), where=mspan != 0)
+        return np.select([self.sequence == 0, self.sequence == 1, self.sequence == 2],
+                         [lmin + progress * (lmax - lmin), lmax, 25 * lmax], 0.001)
+
+    def make_temperature(self) -> np.ndarray:
+        temp = self.column('temp')
+        mspan = self.column('Mspan')
+        sspan = self.column('Sspan')
+        subgiants = self.sequence == 1
+        giants = self.sequence == 2
+        # Subgiants cool down linearly to 4800 K
+        temp[subgiants] -= ((self.age[subgiants] - mspan[subgiants]) / sspan[subgiants] *
+                            (temp[subgiants] - 4800))
+        temp[giants] = self.roller.roll_many(2, -2, np.count_nonzero(giants)) * 200 + 3000
+        temp[self.sequence == 3] = 8000
+        return temp
+
+    def make_radius(self) -> np.ndarray:
+        radius = 155000 * self.luminosity ** 0.5 / self.temperature ** 2
+        radius[self.sequence == 3] = 0.000043
+        return radius
+
+    def compute_orbit_limits(self) -> tuple:
+        inner_limit = np.maximum(0.1 * self.mass, 0.01 * self.luminosity ** 0.5)
+        outer_limit = 40 * self.mass
+        return inner_limit, outer_limit
+
+    def compute_snow_line(self) -> np.ndarray:
+        return 4.85 * self.column('Lmin') ** 0.5
+
+    def star(self, i, rng=None) -> Star:
+        """
+        Turn row i into a Star.
+
+        :param i: The row number.
+        :param rng: The source of randomness of the Star, e.g. for its planet
+            system.
+        :type i: int
+        """
+        return Star.from_properties(age=float(self.age[i]),
+                                    index=int(self.index[i]),
+                                    sequence=int(self.sequence[i]),
+                                    mass=float(self.mass[i]),
+                                    luminosity=float(self.luminosity[i]),
+                                    temperature=float(self.temperature[i]),
+                                    radius=float(self.radius[i]),
+                                    orbit_limits=(float(self.inner_limit[i]), float(self.outer_limit[i])),
+                                    snowline=float(self.snowline[i]),
+                                    star_type=str(self.star_type[i]),
+                                    rng=rng)
+
+    def stars(self, rng=None):
+        """
+        Turn every row into a Star.
+
+        :param rng: The source of randomness shared by the Stars.
+        :return: Generator of Stars, in the order of the rows
+        """
+        for i in range(len(self)):
+            yield self.star(i, rng)
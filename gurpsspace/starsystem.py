@@ -1,14 +1,38 @@
+import random
+import sys
+
 from . import star
 from . import dice
-from .tables import OrbSepTable, StOEccTable
+from . import encoding
+from .constraints import GenerationAborted, star_can_have_garden
+from .summary import SystemSummary
+from .tables import (InnerOrbSepIndexSampler, OpenClusterAgeSampler, OrbSepTable, StOEccSampler,
+                     companion_orbit_sampler, orbital_separation_index)
 from .output import latexout
 LW = latexout.LatexWriter
 
+# Levels of detail, from the shallowest to the deepest:
+#  - stars: Only the stars and their orbits
+#  - planets: Also the planet systems, with the details of their planets and
+#    gas giants (e.g. their moons) generated only when accessed
+#  - full: Everything
+DetailLevels = ('stars', 'planets', 'full')
+
 
 class StarSystem:
-    roller = dice.DiceRoller()
 
     def __init__(self, **kwargs):
+        self.roller = dice.DiceRoller(kwargs.get('rng', None))
+        # Abandon the generation with GenerationAborted as soon as it is clear
+        # that there will be no Garden world
+        self.require_garden = kwargs.get('require_garden', False)
+        # Defer the details of planets and gas giants until they are accessed
+        self.lazy = kwargs.get('lazy', False)
+        detail = kwargs.get('detail', 'full')
+        if detail not in DetailLevels:
+            raise ValueError("Unknown level of detail {}, use one of {}.".format(detail, DetailLevels))
+        self.detail = 'stars'
+        self.__summary = None
         open_cluster = kwargs.get('open_cluster', None)
         self.opencluster = self.make_open_cluster(open_cluster)
         num_stars = kwargs.get('num_stars', None)
@@ -27,13 +51,127 @@ class StarSystem:
             self.stars,
             self.forbidden_zones
         )
-        self.stars = self.create_planetsystem(self.stars)
+        if self.require_garden and not any(star_can_have_garden(s) for s in self.stars):
+            raise GenerationAborted("No star has orbits suitable for a Garden world")
         self.periods = self.make_periods(self.stars, self.orbits)
+        self.upgrade(detail)
+
+    @classmethod
+    def from_coordinates(cls, sector_seed, coords, **kwargs):
+        """
+        Generate the star system found at the given coordinates of a sector.
+
+        :param sector_seed: The seed of the whole sector.
+        :param coords: The integer coordinates of the system, e.g. (x, y, z).
+        :param kwargs: Further keyword arguments for the constructor.
+        :type sector_seed: int
+        :type coords: tuple
+        :return: The star system, which only depends on sector_seed and coords.
+
+        The random stream of every system is derived from its coordinates
+        directly, so any system can be regenerated on its own, in any order.
+        """
+        rng = random.Random(dice.derive_seed(sector_seed, coords))
+        return cls(rng=rng, **kwargs)
+
+    def to_dict(self) -> dict:
+        """
+        Return everything generated so far as a record of plain values, see
+        encoding. Details that have not been generated yet are left out and
+        generated from their seeds once the system is recreated.
+        """
+        return {'record': 'StarSystem', 'opencluster': self.opencluster, 'num_stars': self.num_stars,
+                'age': self.age, 'orbits': self.orbits, 'minmax_separation': self.minmax_separation,
+                'forbidden_zones': self.forbidden_zones, 'periods': self.periods,
+                'require_garden': self.require_garden, 'lazy': self.lazy, 'detail': self.detail,
+                'stars': [star_.to_dict() for star_ in self.stars]}
+
+    @classmethod
+    def from_dict(cls, data, rng=None):
+        """
+        Recreate a star system from a record returned by to_dict, without
+        rolling for anything again.
+
+        :param data: The record
+        :param rng: The source of randomness for the details still to be
+            generated. They are drawn from their own seeds, so this does not
+            change them.
+        :type data: dict
+        """
+        system = cls.__new__(cls)
+        system.roller = dice.DiceRoller(rng)
+        system.require_garden = data['require_garden']
+        system.lazy = data['lazy']
+        system.detail = data['detail']
+        system.opencluster = data['opencluster']
+        system.num_stars = data['num_stars']
+        system.age = data['age']
+        system.stars = [star.Star.from_dict(star_, system.roller) for star_ in data['stars']]
+        system.orbits = data['orbits']
+        system.minmax_separation = data['minmax_separation']
+        system.forbidden_zones = data['forbidden_zones']
+        system.periods = data['periods']
+        system.__summary = None
+        if system.detail != 'stars':
+            system.__summary = SystemSummary.combine(star_.planetsystem.get_summary() for star_ in system.stars)
+        return system
+
+    def to_bytes(self) -> bytes:
+        """
+        Return the star system in the compact binary form of encoding.encode
+        """
+        return encoding.encode(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data, rng=None):
+        """
+        Recreate a star system from the bytes returned by to_bytes.
+
+        :raises ValueError: If the bytes were written by another version of
+            the format
+        """
+        return cls.from_dict(encoding.decode(data), rng)
+
+    def upgrade(self, detail) -> None:
+        """
+        Generate the star system down to the given level of detail
+
+        :param detail: One of DetailLevels. Shallower levels than the current
+            one change nothing.
+        :type detail: str
+        :raises GenerationAborted: If a Garden world is required and the
+            planet systems have none. The system is left at the level of the
+            stars then.
+
+        Every star draws the seed of its planet system while it is generated,
+        so the result is the same as if the star system had been generated
+        with this level of detail right away.
+        """
+        if detail not in DetailLevels:
+            raise ValueError("Unknown level of detail {}, use one of {}.".format(detail, DetailLevels))
+        level = DetailLevels.index(detail)
+        if level >= 1 and self.detail == 'stars':
+            try:
+                self.stars = self.create_planetsystem(self.stars, self.lazy or level == 1)
+            except GenerationAborted:
+                # Do not leave some of the stars with a planet system
+                for star_ in self.stars:
+                    star_.planetsystem = None
+                raise
+            self.__summary = SystemSummary.combine(star_.planetsystem.get_summary() for star_ in self.stars)
+            self.detail = 'planets'
+        if level >= 2 and self.detail == 'planets':
+            if not self.lazy:
+                self.make_details()
+            self.detail = 'full'
 
     def print_info(self) -> None:
         """
         Outputs all information about the starsystem to console.
+
+        :raises GenerationAborted: See upgrade
         """
+        self.upgrade('full')
         print("Star System Info")
         print("================")
         print("        Age:\t{}".format(self.age))
@@ -116,15 +254,14 @@ class StarSystem:
         """
         temporary_stars = []
         for i in range(number_of_stars):
-            temporary_stars.append(star.Star(age=self.age))
+            temporary_stars.append(star.Star(age=self.age, rng=self.roller))
         return temporary_stars
 
     def make_age(self, age=None) -> float:
         if age is None:
-            provage = self.random_age()
-            while self.opencluster and provage > 2:
-                provage = self.random_age()
-            return provage
+            if self.opencluster:
+                return self.random_open_cluster_age()
+            return self.random_age()
         elif age <= 0:
             raise ValueError(
                 "Starsystem age needs to be larger than zero billion years."
@@ -168,6 +305,28 @@ class StarSystem:
                 self.roller.roll_dice(1, -1) * 0.1
             )
 
+    def random_open_cluster_age(self) -> float:
+        """
+        Randomly determines the age of a star system in an open cluster, which
+        is at most 2 billion years.
+
+        :return: A float factor of billion years.
+
+        The ages come out as if random_age was rolled until it gave at most 2,
+        but with a single draw of the table row.
+        """
+        row = OpenClusterAgeSampler.sample(self.roller)
+        if row == 'extreme':
+            return 0.001
+        elif row == 'young':
+            return (
+                0.1 + self.roller.roll_dice(1, -1) * 0.3 +
+                self.roller.roll_dice(1, -1) * 0.05
+            )
+        else:
+            # Both 1d rolls of the row 7 to 10 came up 1
+            return 2.0
+
     def name_stars(self, starlist) -> list:
         """
         Assign a letter to each star
@@ -192,54 +351,37 @@ class StarSystem:
         :return: A list of orbits, the entries are of the form
             [orbital_separation, eccentricity]
         """
-        orbsepentry = []
         orbits = []
         if len(self.stars) == 1:
             return orbits
         if len(self.stars) >= 2:
-            dice = self.roller.roll_dice(3, 0)
-            osepindex = self.find_orbital_separation_index(dice)
+            if len(self.stars) == 3:
+                # Disallow two 'Distant' companions
+                osepindex = InnerOrbSepIndexSampler.sample(self.roller)
+            else:
+                dice = self.roller.roll_dice(3, 0)
+                osepindex = self.find_orbital_separation_index(dice)
             orbsep = OrbSepTable[osepindex]
-            orbit = self.roller.roll_dice(2, 0) * orbsep[1]
+            orbitroll = self.roller.roll_dice(2, 0)
+            orbit = orbitroll * orbsep[1]
 
             eccmod = orbsep[2]
-            eccroll = self.roller.roll_dice(3, eccmod)
-            if eccroll < 3:
-                eccroll = 3
-            if eccroll > 18:
-                eccroll = 18
-            eccentricity = StOEccTable[eccroll]
-
-            orbsepentry.append(orbsep)
+            eccentricity = StOEccSampler.sample(self.roller, eccmod)
+
             orbits.append((orbit, eccentricity))
         if len(self.stars) == 3:
-            if osepindex == 4:
-                # Disallow two 'Distant' companions
-                return self.make_orbits()
-            close_companion = True
-            while close_companion:
-                dice = self.roller.roll_dice(3, 6)
-                osepindex = self.find_orbital_separation_index(dice)
-                orbsep = OrbSepTable[osepindex]
-                orbit = self.roller.roll_dice(2, 0) * orbsep[1]
-
-                # The second companion star has to be further away than the
-                # first companion star. Both the orbital modifier and orbit
-                # values need to differ
-                if orbsepentry[0][1] > orbsep[1] or orbits[0][0] >= orbit:
-                    continue
-                else:
-                    close_companion = False
-
-                eccmod = orbsep[2]
-                eccroll = self.roller.roll_dice(3, eccmod)
-                if eccroll < 3:
-                    eccroll = 3
-                if eccroll > 18:
-                    eccroll = 18
-                eccentricity = StOEccTable[eccroll]
-
-                orbits.append((orbit, eccentricity))
+            # The second companion star has to be further away than the
+            # first companion star: its radius multiplier needs to be at least
+            # as large and its orbit larger. Only such a row and 2d roll are
+            # drawn from the 3d + 6 and 2d rolls.
+            osepindex, orbitroll = companion_orbit_sampler(osepindex, orbitroll).sample(self.roller)
+            orbsep = OrbSepTable[osepindex]
+            orbit = orbitroll * orbsep[1]
+
+            eccmod = orbsep[2]
+            eccentricity = StOEccSampler.sample(self.roller, eccmod)
+
+            orbits.append((orbit, eccentricity))
         return orbits
 
     def find_orbital_separation_index(self, dice_roll) -> int:
@@ -248,20 +390,9 @@ class StarSystem:
 
         :param dice_roll: Result of the dice roll
         :type dice_roll: int
-        :return: An int in the interval [1, 4]
+        :return: An int in the interval [0, 4]
         """
-        if dice_roll < 3:
-            raise ValueError("The dice result should be >= 3")
-        if dice_roll <= 6:
-            return 0
-        if dice_roll <= 9:
-            return 1
-        if dice_roll <= 11:
-            return 2
-        if dice_roll <= 14:
-            return 3
-        else:
-            return 4
+        return orbital_separation_index(dice_roll)
 
     def make_min_max_separations(self, orbits) -> list:
         """
@@ -316,16 +447,28 @@ class StarSystem:
                 stars[2].set_forbidden_zone(start, end)
         return stars
 
-    def create_planetsystem(self, stars) -> list:
+    def create_planetsystem(self, stars, lazy=False) -> list:
         """
         Let each star generate their planet system. It may be empty!
 
         :param stars: List of stars in the stellar system
+        :param lazy: Whether to defer the details of the planets
         :type stars: list
+        :type lazy: bool
         :return: List of stars that have planetary systems
+
+        If a Garden world is required, the planet system of the last star that
+        can have one is generated with that requirement, unless one of the
+        previous stars brought forth a Garden world already.
         """
+        candidates = []
+        if self.require_garden:
+            candidates = [star_ for star_ in stars if star_can_have_garden(star_)]
+        garden = False
         for star_ in stars:
-            star_.make_planetsystem()
+            last_chance = not garden and len(candidates) > 0 and star_ is candidates[-1]
+            star_.make_planetsystem(require_garden=last_chance, lazy=lazy)
+            garden |= star_.planetsystem.has_garden()
         return stars
 
     def make_periods(self, stars, orbits):
@@ -353,6 +496,18 @@ class StarSystem:
             periods.append((orbit ** 3 / m) ** 0.5)
         return periods
 
+    def make_details(self) -> None:
+        """
+        Generate all details deferred by lazy generation, and with them the
+        planet systems if there are none yet.
+
+        :raises GenerationAborted: See upgrade
+        """
+        self.upgrade('planets')
+        for star_ in self.stars:
+            star_.planetsystem.make_details()
+        self.detail = 'full'
+
     def write_latex(self, filename='starsystem.tex') -> None:
         """
         Write all information about the starsystem to a latex file.
@@ -361,6 +516,7 @@ class StarSystem:
             ouput is written
         :type filename: str
         """
+        self.upgrade('full')
         writer = LW(self, filename)
         writer.write()
 
@@ -387,8 +543,51 @@ class StarSystem:
         Query all stars in the system for a Garden world
 
         :return: True if at least one star has a Garden world
-        """
-        ret = False
-        for star_ in self.stars:
-            ret |= star_.planetsystem.has_garden()
-        return ret
+        :raises GenerationAborted: See upgrade
+        """
+        return self.get_summary().has_garden
+
+    def get_summary(self) -> SystemSummary:
+        """
+        Return the summary of all planet systems in the star system
+
+        :return: Read-only summary statistics, see summary.SystemSummary
+        :raises GenerationAborted: If the planet systems are generated now, see
+            upgrade
+        """
+        self.upgrade('planets')
+        return self.__summary
+
+
+def find_garden_system(seed=None, max_attempts=None, **kwargs):
+    """
+    Generate star systems until one of them contains a Garden world.
+
+    :param seed: The seed of the first attempt, random if None.
+    :param max_attempts: Give up after this many attempts, None for no limit.
+    :param kwargs: Keyword arguments for the StarSystem constructor. The
+        details are generated lazily unless lazy=False is given.
+    :type seed: int or None
+    :type max_attempts: int or None
+    :return: Tuple (seed, starsystem). The system is the same as
+        StarSystem(rng=random.Random(seed), **kwargs).
+
+    Attempt number n is generated from its own stream seeded with seed + n,
+    and abandoned as soon as no Garden world is possible anymore. Because
+    every attempt has its own stream, abandoning one early does not change
+    the following ones.
+    """
+    if seed is None:
+        seed = random.randint(1, sys.maxsize)
+    kwargs.setdefault('lazy', True)
+    attempt = 0
+    while max_attempts is None or attempt < max_attempts:
+        try:
+            system = StarSystem(rng=random.Random(seed + attempt), require_garden=True, **kwargs)
+        except GenerationAborted:
+            attempt += 1
+            continue
+        if system.has_garden():
+            return seed + attempt, system
+        attempt += 1
+    raise GenerationAborted("No Garden world found in {} attempts".format(max_attempts))
@@ -0,0 +1,152 @@
+"""summary.py
+
+Module for summary statistics of planet and star systems.
+
+A SystemSummary is filled in as the contents of a planet system are
+generated, so that the number of bodies, the world types or whether there is
+a Garden world can be read without walking the system again. Statistics that
+depend on deferred details (habitability, affinity and moons) are added once
+the details of a body exist; until then they are None.
+"""
+
+from collections import Counter
+from types import MappingProxyType
+
+
+class SystemSummary:
+    """
+    Read-only summary of the contents of one or more planet systems.
+    """
+
+    def __init__(self, bodies=()):
+        """
+        :param bodies: The orbit contents to summarize
+        :type bodies: iterable
+        """
+        self.__bodies = Counter()
+        self.__worldtypes = Counter()
+        self.__garden = False
+        self.__habitability = None
+        self.__affinity = None
+        self.__moons = 0
+        # Bodies whose details have not been generated yet
+        self.__pending = []
+        for body in bodies:
+            self.add(body)
+
+    @classmethod
+    def combine(cls, summaries):
+        """
+        Return the summary of several planet systems, e.g. of all stars of a
+        star system
+
+        :type summaries: iterable of SystemSummary
+        """
+        summary = cls()
+        for part in summaries:
+            summary.__bodies.update(part.__bodies)
+            summary.__worldtypes.update(part.__worldtypes)
+            summary.__garden |= part.__garden
+            summary.__add_details(part.__habitability, part.__affinity, part.__moons)
+            summary.__pending += part.__pending
+        return summary
+
+    def add(self, body) -> None:
+        """
+        Add a body of a planet system to the summary
+
+        :param body: An orbit content, e.g. a Planet or a GasGiant
+        """
+        body_type = body.type()
+        self.__bodies[body_type] += 1
+        if body_type == 'Terrestrial':
+            world_type = body.get_type()
+            self.__worldtypes[world_type] += 1
+            self.__garden |= world_type == 'Garden'
+        if getattr(body, 'detailed', True):
+            self.__add_body_details(body)
+        else:
+            self.__pending.append(body)
+
+    def __add_body_details(self, body):
+        habitability = body.get_habitability() if body.type() == 'Terrestrial' else None
+        affinity = body.get_affinity() if body.type() != 'Gas Giant' else None
+        moons = body.num_moons() if body.type() != 'Ast. Belt' else 0
+        self.__add_details(habitability, affinity, moons)
+
+    def __add_details(self, habitability, affinity, moons):
+        if habitability is not None:
+            self.__habitability = habitability if self.__habitability is None else max(self.__habitability, habitability)
+        if affinity is not None:
+            self.__affinity = affinity if self.__affinity is None else max(self.__affinity, affinity)
+        self.__moons += moons
+
+    def __resolve(self) -> bool:
+        """
+        Add the bodies whose details have been generated in the meantime.
+
+        :return: True if the details of all bodies are known
+        """
+        if self.__pending:
+            pending = self.__pending
+            self.__pending = [body for body in pending if not body.detailed]
+            for body in pending:
+                if body.detailed:
+                    self.__add_body_details(body)
+        return not self.__pending
+
+    def count(self, body_type) -> int:
+        """
+        Return the number of bodies of the given type
+
+        :param body_type: 'Terrestrial', 'Ast. Belt' or 'Gas Giant'
+        """
+        return self.__bodies[body_type]
+
+    @property
+    def bodies(self):
+        """
+        Mapping from body type to the number of bodies
+        """
+        return MappingProxyType(self.__bodies)
+
+    @property
+    def world_types(self):
+        """
+        Mapping from world type to the number of terrestrial worlds
+        """
+        return MappingProxyType(self.__worldtypes)
+
+    @property
+    def has_garden(self) -> bool:
+        return self.__garden
+
+    @property
+    def best_habitability(self):
+        """
+        The highest habitability of all terrestrial worlds, or None if there
+        are none or their details have not been generated yet
+        """
+        return self.__habitability if self.__resolve() else None
+
+    @property
+    def best_affinity(self):
+        """
+        The highest affinity of all terrestrial worlds and asteroid belts, or
+        None if there are none or their details have not been generated yet
+        """
+        return self.__affinity if self.__resolve() else None
+
+    @property
+    def moons(self):
+        """
+        The total number of major moons, or None if the details of some
+        bodies have not been generated yet
+        """
+        return self.__moons if self.__resolve() else None
+
+    def __len__(self):
+        return sum(self.__bodies.values())
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, dict(self.__bodies))
@@ -1,5 +1,10 @@
 # This file contains all the tables that will be used in this project.
 
+from bisect import bisect_left
+from functools import lru_cache
+
+from .dice import TableSampler, WeightedSampler, roll_distribution
+
 # StEvoTable is the Stellar Evolution Table as per GURPS Space p. 103
 StEvoTable = {
     # The mass in solar masses
@@ -102,6 +107,22 @@ IndexTable = [
     [0] * 19, [0] * 19, [0] * 19, [0] * 19, [0] * 19
 ]
 
+
+# The number of combinations of the two 3d rolls leading to each StEvoTable
+# index. Out of 216 * 216 combinations in total.
+def stellar_index_weights():
+    weights = {}
+    rolls = roll_distribution(3, 0)
+    for firstroll, firstways in rolls.items():
+        for secondroll, secondways in rolls.items():
+            index = IndexTable[firstroll][secondroll]
+            weights[index] = weights.get(index, 0) + firstways * secondways
+    return sorted(weights.items())
+
+
+# Draws the StEvoTable index with a single draw instead of two 3d rolls
+StEvoIndexSampler = WeightedSampler(stellar_index_weights())
+
 # SequenceTable is used to look up the name of the sequence on which the star is
 SequenceTable = {
     0: 'Main',
@@ -110,6 +131,20 @@ SequenceTable = {
     3: 'White Dwarf'
 }
 
+
+# Draws the row of the stellar age table (GURPS Space p. 101) of a star system
+# in an open cluster, which is at most 2 billion years old: 'extreme' for a
+# roll of 3, 'young' for 4 to 6 and 'two' for the youngest age of 7 to 10,
+# where both 1d rolls need to be 1. Out of 216 * 36 combinations of the 3d
+# roll and the two 1d rolls.
+def open_cluster_age_weights():
+    ways = roll_distribution(3, 0)
+    return [('extreme', ways[3] * 36), ('young', sum(ways[roll] for roll in range(4, 7)) * 36),
+            ('two', sum(ways[roll] for roll in range(7, 11)))]
+
+
+OpenClusterAgeSampler = WeightedSampler(open_cluster_age_weights())
+
 # Orbital Separation Table
 OrbSepTable = [
     # Separation & Radius Multiplier & Modifier for Eccentricity roll
@@ -120,6 +155,50 @@ OrbSepTable = [
     ['Distant',   50,     0]
 ]
 
+
+# Row of the OrbSepTable for a 3d roll with modifiers
+# Usage: orbital_separation_index(3d roll)
+def orbital_separation_index(droll):
+    if droll < 3:
+        raise ValueError("The dice result should be >= 3")
+    if droll <= 6:
+        return 0
+    if droll <= 9:
+        return 1
+    if droll <= 11:
+        return 2
+    if droll <= 14:
+        return 3
+    return 4
+
+
+# Draws OrbSepTable rows directly
+OrbSepIndexSampler = TableSampler(orbital_separation_index)
+
+# Draws the OrbSepTable row of the first companion of a trinary system, which
+# is never 'Distant', as the second companion orbits further out
+InnerOrbSepIndexSampler = WeightedSampler([(index, ways) for index, ways in OrbSepIndexSampler.distribution(0).weights()
+                                           if OrbSepTable[index][0] != 'Distant'])
+
+
+# Draws the OrbSepTable row and 2d roll of the second companion of a trinary
+# system, given those of the first companion. Of the rows from a 3d + 6 roll
+# and the orbits of 2d times the radius multiplier, only those with a
+# multiplier at least as large and an orbit further out are possible.
+# Usage: companion_orbit_sampler(index, 2d roll).sample(roller)
+@lru_cache(maxsize=None)
+def companion_orbit_sampler(first_index, first_roll):
+    first_multiplier = OrbSepTable[first_index][1]
+    first_orbit = first_roll * first_multiplier
+    weights = []
+    for index, index_ways in OrbSepIndexSampler.distribution(6).weights():
+        multiplier = OrbSepTable[index][1]
+        for roll, roll_ways in roll_distribution(2).items():
+            if multiplier >= first_multiplier and roll * multiplier > first_orbit:
+                weights.append(((index, roll), index_ways * roll_ways))
+    return WeightedSampler(weights)
+
+
 # Stellar Orbital Eccentricity Table
 # The index here is the roll, limits at 3 and 18
 StOEccTable = [
@@ -128,6 +207,9 @@ StOEccTable = [
     0.6, 0.6, 0.7, 0.7, 0.8, 0.9, 0.95
 ]
 
+# Draws StOEccTable entries, the roll being limited to the table range
+StOEccSampler = TableSampler(lambda roll: StOEccTable[min(max(roll, 3), 18)])
+
 # Orbital Spacing Table
 OrbitalSpace = [
     None, None, None, 1.4, 1.4, 1.5,
@@ -135,6 +217,40 @@ OrbitalSpace = [
     1.7, 1.8, 1.8, 1.9, 1.9, 2.0, 2.0
 ]
 
+# Draws OrbitalSpace entries directly
+OrbitalSpaceSampler = TableSampler(OrbitalSpace.__getitem__)
+
+
+# Planetary orbital eccentricity as per GURPS Space p. 118
+# Usage: orbit_eccentricity(3d roll with modifiers)
+def orbit_eccentricity(droll):
+    ecc = 0
+    if droll > 3:
+        ecc = 0.05
+    if droll > 6:
+        ecc = 0.1
+    if droll > 9:
+        ecc = 0.15
+    if droll == 12:
+        ecc = 0.2
+    if droll == 13:
+        ecc = 0.3
+    if droll == 14:
+        ecc = 0.4
+    if droll == 15:
+        ecc = 0.5
+    if droll == 16:
+        ecc = 0.6
+    if droll == 17:
+        ecc = 0.7
+    if droll >= 18:
+        ecc = 0.8
+    return ecc
+
+
+# Draws orbit_eccentricity results directly
+OrbitEccentricitySampler = TableSampler(orbit_eccentricity)
+
 # Sizeclass to integer dict
 SizeToInt = {
     "Tiny": 0,
@@ -149,6 +265,10 @@ IntToSize = [
     "Tiny", "Small", "Standard", "Large"
 ]
 
+# Codes of the world types, for storing them in arrays
+# Usage: WorldTypes[code], WorldTypes.index(worldtype)
+WorldTypes = ('Ice', 'Rock', 'Hadean', 'Ammonia', 'Garden', 'Ocean', 'Greenhouse', 'Chthonian', 'Sulfur')
+
 # Marginal Atmosphere Table
 # Usage: MAtmoTable[diceroll], diceroll is between 3 and 18
 MAtmoTable = [
@@ -168,6 +288,11 @@ AtmCompAbbr = {
     'Suffocating': 'S'
 }
 
+# Bit flags of the atmospheric composition labels, for storing an atmosphere
+# as a single int
+# Usage: AtmCompFlags[label]
+AtmCompFlags = {label: 1 << bit for bit, label in enumerate(AtmCompAbbr)}
+
 # Temperature factors table, contains tuples of (abs, greenh)
 # Note that for Ocean and Garden worlds, nothing is defined. This is because of
 # the different absorption factors due to hydrographic coverage
@@ -201,31 +326,24 @@ TempFactor = {
 }
 
 
+# Blackbody temperature in K of a body in the given orbit (in AU) around a
+# star with the given luminosity
+def blackbody_temperature(luminosity, orbit):
+    return 278 * luminosity ** 0.25 * orbit ** -0.5
+
+
+# Climate designators, from the coldest to the hottest, and the highest
+# average surface temperature in K of each but the last
+# Usage: Climates[code]
+Climates = ('Frozen', 'Very Cold', 'Cold', 'Chilly', 'Cool', 'Normal', 'Warm', 'Tropical', 'Hot', 'Very Hot',
+            'Infernal')
+ClimateLimits = (244, 255, 266, 278, 289, 300, 311, 322, 333, 344)
+
+
 # WorldClimate is a function that returns the world climate designator string
 # depending on the input (average surface temperature)
 def world_climate(temperature):
-    climate = 'Infernal'
-    if temperature <= 344:
-        climate = 'Very Hot'
-    if temperature <= 333:
-        climate = 'Hot'
-    if temperature <= 322:
-        climate = 'Tropical'
-    if temperature <= 311:
-        climate = 'Warm'
-    if temperature <= 300:
-        climate = 'Normal'
-    if temperature <= 289:
-        climate = 'Cool'
-    if temperature <= 278:
-        climate = 'Chilly'
-    if temperature <= 266:
-        climate = 'Cold'
-    if temperature <= 255:
-        climate = 'Very Cold'
-    if temperature <= 244:
-        climate = 'Frozen'
-    return climate
+    return Climates[bisect_left(ClimateLimits, temperature)]
 
 # Size Constraints Table (GURPS Space p.85)
 SizeConstraintsTable = {
@@ -236,24 +354,18 @@ SizeConstraintsTable = {
 }
 
 
+# Pressure categories, from the thinnest to the densest, and the highest
+# pressure in atm of each but 'None' (no pressure at all) and the last
+# Usage: PressureCategories[code]
+PressureCategories = ('None', 'Trace', 'Very Thin', 'Thin', 'Standard', 'Dense', 'Very Dense', 'Superdense')
+PressureLimits = (0.01, 0.5, 0.8, 1.2, 1.5, 10)
+
+
 # Categorize the given pressure
 def pressure_category(press):
-    cat = 'Superdense'
-    if press <= 10:
-        cat = 'Very Dense'
-    if press <= 1.5:
-        cat = 'Dense'
-    if press <= 1.2:
-        cat = 'Standard'
-    if press <= 0.8:
-        cat = 'Thin'
-    if press <= 0.5:
-        cat = 'Very Thin'
-    if press <= 0.01:
-        cat = 'Trace'
     if press == 0.0:
-        cat = 'None'
-    return cat
+        return 'None'
+    return PressureCategories[1 + bisect_left(PressureLimits, press)]
 
 # GGSizeTable: Gas Giant Size Table as on GURPS Space p. 115
 # Usage: GGSizeTable[GGsizeclass][3d roll]
@@ -276,6 +388,10 @@ GGSizeTable = {
              [(4000, 1.6)] * 2
 }
 
+# Draws GGSizeTable entries directly
+# Usage: GGSizeSampler[GGsizeclass].sample(roller)
+GGSizeSampler = {size: TableSampler(table.__getitem__) for size, table in GGSizeTable.items()}
+
 # Resource Class Table for asteroid belts
 # Usage: asteroid_resource_table[3d roll]
 asteroid_resource_table = {
@@ -321,3 +437,7 @@ world_resource_table = {
     19: [3, 'Rich'],
     20: [3, 'Rich']
 }
+
+# Draws world_resource_table entries directly
+# Usage: world_resource_sampler.sample(roller, bonus between -2 and +2)
+world_resource_sampler = TableSampler(world_resource_table.__getitem__)
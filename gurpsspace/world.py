@@ -1,12 +1,16 @@
 from .orbitcontents import OrbitContent
-from .tables import MAtmoTable, TempFactor, world_climate
-from .tables import SizeConstraintsTable, pressure_category, world_resource_table
+from .tables import AtmCompFlags, MAtmoTable, TempFactor, world_climate
+from .tables import SizeConstraintsTable, pressure_category, world_resource_sampler
 from math import floor
 
 
 class World(OrbitContent):
-    def __init__(self, primary, orbitalradius, sizeclass):
-        OrbitContent.__init__(self, primary, orbitalradius)
+    __slots__ = ('sizeclass', 'world_type', 'atmmass', 'atmflags', 'hasmarginal', 'marginal', 'hydrocover',
+                 'averagesurface', 'climatetype', 'density', 'diameter', 'surfacegravity', 'mass', 'pressure',
+                 'presscat', 'volcanism', 'tectonic', 'rvm', 'resources', 'habitability', 'affinity')
+
+    def __init__(self, primary, orbitalradius, sizeclass, rng=None):
+        OrbitContent.__init__(self, primary, orbitalradius, rng)
         self.sizeclass = sizeclass
         self.world_type = self.make_type()
         self.make_atmosphere()
@@ -98,27 +102,19 @@ class World(OrbitContent):
         else:
             self.atmmass = self.roller.roll_dice(3, 0) / 10.
 
-        # Now determine atmospheric composition
-        self.atmcomp = {
-            'Corrosive': False,
-            'Mildly Toxic': False,
-            'Highly Toxic': False,
-            'Lethally Toxic': False,
-            'Suffocating': False
-        }
+        # Now determine atmospheric composition, see AtmCompFlags
+        self.atmflags = 0
         self.hasmarginal = False
         self.marginal = ''
         if size == 'Small' and type == 'Ice':
-            self.atmcomp['Suffocating'] = True
+            self.atmflags |= AtmCompFlags['Suffocating']
             if self.roller.roll_dice(3, 0) > 15:
-                self.atmcomp['Lethally Toxic'] = True
+                self.atmflags |= AtmCompFlags['Lethally Toxic']
             else:
-                self.atmcomp['Mildly Toxic'] = True
+                self.atmflags |= AtmCompFlags['Mildly Toxic']
 
         if type == 'Ammonia' or type == 'Greenhouse':
-            self.atmcomp['Suffocating'] = True
-            self.atmcomp['Lethally Toxic'] = True
-            self.atmcomp['Corrosive'] = True
+            self.atmflags |= AtmCompFlags['Suffocating'] | AtmCompFlags['Lethally Toxic'] | AtmCompFlags['Corrosive']
 
         if type == 'Garden':
             if self.roller.roll_dice(3, 0) >= 12:
@@ -126,13 +122,27 @@ class World(OrbitContent):
                 self.marginal = MAtmoTable[self.roller.roll_dice(3, 0)]
 
         if size == 'Standard' and (type == 'Ice' or type == 'Ocean'):
-            self.atmcomp['Suffocating'] = True
+            self.atmflags |= AtmCompFlags['Suffocating']
             if self.roller.roll_dice(3, 0) > 12:
-                self.atmcomp['Mildly Toxic'] = True
+                self.atmflags |= AtmCompFlags['Mildly Toxic']
 
         if size == 'Large' and (type == 'Ice' or type == 'Ocean'):
-            self.atmcomp['Highly Toxic'] = True
-            self.atmcomp['Suffocating'] = True
+            self.atmflags |= AtmCompFlags['Highly Toxic'] | AtmCompFlags['Suffocating']
+
+    @property
+    def atmcomp(self) -> dict:
+        """
+        The atmospheric composition as a dict mapping every label of
+        AtmCompFlags to whether it applies
+        """
+        return {label: bool(self.atmflags & flag) for label, flag in AtmCompFlags.items()}
+
+    @atmcomp.setter
+    def atmcomp(self, composition):
+        self.atmflags = 0
+        for label, applies in composition.items():
+            if applies:
+                self.atmflags |= AtmCompFlags[label]
 
     def get_marginal(self) -> (bool, str):
         """
@@ -389,8 +399,7 @@ class World(OrbitContent):
         Return resource value modifier (RVM) and corresponding string
         """
         rollbonus = self.get_resourcebonus()
-        dice = self.roller.roll_dice(3, rollbonus)
-        return world_resource_table[dice]
+        return world_resource_sampler.sample(self.roller, rollbonus)
 
     def get_rvm(self):
         return self.rvm
@@ -414,13 +423,13 @@ class World(OrbitContent):
 
         # Now comes standard implementation, p. 88
         # First: Based on breathable or non-breathable atmosphere
-        atmo = [key for key in self.atmcomp.keys() if self.atmcomp[key] is True]
-        if len(atmo) > 0:
+        components = bin(self.atmflags).count('1')
+        if components > 0:
             # Non-breathable atmosphere
-            if len(atmo) == 2:
+            if components == 2:
                 # Suffocating and Toxic
                 modifier -= 1
-            elif len(atmo) == 3:
+            elif components == 3:
                 # Suffocating, Toxic and Corrosive
                 modifier -= 2
         else:
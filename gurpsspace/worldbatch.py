@@ -0,0 +1,331 @@
+"""worldbatch.py
+
+Module for generating the physical properties of many terrestrial worlds at
+once.
+
+WorldBatch follows the rules of World.make_type up to World.make_pressure,
+but evaluates each rule for all worlds of the batch with NumPy masks instead
+of one if-ladder per world. Strings are stored as codes into the tuples of
+the tables module, e.g. WorldTypes and Climates. The properties come out with
+the same distribution as those of Worlds generated one by one, but not from
+the same random stream.
+"""
+
+import numpy as np
+
+from . import dice
+from .tables import AtmCompFlags, Climates, ClimateLimits, IntToSize, MAtmoTable, PressureCategories
+from .tables import PressureLimits, SizeConstraintsTable, SizeToInt, TempFactor, WorldTypes, blackbody_temperature
+from .tables import world_resource_table
+
+TINY, SMALL, STANDARD, LARGE = range(len(IntToSize))
+(ICE, ROCK, HADEAN, AMMONIA, GARDEN, OCEAN, GREENHOUSE, CHTHONIAN,
+ SULFUR) = range(len(WorldTypes))
+
+# TempFactor as arrays indexed by [world type code, size code], NaN where the
+# table defines nothing
+Absorption = np.full((len(WorldTypes), len(IntToSize)), np.nan)
+Greenhouse = np.full((len(WorldTypes), len(IntToSize)), np.nan)
+for worldtype, factors in TempFactor.items():
+    for size, (absorption, greenhouse) in factors.items():
+        Absorption[WorldTypes.index(worldtype), SizeToInt[size]] = absorption
+        Greenhouse[WorldTypes.index(worldtype), SizeToInt[size]] = greenhouse
+
+# The densities of World.make_density, indexed by [group, step], the groups
+# being icy worlds, rocky worlds and all others
+Densities = np.array([[0.3, 0.4, 0.5, 0.6, 0.7],
+                      [0.6, 0.7, 0.8, 0.9, 1.0],
+                      [0.8, 0.9, 1.0, 1.1, 1.2]])
+
+# The highest volcanic and tectonic rolls of each activity but the last, see
+# World.make_volcanism and World.make_tectonism
+# Usage: GeologicActivities[code]
+GeologicActivities = ('None', 'Light', 'Moderate', 'Heavy', 'Extreme')
+VolcanismLimits = (16, 20, 26, 70)
+TectonicLimits = (6, 10, 14, 18)
+
+# world_resource_table as arrays indexed by the roll, and the names of the
+# resource value modifiers
+ResourceModifiers = np.array([0] + [world_resource_table[roll][0] for roll in range(1, 21)])
+WorldResources = {rvm: name for rvm, name in world_resource_table.values()}
+
+# SizeConstraintsTable as arrays indexed by size code
+SizeMinimum = np.array([SizeConstraintsTable[size][0] for size in IntToSize])
+SizeMaximum = np.array([SizeConstraintsTable[size][1] for size in IntToSize])
+
+
+def size_codes(sizes) -> np.ndarray:
+    """
+    Turn size classes into size codes
+
+    :param sizes: Array of size class names or of size codes
+    :return: Array of size codes, see IntToSize
+    """
+    sizes = np.asarray(sizes)
+    if sizes.dtype.kind in 'UO':
+        names, inverse = np.unique(sizes, return_inverse=True)
+        return np.array([SizeToInt[name] for name in names], dtype=np.int64)[inverse].reshape(sizes.shape)
+    return sizes.astype(np.int64)
+
+
+class WorldBatch:
+    """
+    The physical properties of many terrestrial worlds, stored as one array
+    per property.
+
+    Row i holds the properties of world i, under the attribute names used by
+    World. properties() turns a row back into names and values.
+    """
+
+    def __init__(self, orbit, luminosity, star_mass, age, size, rng=None):
+        """
+        :param orbit: Orbital radius in AU of every world.
+        :param luminosity: Luminosity of the primary star of every world.
+        :param star_mass: Mass of the primary star of every world.
+        :param age: Age of the star system of every world.
+        :param size: Size class of every world, as names or codes.
+        :param rng: The source of randomness, see DiceRoller.
+        :type rng: random.Random or numpy.random.Generator or None
+
+        Each of the arrays may also be a single value shared by all worlds.
+        """
+        size = size_codes(size)
+        orbit, luminosity, star_mass, age, size = np.broadcast_arrays(orbit, luminosity, star_mass, age, size)
+        if orbit.ndim != 1:
+            raise ValueError("Need one-dimensional arrays of world properties.")
+        self.roller = dice.DiceRoller(rng)
+        self.orbit = orbit.astype(float)
+        self.sizeclass = size.copy()
+        self.blackbody_temperature = blackbody_temperature(luminosity.astype(float), self.orbit)
+        self.make_physics(star_mass, age)
+
+    def make_physics(self, star_mass, age) -> None:
+        """
+        Generate everything from the world type to the pressure, given the
+        size classes and blackbody temperatures.
+        """
+        self.world_type = self.make_type(star_mass, age)
+        self.make_atmosphere()
+        self.hydrocover = self.make_hydrographics()
+        self.averagesurface, self.climatetype = self.make_climate()
+        self.density = self.make_density()
+        self.diameter = self.make_diameter()
+        self.surfacegravity = self.density * self.diameter
+        self.mass = self.density * self.diameter ** 3
+        self.pressure, self.presscat = self.make_pressure()
+
+    def __len__(self):
+        return len(self.sizeclass)
+
+    def roll(self, mask, dice_num, modifier, sides=6) -> np.ndarray:
+        """
+        Roll XdY +- Z for the worlds selected by mask.
+
+        :param mask: Boolean array selecting the worlds
+        :return: Array of the results, zero for the worlds not selected
+        """
+        result = np.zeros(len(self), dtype=np.int64)
+        if np.ndim(modifier) != 0:
+            modifier = modifier[mask]
+        result[mask] = self.roller.roll_many(dice_num, modifier, np.count_nonzero(mask), sides)
+        return result
+
+    def make_type(self, star_mass, age) -> np.ndarray:
+        size = self.sizeclass
+        bb = self.blackbody_temperature
+        worldtype = np.full(len(self), ICE)
+        worldtype[(size == TINY) & (bb >= 141)] = ROCK
+        worldtype[((size == SMALL) | (size == STANDARD)) & (bb <= 80)] = HADEAN
+        worldtype[(size == SMALL) & (bb >= 141)] = ROCK
+        big = (size == STANDARD) | (size == LARGE)
+        worldtype[big & (150 < bb) & (bb <= 230) & (star_mass <= 0.65)] = AMMONIA
+        temperate = big & (240 < bb) & (bb <= 320)
+        cap = np.where(size == LARGE, 5, 10)
+        bonus = np.minimum(np.floor(age / 0.5).astype(np.int64), cap)
+        garden = self.roll(temperate, 3, bonus) >= 18
+        worldtype[temperate] = np.where(garden, GARDEN, OCEAN)[temperate]
+        worldtype[big & (320 < bb) & (bb <= 500)] = GREENHOUSE
+        worldtype[big & (bb > 500)] = CHTHONIAN
+        return worldtype
+
+    def make_atmosphere(self) -> None:
+        """
+        Determine the atmospheric mass, the composition as bit flags (see
+        AtmCompFlags) and the marginal atmosphere as code into MAtmoTable,
+        zero meaning none.
+        """
+        size = self.sizeclass
+        worldtype = self.world_type
+        everyone = np.ones(len(self), dtype=bool)
+        airless = (size == TINY) | np.isin(worldtype, (HADEAN, CHTHONIAN, ROCK))
+        self.atmmass = self.roll(~airless, 3, 0) / 10.
+
+        atmcomp = np.zeros(len(self), dtype=np.int64)
+        smallice = (size == SMALL) & (worldtype == ICE)
+        lethal = self.roll(everyone, 3, 0) > 15
+        atmcomp[smallice] |= AtmCompFlags['Suffocating']
+        atmcomp[smallice & lethal] |= AtmCompFlags['Lethally Toxic']
+        atmcomp[smallice & ~lethal] |= AtmCompFlags['Mildly Toxic']
+        atmcomp[(worldtype == AMMONIA) | (worldtype == GREENHOUSE)] |= (
+            AtmCompFlags['Suffocating'] | AtmCompFlags['Lethally Toxic'] | AtmCompFlags['Corrosive'])
+        wet = (worldtype == ICE) | (worldtype == OCEAN)
+        standardwet = (size == STANDARD) & wet
+        atmcomp[standardwet] |= AtmCompFlags['Suffocating']
+        atmcomp[standardwet & (self.roll(everyone, 3, 0) > 12)] |= AtmCompFlags['Mildly Toxic']
+        atmcomp[(size == LARGE) & wet] |= AtmCompFlags['Highly Toxic'] | AtmCompFlags['Suffocating']
+        self.atmcomp = atmcomp
+
+        marginal = (worldtype == GARDEN) & (self.roll(everyone, 3, 0) >= 12)
+        self.marginal = self.roll(marginal, 3, 0)
+        self.hasmarginal = marginal
+
+    def make_hydrographics(self) -> np.ndarray:
+        size = self.sizeclass
+        worldtype = self.world_type
+        big = (size == STANDARD) | (size == LARGE)
+        hydro = np.zeros(len(self), dtype=np.int64)
+        smallice = (size == SMALL) & (worldtype == ICE)
+        hydro[smallice] = self.roll(smallice, 1, 2)[smallice] * 10
+        ammonia = worldtype == AMMONIA
+        hydro[ammonia] = np.minimum(self.roll(ammonia, 2, 0)[ammonia] * 10, 100)
+        bigice = big & (worldtype == ICE)
+        hydro[bigice] = self.roll(bigice, 2, -10)[bigice] * 10
+        wet = (worldtype == OCEAN) | (worldtype == GARDEN)
+        bonus = np.where(size == LARGE, 6, 4)
+        hydro[wet] = np.minimum(self.roll(wet, 1, bonus)[wet] * 10, 100)
+        greenhouse = worldtype == GREENHOUSE
+        hydro[greenhouse] = self.roll(greenhouse, 2, -7)[greenhouse] * 10
+        # Vary by +- 5% where there is surface liquid, see World.make_hydrographics
+        varied = (10 <= hydro) & (hydro <= 90)
+        sign = np.where(self.roll(varied, 1, 0, 2) == 1, 1, -1)
+        hydro += sign * self.roll(varied, 1, 0, 5)
+        return hydro
+
+    def make_climate(self) -> tuple:
+        """
+        :return: Arrays of the average surface temperature and of the climate
+            codes, see Climates
+        """
+        worldtype = self.world_type
+        absorption = Absorption[worldtype, self.sizeclass]
+        greenhouse = Greenhouse[worldtype, self.sizeclass]
+        # The absorption of Ocean and Garden worlds depends on their coverage
+        wet = (worldtype == OCEAN) | (worldtype == GARDEN)
+        hydro = self.hydrocover
+        absorption[wet] = np.select([hydro[wet] <= 20, hydro[wet] <= 50, hydro[wet] <= 90], [0.95, 0.92, 0.88], 0.84)
+        greenhouse[wet] = 0.16
+        averagesurface = absorption * (1 + (self.atmmass * greenhouse)) * self.blackbody_temperature
+        return averagesurface, np.searchsorted(ClimateLimits, averagesurface, side='left')
+
+    def make_density(self) -> np.ndarray:
+        worldtype = self.world_type
+        icy = (np.isin(worldtype, (AMMONIA, HADEAN, SULFUR)) |
+               ((worldtype == ICE) & (self.sizeclass != LARGE)))
+        group = np.select([icy, worldtype == ROCK], [0, 1], 2)
+        roll = self.roll(np.ones(len(self), dtype=bool), 3, 0)
+        step = (roll >= 7).astype(np.int64) + (roll >= 11) + (roll >= 15) + (roll == 18)
+        return Densities[group, step]
+
+    def make_diameter(self) -> np.ndarray:
+        term = (self.blackbody_temperature / self.density) ** 0.5
+        smallest = term * SizeMinimum[self.sizeclass]
+        largest = term * SizeMaximum[self.sizeclass]
+        roll = self.roll(np.ones(len(self), dtype=bool), 2, -2)
+        return roll * 0.1 * (largest - smallest) + smallest
+
+    def make_pressure(self) -> tuple:
+        """
+        :return: Arrays of the pressure in atm and of the pressure category
+            codes, see PressureCategories
+        """
+        size = self.sizeclass
+        worldtype = self.world_type
+        vacuum = (size == TINY) | (worldtype == HADEAN)
+        trace = ~vacuum & ((worldtype == CHTHONIAN) | ((size == SMALL) & (worldtype == ROCK)))
+        factor = np.select([(size == SMALL) & (worldtype == ICE), size == LARGE], [10, 5], 1)
+        factor = np.where(worldtype == GREENHOUSE, factor * 100, factor)
+        pressure = np.where(vacuum | trace, 0, self.mass * factor * self.surfacegravity)
+        category = np.where(pressure == 0.0, 0, 1 + np.searchsorted(PressureLimits, pressure, side='left'))
+        category[vacuum] = PressureCategories.index('None')
+        category[trace] = PressureCategories.index('Trace')
+        return pressure, category
+
+    def make_volcanism(self, age, bonus) -> np.ndarray:
+        """
+        :param bonus: The volcanic bonus of every world, see
+            World.get_volcanic_bonus
+        :return: Array of activity codes, see GeologicActivities
+        """
+        bonus = np.round(self.surfacegravity / age * 40).astype(np.int64) + bonus
+        roll = self.roll(np.ones(len(self), dtype=bool), 3, bonus)
+        return np.searchsorted(VolcanismLimits, roll, side='left')
+
+    def make_tectonism(self, volcanism, bonus) -> np.ndarray:
+        """
+        :param volcanism: Array of the volcanic activity codes
+        :param bonus: The tectonic bonus of every world, see
+            World.get_tectonic_bonus
+        :return: Array of activity codes, see GeologicActivities
+        """
+        bonus = np.array([-8, -4, 0, 4, 8])[volcanism] + bonus
+        bonus = np.where(self.hydrocover < 50, bonus - 2, bonus)
+        active = self.sizeclass >= STANDARD
+        activity = np.searchsorted(TectonicLimits, self.roll(active, 3, bonus), side='left')
+        return np.where(active, activity, 0)
+
+    def make_resources(self, volcanism) -> np.ndarray:
+        """
+        :return: Array of resource value modifiers, see WorldResources for
+            their names
+        """
+        bonus = np.array([-2, -1, 0, 1, 2])[volcanism]
+        return ResourceModifiers[self.roll(np.ones(len(self), dtype=bool), 3, bonus)]
+
+    def make_habitability(self, volcanism, tectonism) -> np.ndarray:
+        worldtype = self.world_type
+        # The penalties for heavy and extreme geologic activity (p. 121)
+        modifier = -np.array([0, 0, 0, 1, 2])[volcanism] - np.array([0, 0, 0, 1, 2])[tectonism]
+        # Breathable atmospheres (p. 88)
+        breathable = self.atmcomp == 0
+        pressure = np.array([0, 0, 1, 2, 3, 3, 1, 1])[self.presscat]
+        climate = np.array([0, 0, 1, 2, 2, 2, 2, 2, 1, 0, 0])[self.climatetype]
+        modifier += np.where(breathable, pressure + ~self.hasmarginal + climate, 0)
+        # Non-breathable atmospheres, by their number of components
+        components = sum((self.atmcomp & flag) > 0 for flag in AtmCompFlags.values())
+        modifier -= np.select([~breathable & (components == 2), ~breathable & (components == 3)], [1, 2], 0)
+        # Hydrographic coverage of Garden and Ocean worlds
+        hydro = self.hydrocover
+        wet = (worldtype == GARDEN) | (worldtype == OCEAN)
+        some = ((0 < hydro) & (hydro < 60)) | ((90 < hydro) & (hydro < 100))
+        modifier += np.where(wet, np.select([some, hydro > 0], [1, 2], 0), 0)
+        return np.maximum(modifier, -2)
+
+    def properties(self, i) -> dict:
+        """
+        Return the properties of world i as World would store them, with
+        strings instead of codes.
+
+        :param i: The row number.
+        :type i: int
+        """
+        atmcomp = int(self.atmcomp[i])
+        marginal = int(self.marginal[i])
+        return {
+            'orbit': float(self.orbit[i]),
+            'sizeclass': IntToSize[self.sizeclass[i]],
+            'blackbody_temperature': float(self.blackbody_temperature[i]),
+            'world_type': WorldTypes[self.world_type[i]],
+            'atmmass': float(self.atmmass[i]),
+            'atmcomp': {label: bool(atmcomp & flag) for label, flag in AtmCompFlags.items()},
+            'hasmarginal': bool(self.hasmarginal[i]),
+            'marginal': MAtmoTable[marginal] if marginal else '',
+            'hydrocover': int(self.hydrocover[i]),
+            'averagesurface': float(self.averagesurface[i]),
+            'climatetype': Climates[self.climatetype[i]],
+            'density': float(self.density[i]),
+            'diameter': float(self.diameter[i]),
+            'surfacegravity': float(self.surfacegravity[i]),
+            'mass': float(self.mass[i]),
+            'pressure': float(self.pressure[i]),
+            'presscat': PressureCategories[self.presscat[i]]
+        }
@@ -9,12 +9,13 @@ class MarkovStateMachine:
     :type currentState: namegenerator.markovstate.MarkovState
     :type startState: namegenerator.markovstate.MarkovState
     :type depth: int
+    :type rng: random.Random
     """
 
     factory = MarkovStateFactory()
 
     def __init__(self, depth=1, seed=None):
-        random.seed(seed)
+        self.rng = random.Random(seed)  # Own stream, so that other users of the random module are left alone
         if depth < 1:
             depth = 1
         self.depth = depth
@@ -26,7 +27,7 @@ class MarkovStateMachine:
         self.currentState = self.factory.get_markov_state(start_array)
 
     def next(self) -> None:
-        self.currentState = self.factory.get_markov_state(self.currentState.next_state())
+        self.currentState = self.factory.get_markov_state(self.currentState.next_state(self.rng))
 
     def get_letter(self) -> str:
         return self.currentState.value[-1]  # Retrieves the last letter of the window, which is the newest.
@@ -87,7 +88,7 @@ class MarkovStateMachine:
         if length < 0:
             length = 0
         if length == 0:
-            length = random.randint(3, 8)
+            length = self.rng.randint(3, 8)
         result = ""
         while len(result) < length:
             self.next()
@@ -31,12 +31,14 @@ class MarkovState:
     def __eq__(self, other):
         return self.value == other.value
 
-    def next_state(self) -> [str]:
+    def next_state(self, rng=random) -> [str]:
         """
         Returns the value of the next state.
+        :param rng: The source of randomness, defaults to the random module.
+        :type rng: random.Random
         """
         if len(self.transitions) > 0:
-            return self.transitions[random.randint(0, len(self.transitions) - 1)]
+            return self.transitions[rng.randint(0, len(self.transitions) - 1)]
         else:
             arr = []
             for i in range(1, self.depth):
@@ -1,5 +1,4 @@
 import csv
-import random
 import os
 
 from .markovchain import MarkovStateMachine
@@ -77,7 +76,7 @@ class NameGenerator:
         if self.use_chain:
             return self.markov_chain.get_name(length)
         else:
-            result = self.names.pop(random.randint(0, len(self.names) - 1)) + self.suffixes[self.reload_counter]
+            result = self.names.pop(self.markov_chain.rng.randint(0, len(self.names) - 1)) + self.suffixes[self.reload_counter]
             if len(self.names) == 0:
                 self.reload_file()
             return result
@@ -4,13 +4,144 @@ import random as r
 import sys
 
 import operator
+import threading
+from collections import OrderedDict
 
 from gurpsspace import starsystem as starsys
+from gurpsspace.gardenpool import GardenPool
+from gurpsspace.seedbank import SeedBank
 from namegenerator import namegenerator
 
 from jinja2 import Environment, FileSystemLoader
 env = Environment(loader=FileSystemLoader('webgui/templates'))
 
+# Memory in bytes for the generated star systems kept for the pages of the
+# sessions. An encoded system takes about 5 KB.
+SystemCacheBudget = 16 * 2 ** 20
+
+
+def build_system(seed, arguments, naming, depth, use_chain):
+    """
+    Generate the star system of a session, including the names of its bodies.
+
+    :param seed: The seed of the system's random stream
+    :param arguments: Tuple of (keyword, value) pairs for the StarSystem
+        constructor
+    :param naming: The naming scheme, "" for the simple "A-1", "B-1" scheme
+    :param depth: The depth of the Markov chain of the naming scheme
+    :param use_chain: Whether to generate names with the Markov chain
+    :return: The star system, which only depends on the parameters
+
+    Sessions only store these parameters, and every page gets the system from
+    the SystemCache, which only calls this on a miss.
+    """
+    mysys = starsys.StarSystem(rng=r.Random(seed), **dict(arguments))  # Private stream, so that concurrent requests don't interfere
+    # Generate deferred details now, so that they are cached as well
+    mysys.make_details()
+    if naming != "":  # A naming scheme has been selected that is not the simple "A-1", "B-1" scheme.
+        namegen = namegenerator.NameGenerator(depth, seed)
+        namegen.read_file(naming)
+        namegen.use_chain = use_chain
+        for star in mysys.stars:
+            for body in star.planetsystem.get_orbitcontents().values():
+                body.set_name(namegen.get_random_name())
+                if body.type() == 'Terrestrial':
+                    moons = body.moons
+                elif body.type() == 'Gas Giant':
+                    moons = body.get_moons()
+                else:
+                    continue
+                for moon in moons:
+                    if len(moon.get_name().split('-')) == 3:
+                        index = moon.get_name().split('-')[2]
+                        moon.set_name(body.get_name() + '-' + index)
+    return mysys
+
+
+class SystemCache(object):
+    """
+    Process-wide LRU cache of the star systems of the sessions, keyed by the
+    parameters of build_system.
+
+    The systems are stored encoded (see StarSystem.to_bytes), so the memory
+    they take is known exactly, and every request decodes a copy of its own
+    that it may change. Systems of popular shared seeds are thus served
+    without generating them again.
+    """
+
+    def __init__(self, budget=SystemCacheBudget):
+        """
+        :param budget: The memory for the encoded systems in bytes. The least
+            recently used systems are evicted once it is exceeded.
+        :type budget: int
+        """
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__systems = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the star system for the parameters of build_system, generating
+        it on a miss.
+
+        :param key: Tuple (seed, arguments, naming, depth, use_chain)
+        :type key: tuple
+        """
+        with self.__lock:
+            data = self.__systems.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__systems.move_to_end(key)
+        if data is None:
+            # Generated outside of the lock, so that other requests are not
+            # held up. Two requests missing at once both generate the system.
+            data = build_system(*key).to_bytes()
+            self.put(key, data)
+        return starsys.StarSystem.from_bytes(data)
+
+    def put(self, key, data):
+        """
+        Store an encoded star system, evicting the least recently used ones
+        until the budget is kept.
+        """
+        if len(data) > self.budget:
+            return
+        with self.__lock:
+            previous = self.__systems.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.__systems[key] = data
+            self.size += len(data)
+            while self.size > self.budget:
+                _, evicted = self.__systems.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Return the counters and the memory in use
+        """
+        with self.__lock:
+            return {'systems': len(self.__systems), 'size': self.size, 'budget': self.budget, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+
+system_cache = SystemCache()
+
+# Seeds of systems with a Garden world, found in the background
+GardenPoolSize = 4
+garden_pool = GardenPool(GardenPoolSize)
+
+# Seed bank (see gurpsspace.seedbank) used for garden requests, if the file exists
+SeedBankPath = 'seeds.db'
+seed_bank = None
+
 
 class WebServer(object):
 
@@ -36,7 +167,6 @@ class WebServer(object):
 
         input_seed = None if seed == '' or None else seed  # Correctly interpret "no input"
         self.set_seed(input_seed)  # reseed the PRNG, so that there is a unique seed every time
-        r.seed(self.random_seed)
 
         if num_stars == "":
             num_stars = None
@@ -45,57 +175,66 @@ class WebServer(object):
         else:
             num_stars = int(num_stars)
 
-        namegen = None
-
-        if naming != "":  # A naming scheme has been selected that is not the simple "A-1", "B-1" scheme.
-            namegen = namegenerator.NameGenerator(int(depth), self.random_seed)
-            namegen.read_file(naming)
-            namegen.use_chain = use_chain
-            cherrypy.session['namegen'] = namegen
-        else:
-            cherrypy.session['namegen'] = None
-
         arguments = {
             'open_cluster': open_cluster == "True",
             'num_stars': num_stars,
             'age': age
         }
 
-        # Generate star systems until one is made that contains a Garden world if it's required.
         if must_have_garden == "True":
-            garden = False
-            while garden is not True:
-                mysys = starsys.StarSystem(**arguments)
-                garden = mysys.has_garden()
-        else:
-            mysys = starsys.StarSystem(**arguments)
-
-        for star in mysys.stars:
-            for key, v in star.planetsystem.get_orbitcontents().items():
-                if namegen is not None:
-                    simple_name = v.get_name().replace("-", "")
-                    if cherrypy.session.get('name_of_' + simple_name) is None:
-                        name = namegen.get_random_name()
-                        star.planetsystem.get_orbitcontents()[key].set_name(name)
-                        # For some reason, using simple_name here leads to storing stuff improperly and
-                        # generating new names every time. No idea why.
-                        cherrypy.session['name_of_' + v.get_name().replace("-", "")] = name
-                    else:
-                        name = cherrypy.session.get('name_of_' + simple_name)
-                        star.planetsystem.get_orbitcontents()[key].set_name(name)
-
+            found_seed, arguments = self.find_garden_seed(arguments, input_seed is None)
+            self.set_seed(found_seed)
+
+        # The session only holds what is needed to rebuild the system
+        system_key = (self.random_seed, tuple(sorted(arguments.items())), naming, int(depth), use_chain)
+        cherrypy.session['system'] = system_key
+        # A star index of the previous system does not apply to the new one
+        cherrypy.session.pop('star_id', None)
         cherrypy.session.save()
+        mysys = system_cache.get(system_key)
 
         tmpl = env.get_template('overview.html')
-        cherrypy.session['starsystem'] = mysys
         cherrypy.response.cookie['names'] = {}
         return tmpl.render(starsystem=mysys, seed=self.random_seed)
 
+    def find_garden_seed(self, arguments, any_seed):
+        """
+        Find the seed of a system with a Garden world.
+
+        :param arguments: Keyword arguments for the StarSystem constructor
+        :param any_seed: If True, take a seed of the seed bank or the garden
+            pool. Otherwise search from the current seed, so that the result
+            can be reproduced.
+        :return: Tuple (seed, arguments), the constructor arguments which
+            reproduce the system with the seed
+        """
+        # A bank only knows the age bucket of its systems
+        if any_seed and seed_bank is not None and arguments['age'] is None:
+            found_seed = seed_bank.random_seed(has_garden=True, open_cluster=arguments['open_cluster'],
+                                               num_stars=arguments['num_stars'])
+            if found_seed is not None:
+                return found_seed, seed_bank.arguments
+        garden_arguments = dict(arguments, require_garden=True, lazy=True)
+        found_seed = garden_pool.pop(arguments) if any_seed else None
+        if found_seed is None:
+            # Generate star systems until one is made that contains a Garden world.
+            # The seed is moved on to the one of the found system, so that it reproduces the system directly.
+            found_seed, _ = starsys.find_garden_system(self.random_seed, **arguments)
+        return found_seed, garden_arguments
+
+    def session_system(self):
+        """
+        Rebuild the star system of the session, or redirect to the start page
+        if there is none.
+        """
+        system_key = cherrypy.session.get('system')
+        if system_key is None:
+            raise cherrypy.HTTPRedirect('/', 307)
+        return system_cache.get(system_key)
+
     @cherrypy.expose
     def planetsystem(self, star_id=""):
-        starsystem = cherrypy.session.get('starsystem')
-        if starsystem is None:
-            raise cherrypy.HTTPRedirect('/', 307)
+        starsystem = self.session_system()
         if star_id == "":
             raise cherrypy.HTTPRedirect('/', 307)
         else:
@@ -104,69 +243,73 @@ class WebServer(object):
         tmpl = env.get_template('planetsystem.html')
         env.globals['translate_row'] = self.translate_row
 
-        t_count = 0
-        a_count = 0
-        g_count = 0
-        for key, _ in starsystem.stars[star_id].planetsystem.get_orbitcontents().items():
-                if starsystem.stars[star_id].planetsystem.get_orbitcontents()[key].type() == 'Terrestrial':
-                    t_count += 1
-                if starsystem.stars[star_id].planetsystem.get_orbitcontents()[key].type() == 'Ast. Belt':
-                    a_count += 1
-                if starsystem.stars[star_id].planetsystem.get_orbitcontents()[key].type() == 'Gas Giant':
-                    g_count += 1
+        planetsystem = starsystem.stars[star_id].planetsystem
+        summary = planetsystem.get_summary()
 
-        cherrypy.session['planetsystem'] = starsystem.stars[star_id].planetsystem
-        return tmpl.render(planetsystem=starsystem.stars[star_id].planetsystem, terrestrial_count=t_count, asteroid_count=a_count, gas_giant_count=g_count)
+        cherrypy.session['star_id'] = star_id
+        return tmpl.render(planetsystem=planetsystem, terrestrial_count=summary.count('Terrestrial'),
+                           asteroid_count=summary.count('Ast. Belt'), gas_giant_count=summary.count('Gas Giant'))
 
     @cherrypy.expose
     def satellites(self, planet_id=""):
-        planetsystem = cherrypy.session.get('planetsystem')
-        if planetsystem is None:
+        star_id = cherrypy.session.get('star_id')
+        if star_id is None:
+            raise cherrypy.HTTPRedirect('/', 307)
+        # The star system needs to stay alive while its planets are used
+        starsystem = self.session_system()
+        if not 0 <= star_id < len(starsystem.stars):
             raise cherrypy.HTTPRedirect('/', 307)
+        planetsystem = starsystem.stars[star_id].planetsystem
         if planet_id == "":
             raise cherrypy.HTTPRedirect('/', 307)
-        else:
-            planet_id = float(planet_id)
 
-        planet = planetsystem.get_orbitcontents()[planet_id]
+        # Bodies are linked by number, older links use the orbital radius
+        contents = planetsystem.get_orbitcontents()
+        try:
+            if planet_id.isdigit():
+                planet = contents.by_number(int(planet_id))
+            else:
+                planet = contents[float(planet_id)]
+        except (KeyError, ValueError):
+            raise cherrypy.HTTPError(404)
         if planet.type() == 'Terrestrial':
             moons = planet.get_satellites()
         else:
             moons = planet.get_moons()
 
-        for moon in moons:
-            if len(moon.get_name().split('-')) == 3:
-                index = moon.get_name().split('-')[2]
-                moon.set_name(planet.get_name() + '-' + index)
-
-        cherrypy.session['moons'] = moons
-
         tmpl = env.get_template('moons.html')
         return tmpl.render(moons=moons, planet_name=planet.get_name())
 
     @cherrypy.expose
     def printable(self):
-        try:
-            starsystem = cherrypy.session['starsystem']
-        except KeyError:
+        system_key = cherrypy.session.get('system')
+        if system_key is None:
             raise cherrypy.HTTPError(404)
+        starsystem = system_cache.get(system_key)
 
-        t_count = 0
-        a_count = 0
-        g_count = 0
-        for star in starsystem.stars:
-            for key, _ in star.planetsystem.get_orbitcontents().items():
-                if star.planetsystem.get_orbitcontents()[key].type() == 'Terrestrial':
-                    t_count += 1
-                if star.planetsystem.get_orbitcontents()[key].type() == 'Ast. Belt':
-                    a_count += 1
-                if star.planetsystem.get_orbitcontents()[key].type() == 'Gas Giant':
-                    g_count += 1
+        summary = starsystem.get_summary()
 
         tmpl = env.get_template('printable.html')
         env.globals['translate_row'] = self.translate_row
 
-        return tmpl.render(starsystem=starsystem, seed=self.random_seed, terrestrial_count=t_count, asteroid_count=a_count, gas_giant_count=g_count)
+        return tmpl.render(starsystem=starsystem, seed=system_key[0], terrestrial_count=summary.count('Terrestrial'),
+                           asteroid_count=summary.count('Ast. Belt'), gas_giant_count=summary.count('Gas Giant'))
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def cache(self):
+        """
+        Report the counters of the system cache
+        """
+        return system_cache.stats()
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def gardens(self):
+        """
+        Report the metrics of the pool of Garden world seeds
+        """
+        return garden_pool.stats()
 
     def translate_row(self, planet, row):
         """
@@ -262,4 +405,11 @@ if __name__ == '__main__':
             'tools.staticdir.dir': "webgui/scripts"
         }
     }
+    # Seeds for the arguments of a plain request, with and without an open cluster
+    for cluster in (False, True):
+        garden_pool.warm({'open_cluster': cluster, 'num_stars': None, 'age': None})
+    cherrypy.engine.subscribe('stop', garden_pool.close)
+    if os.path.exists(SeedBankPath):
+        seed_bank = SeedBank(SeedBankPath)
+        cherrypy.engine.subscribe('stop', seed_bank.close)
     cherrypy.quickstart(WebServer(), '/', conf)
@@ -0,0 +1,64 @@
+import gc
+import unittest
+from gurpsspace import batch
+
+
+def fingerprint(system):
+    result = [system.get_age(), system.get_orbits()]
+    for star_ in system.stars:
+        result.append(star_.get_mass())
+        for orbit, body in sorted(star_.planetsystem.get_orbitcontents().items()):
+            result.append((orbit, repr(body), body.get_eccentricity()))
+    return result
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_independent_of_workers(self):
+        serial = list(batch.generate(12, 5, workers=1, transform=fingerprint))
+        parallel = list(batch.generate(12, 5, workers=2, chunksize=5, transform=fingerprint))
+        self.assertEqual(serial, parallel)
+        self.assertEqual([number for number, _ in serial], list(range(12)))
+
+    def test_unordered(self):
+        serial = list(batch.generate(12, 5, workers=1, transform=fingerprint))
+        unordered = batch.generate(12, 5, workers=2, chunksize=3, ordered=False, transform=fingerprint)
+        self.assertEqual(sorted(unordered), serial)
+
+    def test_single_system(self):
+        number, result = list(batch.generate(1, 5, workers=1, start=3, transform=fingerprint))[0]
+        self.assertEqual(number, 3)
+        self.assertEqual(result, fingerprint(batch.generate_system(5, 3)))
+
+    def test_system_objects(self):
+        systems = list(batch.generate(4, 5, workers=2, chunksize=1, num_stars=2))
+        for _, system in systems:
+            self.assertEqual(len(system.stars), 2)
+
+    def test_deferred_gc(self):
+        enabled = gc.isenabled()
+        frozen = gc.get_freeze_count()
+        serial = list(batch.generate(6, 5, workers=1, transform=fingerprint))
+        deferred = list(batch.generate(6, 5, workers=1, chunksize=4, transform=fingerprint, defer_gc=True))
+        self.assertEqual(deferred, serial)
+        self.assertEqual(gc.isenabled(), enabled)
+        # Pausing the collector does not freeze anything
+        self.assertEqual(gc.get_freeze_count(), frozen)
+        try:
+            deferred = list(batch.generate(6, 5, workers=1, chunksize=4, transform=fingerprint, defer_gc=True,
+                                           freeze=True))
+            self.assertGreater(gc.get_freeze_count(), frozen)
+        finally:
+            gc.unfreeze()
+        self.assertEqual(deferred, serial)
+
+    def test_no_reference_cycles(self):
+        gc.collect()
+        with batch.deferred_gc():
+            for _, system in batch.generate(6, 5, workers=1):
+                system.get_summary().moons
+            del system
+            self.assertEqual(gc.collect(), 0)
+
+    def test_invalid_chunksize(self):
+        self.assertRaises(ValueError, list, batch.generate(4, 5, chunksize=0))
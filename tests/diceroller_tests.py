@@ -1,5 +1,6 @@
 import unittest
 from gurpsspace import dice
+from gurpsspace.tables import OrbitalSpace, OrbitalSpaceSampler, StOEccSampler
 
 
 class TestDiceRoller(unittest.TestCase):
@@ -24,3 +25,38 @@ class TestDiceRoller(unittest.TestCase):
 
     def test_roll_negative_dice(self):
         self.assertRaises(ValueError, self.roller.roll_dice, dice_num=-1, modifier=0)
+
+    def test_roll_many_shape_and_bounds(self):
+        rolls = self.roller.roll_many(dice_num=3, modifier=0, count=1000)
+        self.assertEqual(len(rolls), 1000)
+        self.assertTrue(rolls.min() >= 3)
+        self.assertTrue(rolls.max() <= 18)
+
+    def test_roll_many_non_negative_returns(self):
+        rolls = self.roller.roll_many(dice_num=1, modifier=-7, count=100)
+        self.assertTrue((rolls == 0).all())
+
+    def test_roll_many_invalid_dice(self):
+        self.assertRaises(ValueError, self.roller.roll_many, dice_num=0, modifier=0, count=10)
+        self.assertRaises(ValueError, self.roller.roll_many, dice_num=1, modifier=0, count=10, sides=1)
+
+    def test_roll_distribution(self):
+        distribution = dice.roll_distribution(3, 0)
+        self.assertEqual(sum(distribution.values()), 216)
+        self.assertEqual(distribution[3], 1)
+        self.assertEqual(distribution[10], 27)
+
+    def test_roll_distribution_clamps_at_zero(self):
+        self.assertEqual(dice.roll_distribution(1, -7), {0: 6})
+
+    def test_table_sampler_distribution(self):
+        weights = dict(OrbitalSpaceSampler.distribution().weights())
+        counts = dice.roll_distribution(3, 0)
+        self.assertEqual(weights[1.4], counts[3] + counts[4])
+        self.assertEqual(sum(weights.values()), 216)
+        self.assertTrue(OrbitalSpaceSampler.sample(self.roller) in OrbitalSpace)
+
+    def test_table_sampler_modifier(self):
+        # With a -6 modifier every 3d roll of 9 or less ends up at the table limit of 3
+        self.assertEqual(StOEccSampler.distribution(-6).weights()[0], (0, 81))
+        self.assertEqual(StOEccSampler.distribution(20).values, [0.95])
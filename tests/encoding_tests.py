@@ -0,0 +1,73 @@
+import contextlib
+import io
+import pickle
+import random
+import unittest
+from gurpsspace import encoding, starsystem
+from gurpsspace.satellitebatch import make_system_details
+
+
+def info(system):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        system.print_info()
+    return output.getvalue()
+
+
+class TestEncoding(unittest.TestCase):
+
+    def test_round_trip(self):
+        for seed in range(20):
+            system = starsystem.StarSystem(rng=random.Random(seed))
+            data = system.to_bytes()
+            decoded = starsystem.StarSystem.from_bytes(data)
+            self.assertEqual(decoded.to_dict(), system.to_dict())
+            self.assertEqual(decoded.to_bytes(), data)
+            self.assertEqual(info(decoded), info(system))
+            self.assertEqual(decoded.get_summary().bodies, system.get_summary().bodies)
+
+    def test_lazy_round_trip(self):
+        for seed in range(20):
+            for detail in ('stars', 'planets'):
+                system = starsystem.StarSystem(rng=random.Random(seed), lazy=True, detail=detail)
+                decoded = starsystem.StarSystem.from_bytes(system.to_bytes())
+                self.assertEqual(decoded.detail, detail)
+                # The deferred details come from their own seeds
+                self.assertEqual(info(decoded), info(system))
+
+    def test_satellite_families(self):
+        systems = [starsystem.StarSystem(rng=random.Random(seed), lazy=True) for seed in range(10)]
+        make_system_details(systems, random.Random(1))
+        for system in systems:
+            decoded = starsystem.StarSystem.from_bytes(system.to_bytes())
+            self.assertEqual(info(decoded), info(system))
+
+    def test_value_types(self):
+        values = [None, True, False, 0, -1, 127, 128, -2 ** 40, 2 ** 64 - 1, 0.0, 1.5, float('inf'), 'Garden',
+                  'A-1-2', 'Ünicode', (), (1, 2.0), [[None]]]
+        for value in values:
+            record = {'record': 'Moonlet', 'family': value}
+            decoded = encoding.decode(encoding.encode(record))['family']
+            self.assertEqual(decoded, value)
+            self.assertIs(type(decoded), type(value))
+        # Strings of the table decode to the canonical objects
+        decoded = encoding.decode(encoding.encode({'record': 'Moonlet', 'family': ''.join(['Gar', 'den'])}))
+        self.assertIs(decoded['family'], 'Garden')
+        with self.assertRaises(ValueError):
+            encoding.encode({'record': 'Moonlet', 'family': object()})
+
+    def test_missing_fields(self):
+        record = {'record': 'Moonlet', 'orbit': 1.5}
+        self.assertEqual(encoding.decode(encoding.encode(record)), record)
+
+    def test_version(self):
+        data = bytearray(starsystem.StarSystem(rng=random.Random(1)).to_bytes())
+        data[3] += 1
+        with self.assertRaises(ValueError):
+            encoding.decode(bytes(data))
+        with self.assertRaises(ValueError):
+            encoding.decode(b'XYZ' + bytes(data[3:]))
+
+    def test_size(self):
+        system = starsystem.StarSystem(rng=random.Random(2))
+        self.assertLess(len(system.to_bytes()), len(pickle.dumps(system)) / 5)
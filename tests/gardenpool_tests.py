@@ -0,0 +1,74 @@
+import random
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from gurpsspace import gardenpool, starsystem
+
+
+def wait_for(pool, count, timeout=60):
+    deadline = time.monotonic() + timeout
+    while len(pool) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestGardenPool(unittest.TestCase):
+
+    def setUp(self):
+        self.arguments = {'open_cluster': False, 'num_stars': None, 'age': None}
+
+    def test_pop(self):
+        pool = gardenpool.GardenPool(size=2)
+        try:
+            pool.warm(self.arguments)
+            wait_for(pool, 2)
+            seed = pool.pop(self.arguments)
+            self.assertIsNotNone(seed)
+            system = starsystem.StarSystem(rng=random.Random(seed), require_garden=True, lazy=True, **self.arguments)
+            self.assertTrue(system.has_garden())
+            stats = pool.stats()
+            self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 0, 1.))
+            self.assertGreaterEqual(stats['produced'], 2)
+            self.assertGreater(stats['refill_rate'], 0)
+            # Every pop of warmed arguments starts a refill
+            self.assertEqual(stats['seeds'] + stats['pending'], 2)
+        finally:
+            pool.close()
+
+    def test_separate_arguments(self):
+        pool = gardenpool.GardenPool(size=1)
+        try:
+            pool.warm(self.arguments)
+            wait_for(pool, 1)
+            self.assertIsNone(pool.pop(dict(self.arguments, num_stars=2)))
+            self.assertIsNotNone(pool.pop(self.arguments))
+        finally:
+            pool.close()
+
+    def test_unwarmed(self):
+        pool = gardenpool.GardenPool(size=1)
+        try:
+            # Arguments the pool has not been warmed for are not searched for
+            for age in range(10):
+                self.assertIsNone(pool.pop(dict(self.arguments, age=str(age))))
+            stats = pool.stats()
+            self.assertEqual((stats['seeds'], stats['pending'], stats['misses']), (0, 0, 10))
+        finally:
+            pool.close()
+
+    def test_process_executor(self):
+        with ProcessPoolExecutor(2) as executor:
+            pool = gardenpool.GardenPool(size=2, executor=executor)
+            pool.warm(self.arguments)
+            wait_for(pool, 2)
+            pool.close()
+            self.assertEqual(len(pool), 2)
+
+    def test_closed(self):
+        pool = gardenpool.GardenPool(size=1)
+        pool.close()
+        self.assertIsNone(pool.pop(self.arguments))
+        self.assertEqual(pool.stats()['pending'], 0)
+
+    def test_size(self):
+        with self.assertRaises(ValueError):
+            gardenpool.GardenPool(size=0)
@@ -0,0 +1,60 @@
+import pickle
+import random
+import unittest
+from gurpsspace import starsystem
+from gurpsspace.orbitindex import OrbitIndex
+
+
+class TestOrbitIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = OrbitIndex([(2.3999999999999995, 'b'), (0.5, 'a'), (7.2, 'c')])
+
+    def test_order(self):
+        self.assertEqual(list(self.index), [0.5, 2.3999999999999995, 7.2])
+        self.index[1.2] = 'd'
+        self.assertEqual(list(self.index.values()), ['a', 'd', 'b', 'c'])
+        del self.index[0.5]
+        self.assertEqual(list(self.index), [1.2, 2.3999999999999995, 7.2])
+        self.assertEqual(len(self.index), 3)
+
+    def test_tolerance(self):
+        self.assertEqual(self.index[2.4], 'b')
+        self.assertIn(2.4, self.index)
+        self.assertEqual(self.index.find(2.4), 2.3999999999999995)
+        self.assertNotIn(2.41, self.index)
+        self.assertEqual(self.index.find(2.41, default=None), None)
+        with self.assertRaises(KeyError):
+            self.index[2.41]
+        # Setting a nearly equal orbit replaces its content
+        self.index[2.4] = 'e'
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index[2.3999999999999995], 'e')
+
+    def test_neighbors(self):
+        self.assertEqual(self.index.position(2.4), 1)
+        self.assertEqual(self.index.inward(2.4), 0.5)
+        self.assertEqual(self.index.outward(2.4), 7.2)
+        self.assertIsNone(self.index.inward(0.5))
+        self.assertIsNone(self.index.outward(7.2))
+
+    def test_planetsystem(self):
+        system = starsystem.StarSystem(rng=random.Random(3))
+        contents = system.stars[0].planetsystem.get_orbitcontents()
+        self.assertIsInstance(contents, OrbitIndex)
+        self.assertEqual(list(contents), sorted(contents))
+        for orbit, content in contents.items():
+            self.assertIs(contents.by_number(content.get_number()), content)
+            self.assertIs(contents.by_name(content.get_name()), content)
+            self.assertIs(contents[float(str(round(orbit, 12)))], content)
+        # Renamed contents are found under their new name
+        content = contents[next(iter(contents))]
+        content.set_name('Renamed')
+        self.assertIs(contents.by_name('Renamed'), content)
+        with self.assertRaises(KeyError):
+            contents.by_number(0)
+        self.assertEqual(list(pickle.loads(pickle.dumps(contents))), list(contents))
+
+
+if __name__ == '__main__':
+    unittest.main()
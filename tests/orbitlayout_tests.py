@@ -0,0 +1,68 @@
+import random
+import statistics
+import unittest
+import numpy as np
+from gurpsspace import dice, orbitlayout, starsystem
+from gurpsspace.planetsystem import PlanetSystem
+
+
+def all_stars(seeds):
+    stars = []
+    for seed in seeds:
+        stars += starsystem.StarSystem(rng=random.Random(seed), detail='stars').stars
+    return stars
+
+
+class TestOrbitLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.stars = all_stars(range(200))
+        self.limits = orbitlayout.OrbitLimits.from_stars(self.stars)
+
+    def test_allowed(self):
+        star = self.stars[0]
+        inner, outer = star.get_orbit_limits()
+        allowed = self.limits.allowed(np.array([inner, outer, inner / 2, outer * 2]), np.zeros(4, dtype=int))
+        self.assertEqual(allowed.tolist(), [True, True, False, False])
+
+    def test_outward(self):
+        start = self.limits.inner
+        roller = dice.DiceRoller(np.random.default_rng(1))
+        for row, orbits in enumerate(orbitlayout.orbits_outward(start, self.limits, roller)):
+            self.assertTrue(self.limits.allowed(orbits, np.full(len(orbits), row)).all())
+            orbits = [start[row]] + orbits
+            self.assertEqual(orbits, sorted(orbits))
+            self.assertTrue((np.diff(orbits) >= orbitlayout.MinimumSpacing - 1e-9).all())
+
+    def test_inward(self):
+        start = self.limits.outer
+        roller = dice.DiceRoller(np.random.default_rng(2))
+        for row, orbits in enumerate(orbitlayout.orbits_inward(start, self.limits, roller)):
+            self.assertTrue(self.limits.allowed(orbits, np.full(len(orbits), row)).all())
+            orbits = orbits + [start[row]]
+            self.assertEqual(orbits, sorted(orbits))
+            self.assertTrue((np.diff(orbits) >= orbitlayout.MinimumSpacing - 1e-9).all())
+
+    def test_distribution(self):
+        # The batch reproduces the distribution of the scalar walk, not its
+        # random stream
+        scalar = []
+        for star in self.stars:
+            system = PlanetSystem(star, rng=random.Random(star.roller.roll_seed()))
+            scalar.append(len(system.get_orbitcontents()))
+        orbitlayout.make_planetsystems(self.stars, np.random.default_rng(3))
+        batch = [len(star.planetsystem.get_orbitcontents()) for star in self.stars]
+        self.assertAlmostEqual(statistics.mean(batch), statistics.mean(scalar), delta=0.6)
+
+    def test_make_planetsystems(self):
+        orbitlayout.make_planetsystems(self.stars[:20], np.random.default_rng(4), lazy=True)
+        for star in self.stars[:20]:
+            orbits = sorted(star.planetsystem.get_orbitcontents())
+            self.assertTrue((np.diff(orbits) >= orbitlayout.MinimumSpacing - 1e-9).all())
+            # Only epistellar gas giants are closer than the inner limit
+            for orbit in orbits[1:]:
+                self.assertTrue(star.planetsystem.allowed_orbit(orbit))
+
+
+if __name__ == '__main__':
+    unittest.main()
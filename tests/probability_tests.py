@@ -0,0 +1,101 @@
+import random
+import unittest
+from fractions import Fraction
+
+from gurpsspace import probability, star, starsystem
+from gurpsspace.planet import Planet
+
+
+class TestProbability(unittest.TestCase):
+
+    def test_distribution(self):
+        roll = probability.Distribution.roll(3)
+        self.assertEqual(roll.probability(10), Fraction(27, 216))
+        self.assertEqual(roll.probability(lambda value: value >= 17), Fraction(4, 216))
+        self.assertEqual(roll.mean(), Fraction(21, 2))
+        two = roll.bind(lambda first: probability.Distribution.roll(1).map(lambda second: first + second))
+        self.assertEqual(two.probabilities(), probability.Distribution.roll(4).probabilities())
+        self.assertEqual(roll.given(lambda value: value <= 4).probability(3), Fraction(1, 4))
+        self.assertRaises(ValueError, roll.given, lambda value: value > 18)
+        self.assertRaises(ValueError, probability.Distribution, {'a': -1})
+
+    def test_garden_probability(self):
+        # 3d + 10 >= 18 for a Standard world at 278 K and age 5
+        worldtypes = probability.planet_distribution('Standard', 1.0, 1.0, 1.0, 5.0)
+        self.assertEqual(worldtypes.probabilities(), {'Garden': Fraction(181, 216), 'Ocean': Fraction(35, 216)})
+
+    def test_age_distribution(self):
+        ages = probability.age_distribution()
+        self.assertEqual(ages.probability(0.001), Fraction(1, 216))
+        self.assertEqual(sum(ages.probabilities().values()), 1)
+        system = starsystem.StarSystem(rng=random.Random(1), detail='stars')
+        for _ in range(500):
+            self.assertIn(system.random_age(), ages)
+        cluster_ages = probability.age_distribution(open_cluster=True)
+        self.assertTrue(all(age <= 2 for age in cluster_ages))
+        system.opencluster = True
+        for _ in range(200):
+            self.assertIn(system.make_age(), cluster_ages)
+
+    def test_star_distribution(self):
+        stars = probability.star_distribution(4.0)
+        self.assertEqual(stars.map(lambda outcome: outcome.index).probabilities(), star.index_distribution())
+        rng = random.Random(2)
+        for _ in range(300):
+            mystar = star.Star(4.0, rng=rng)
+            outcome = (mystar.get_mass(), mystar.get_luminosity(), mystar.get_temp(), mystar.get_star_type())
+            self.assertIn(outcome, stars.map(lambda s: (s.mass, s.luminosity, s.temperature, s.star_type)))
+
+    def test_planet_distribution(self):
+        rng = random.Random(3)
+        primary = star.Star(3.0, rng=rng)
+        while primary.get_sequence() != 'Main':
+            primary = star.Star(3.0, rng=rng)
+        luminosity = primary.get_luminosity()
+        # In the middle of the band of Garden and Ocean worlds
+        orbit = (278 * luminosity ** 0.25 / 280) ** 2
+        fields = ('world_type', 'hydrocover', 'averagesurface', 'climatetype', 'atmflags', 'marginal',
+                  'surfacegravity', 'presscat', 'nummoons', 'volcanism', 'tectonic', 'resources',
+                  'habitability', 'affinity')
+        distributions = {field: probability.planet_distribution('Standard', orbit, luminosity,
+                                                                primary.get_mass(), 3.0, field)
+                         for field in fields}
+        counts = {}
+        planets = 1500
+        for _ in range(planets):
+            planet = Planet(primary, orbit, 'Standard', rng=rng)
+            for field in fields:
+                # Every generated value needs to be a possible outcome
+                self.assertIn(getattr(planet, field), distributions[field], field)
+            counts[planet.habitability] = counts.get(planet.habitability, 0) + 1
+        for habitability, exact in distributions['habitability'].probabilities().items():
+            self.assertAlmostEqual(counts.get(habitability, 0) / planets, float(exact), delta=0.04)
+
+    def test_joint_distribution(self):
+        joint = probability.planet_distribution('Large', 1.0, 1.0, 1.0, 5.0, ('world_type', 'habitability'))
+        self.assertEqual(joint.map(lambda values: values[0]).probabilities(),
+                         probability.planet_distribution('Large', 1.0, 1.0, 1.0, 5.0).probabilities())
+        self.assertRaises(ValueError, probability.planet_distribution, 'Large', 1.0, 1.0, 1.0, 5.0, 'colour')
+        self.assertRaises(ValueError, probability.planet_distribution, 'Large', 1.0, 1.0, 1.0, 5.0,
+                          probability.PlanetFields)
+
+    def test_planet_distribution_around(self):
+        oceans = probability.planet_distribution_around('G2', 'Standard', 0.9)
+        self.assertEqual(sum(oceans.probabilities().values()), 1)
+        self.assertGreater(oceans.probability('Ocean'), 0)
+        self.assertRaises(ValueError, probability.planet_distribution_around, 'X1', 'Standard', 0.9)
+        # White dwarfs are all of type A6
+        self.assertRaises(ValueError, probability.planet_distribution_around, 'A5', 'Standard', 0.9,
+                          sequence='White Dwarf')
+
+    def test_system_estimate(self):
+        estimate = probability.system_estimate('Garden', samples=30, rng=random.Random(4))
+        self.assertTrue(0 <= estimate.probability <= 1)
+        self.assertTrue(estimate.probability <= estimate.expected_count)
+        self.assertIn('planet system layouts', estimate.sampled)
+        self.assertEqual(estimate.exact, ('planets',))
+        self.assertRaises(ValueError, probability.system_estimate, 'Garden', samples=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
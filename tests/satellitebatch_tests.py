@@ -0,0 +1,65 @@
+import pickle
+import random
+import unittest
+import numpy as np
+from gurpsspace import satellitebatch, starsystem
+from gurpsspace.satellites import Moon
+
+
+def satellite_bodies(system):
+    for star_ in system.stars:
+        for body in star_.planetsystem.get_orbitcontents().values():
+            if body.type() in ('Terrestrial', 'Gas Giant'):
+                yield body
+
+
+class TestSatelliteBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.systems = [starsystem.StarSystem(rng=random.Random(seed), detail='stars') for seed in range(20)]
+        satellitebatch.make_system_details(self.systems, np.random.default_rng(4))
+
+    def test_details(self):
+        for system in self.systems:
+            self.assertEqual(system.detail, 'full')
+            for body in satellite_bodies(system):
+                self.assertTrue(body.detailed)
+                self.assertEqual(body.num_moons(), len(body.get_moons() if body.type() == 'Gas Giant' else body.moons))
+
+    def test_moons(self):
+        count = 0
+        for system in self.systems:
+            for body in satellite_bodies(system):
+                moons = body.get_moons() if body.type() == 'Gas Giant' else body.moons
+                orbits = [moon.get_orbit() for moon in moons]
+                self.assertEqual(orbits, sorted(orbits))
+                for number, moon in enumerate(moons, 1):
+                    count += 1
+                    self.assertIsInstance(moon, Moon)
+                    self.assertIs(moon.parent, body)
+                    self.assertEqual(moon.get_number(), number)
+                    name = '{}-{}-{}'.format(body.primary_star.get_letter(), body.get_number(), number)
+                    self.assertEqual(moon.get_name(), name)
+                    self.assertIn(moon.get_volcanism(), ('None', 'Light', 'Moderate', 'Heavy', 'Extreme'))
+                    self.assertEqual(moon.get_affinity(), moon.get_rvm() + moon.get_habitability())
+                    self.assertIs(moons[number - 1], moon)
+        self.assertGreater(count, 0)
+
+    def test_sizes(self):
+        # Moons of gas giants are Small with a 3d roll of 12 or more
+        self.assertRaises(ValueError, satellitebatch.MoonBatch, True, 2, 200, 10, 300, 5, 1, 4)
+        batch = satellitebatch.MoonBatch(np.ones(20000, dtype=bool), 2, 200, 10, 300, 5, 1, 4,
+                                         rng=np.random.default_rng(2))
+        self.assertAlmostEqual(np.mean(batch.sizeclass == 1), 0.375, delta=0.015)
+        self.assertTrue(np.all(batch.sizeclass <= 1))
+
+    def test_pickle(self):
+        system = self.systems[0]
+        copied = pickle.loads(pickle.dumps(system))
+        for body, copied_body in zip(satellite_bodies(system), satellite_bodies(copied)):
+            self.assertEqual(body.num_moons(), copied_body.num_moons())
+            self.assertEqual(body.num_moonlets(), copied_body.num_moonlets())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import unittest
+from gurpsspace import search
+from gurpsspace.starsystem import StarSystem
+
+
+def two_stars(system):
+    return len(system.stars) == 2 and system.get_summary().count('Gas Giant') > 0
+
+
+class TestSearch(unittest.TestCase):
+
+    def test_filter(self):
+        condition = search.Filter(num_stars=1, has_garden=True, min_gas_giants=1)
+        result = search.search(condition, count=3, workers=1)
+        self.assertEqual(len(result.seeds), 3)
+        self.assertEqual(result.scanned, result.seeds[-1])
+        for seed in range(1, result.seeds[-1] + 1):
+            system = StarSystem(rng=random.Random(seed))
+            summary = system.get_summary()
+            expected = len(system.stars) == 1 and summary.has_garden and summary.count('Gas Giant') >= 1
+            self.assertEqual(seed in result.seeds, expected, seed)
+
+    def test_details(self):
+        condition = search.Filter(open_cluster=False, world_types=['Ocean'], min_habitability=3)
+        self.assertEqual(condition.detail(), 'full')
+        for seed in search.search(condition, count=2, workers=1).seeds:
+            system = StarSystem(rng=random.Random(seed))
+            self.assertFalse(system.is_open_cluster())
+            self.assertIn('Ocean', system.get_summary().world_types)
+            self.assertGreaterEqual(system.get_summary().best_habitability, 3)
+
+    def test_independent_of_workers(self):
+        serial = search.search(two_stars, count=4, workers=1, chunksize=5)
+        parallel = search.search(two_stars, count=4, workers=2, chunksize=5)
+        self.assertEqual(serial.seeds, parallel.seeds)
+        self.assertGreater(parallel.throughput, 0)
+
+    def test_range(self):
+        result = search.search(search.Filter(num_stars=3), count=1000, start=10, stop=60, workers=1, chunksize=7)
+        self.assertEqual(result.scanned, 50)
+        self.assertEqual(result.seeds, [seed for seed in range(10, 60)
+                                        if len(StarSystem(rng=random.Random(seed), detail='stars').stars) == 3])
+
+    def test_arguments(self):
+        with self.assertRaises(ValueError):
+            search.search(two_stars, count=0)
+        with self.assertRaises(ValueError):
+            search.search(two_stars, chunksize=0)
@@ -0,0 +1,77 @@
+import os
+import random
+import tempfile
+import unittest
+from gurpsspace import seedbank
+
+
+class TestSeedBank(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bank = seedbank.SeedBank(':memory:')
+        cls.bank.build(1, 80, workers=1, chunksize=16)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bank.close()
+
+    def test_features(self):
+        self.assertEqual(len(self.bank), 80)
+        self.assertEqual(self.bank.arguments, {})
+        for seed in (1, 17, 80):
+            features = self.bank.features(seed)
+            system = self.bank.system(seed)
+            summary = system.get_summary()
+            self.assertEqual(features['num_stars'], len(system.stars))
+            self.assertEqual(features['open_cluster'], system.is_open_cluster())
+            self.assertEqual(features['age'], system.get_age())
+            self.assertEqual(features['age_bucket'], seedbank.age_bucket(system.get_age()))
+            self.assertEqual(features['has_garden'], system.has_garden())
+            self.assertEqual(features['habitability'], summary.best_habitability)
+            self.assertEqual(features['world_types'], dict(summary.world_types))
+        self.assertIsNone(self.bank.features(81))
+
+    def test_queries(self):
+        systems = {seed: self.bank.system(seed) for seed in range(1, 81)}
+        gardens = [seed for seed, system in systems.items() if system.has_garden()]
+        self.assertEqual(self.bank.seeds(has_garden=True), gardens)
+        self.assertEqual(self.bank.count(has_garden=True), len(gardens))
+        single = [seed for seed, system in systems.items() if len(system.stars) == 1 and not system.is_open_cluster()]
+        self.assertEqual(self.bank.seeds(num_stars=1, open_cluster=False), single)
+        self.assertEqual(self.bank.seeds(limit=3), [1, 2, 3])
+        ocean = [seed for seed, system in systems.items() if 'Ocean' in system.get_summary().world_types]
+        self.assertEqual(self.bank.seeds(world_types=['Ocean']), ocean)
+        habitable = [seed for seed, system in systems.items() if (system.get_summary().best_habitability or -99) >= 2]
+        self.assertEqual(self.bank.seeds(min_habitability=2), habitable)
+        with self.assertRaises(ValueError):
+            self.bank.count(colour='blue')
+
+    def test_random_seed(self):
+        seed = self.bank.random_seed(random.Random(1), has_garden=True)
+        self.assertIn(seed, self.bank.seeds(has_garden=True))
+        self.assertEqual(self.bank.random_seed(random.Random(1), has_garden=True), seed)
+        self.assertIsNone(self.bank.random_seed(num_stars=4))
+
+    def test_parallel_build(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'seeds.db')
+            with seedbank.SeedBank(path) as bank:
+                self.assertEqual(bank.build(1, 40, workers=2, chunksize=8), 40)
+                with self.assertRaises(ValueError):
+                    bank.build(41, 10, workers=1, num_stars=2)
+            # The bank persists
+            with seedbank.SeedBank(path) as bank:
+                self.assertEqual(bank.seeds(), list(range(1, 41)))
+                for seed in (1, 40):
+                    self.assertEqual(bank.features(seed), self.bank.features(seed))
+
+    def test_arguments(self):
+        with seedbank.SeedBank(':memory:') as bank:
+            bank.build(1, 10, workers=1, num_stars=3, require_garden=True)
+            for seed in bank.seeds():
+                self.assertEqual(len(bank.system(seed).stars), 3)
+                self.assertEqual(bank.features(seed)['num_stars'], 3)
+
+    def test_age_bucket(self):
+        self.assertEqual([seedbank.age_bucket(age) for age in (0.001, 0.1, 1.9, 2.0, 5.6, 9.9, 13)], [0, 1, 1, 2, 3, 4, 5])
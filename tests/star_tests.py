@@ -1,6 +1,6 @@
 import unittest
 from gurpsspace import star
-from gurpsspace.tables import StEvoTable
+from gurpsspace.tables import StEvoTable, IndexTable
 
 
 class TestStar(unittest.TestCase):
@@ -47,3 +47,13 @@ class TestStar(unittest.TestCase):
         sp_index = min(range(len(StEvoTable['temp'])),
                        key=lambda i: abs(StEvoTable['temp'][i] - self.mystar.get_temp()))
         self.assertTrue(StEvoTable['type'][sp_index])
+
+    def test_index_distribution(self):
+        distribution = star.index_distribution()
+        self.assertEqual(sum(distribution.values()), 1)
+        # Index 0 is chosen by every first roll of 14 or more
+        self.assertEqual(distribution[0], star.Fraction(35, 216))
+        for index in distribution:
+            self.assertTrue(0 <= index < len(StEvoTable['mass']))
+        self.assertTrue(self.mystar.make_index() in distribution)
+        self.assertEqual(set(distribution), {i for row in IndexTable if row for i in row if i is not None})
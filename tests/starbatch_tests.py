@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from gurpsspace import star, starbatch
+
+
+class TestStarBatch(unittest.TestCase):
+
+    def setUp(self):
+        ages = np.repeat([0.5, 2.5, 6.0, 13.0], 500)
+        self.batch = starbatch.StarBatch(ages, rng=np.random.default_rng(3))
+
+    def test_init(self):
+        self.assertEqual(len(self.batch), 2000)
+        self.assertEqual(len(starbatch.StarBatch(3.0, count=7)), 7)
+        self.assertRaises(ValueError, starbatch.StarBatch, 3.0)
+        self.assertRaises(ValueError, starbatch.StarBatch, [1.0, -1.0])
+
+    def test_reproducible(self):
+        again = starbatch.StarBatch(np.repeat([0.5, 2.5, 6.0, 13.0], 500), rng=np.random.default_rng(3))
+        np.testing.assert_array_equal(self.batch.mass, again.mass)
+        np.testing.assert_array_equal(self.batch.temperature, again.temperature)
+
+    def test_matches_star(self):
+        # Everything but the rolls has to agree with the scalar rules
+        for i in range(len(self.batch)):
+            mystar = self.batch.star(i)
+            sequence = self.batch.sequence[i]
+            self.assertEqual(mystar.find_sequence(), sequence)
+            if sequence != 3:
+                self.assertEqual(mystar.make_mass(), self.batch.mass[i])
+            if sequence != 2:
+                self.assertAlmostEqual(mystar.make_temperature(), self.batch.temperature[i])
+            self.assertAlmostEqual(mystar.make_luminosity(), self.batch.luminosity[i])
+            self.assertAlmostEqual(mystar.make_radius(), self.batch.radius[i])
+            np.testing.assert_allclose(mystar.compute_orbit_limits(), mystar.get_orbit_limits())
+            self.assertAlmostEqual(mystar.compute_snow_line(), mystar.get_snowline())
+            self.assertEqual(mystar.get_star_type(), self.batch.star_type[i])
+
+    def test_index_distribution(self):
+        batch = starbatch.StarBatch(1.0, count=200000, rng=np.random.default_rng(1))
+        counts = np.bincount(batch.index, minlength=34) / len(batch)
+        for index, probability in star.index_distribution().items():
+            self.assertAlmostEqual(counts[index], float(probability), delta=0.005)
+
+    def test_planetsystem(self):
+        mystar = self.batch.star(0)
+        mystar.make_planetsystem()
+        self.assertIsNotNone(mystar.planetsystem)
+
+
+if __name__ == '__main__':
+    unittest.main()
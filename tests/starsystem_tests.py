@@ -1,5 +1,27 @@
+import random
 import unittest
+from fractions import Fraction
+
+import numpy
+
 from gurpsspace import starsystem
+from gurpsspace.dice import roll_distribution
+from gurpsspace.tables import (InnerOrbSepIndexSampler, OpenClusterAgeSampler, OrbSepTable,
+                               companion_orbit_sampler, orbital_separation_index)
+
+
+def probabilities(sampler):
+    previous = 0
+    result = {}
+    for value, cumulative in zip(sampler.values, sampler.cumulative):
+        result[value] = Fraction(cumulative - previous, sampler.total)
+        previous = cumulative
+    return result
+
+
+def normalized(weights):
+    total = sum(weights.values())
+    return {value: Fraction(weight, total) for value, weight in weights.items() if weight}
 
 
 class TestStarsystem(unittest.TestCase):
@@ -99,3 +121,165 @@ class TestStarsystem(unittest.TestCase):
             self.bisystem.orbits
         )
         self.assertTrue(len(bisystem_periods) == len(self.bisystem.orbits))
+
+    def test_injected_rng_is_deterministic(self):
+        def fingerprint(system):
+            result = [system.get_age(), system.get_orbits()]
+            for star_ in system.stars:
+                result.append(star_.get_mass())
+                for orbit, body in sorted(star_.planetsystem.get_orbitcontents().items()):
+                    result.append((orbit, repr(body), body.get_eccentricity(), body.num_moons()))
+            return result
+
+        first = starsystem.StarSystem(rng=random.Random(42))
+        random.random()  # The global stream must not matter
+        second = starsystem.StarSystem(rng=random.Random(42))
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+        first = starsystem.StarSystem(rng=numpy.random.default_rng(42))
+        second = starsystem.StarSystem(rng=numpy.random.default_rng(42))
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+    def test_from_coordinates(self):
+        first = starsystem.StarSystem.from_coordinates(7, (1, -2, 3))
+        starsystem.StarSystem.from_coordinates(7, (0, 0, 0))
+        second = starsystem.StarSystem.from_coordinates(7, (1, -2, 3))
+        self.assertEqual(first.get_age(), second.get_age())
+        self.assertEqual(
+            [s.get_mass() for s in first.stars],
+            [s.get_mass() for s in second.stars]
+        )
+        self.assertNotEqual(
+            starsystem.dice.derive_seed(7, (1, -2, 3)),
+            starsystem.dice.derive_seed(7, (1, 2, 3))
+        )
+
+    def test_find_garden_system(self):
+        seed, system = starsystem.find_garden_system(1, max_attempts=2000)
+        self.assertTrue(system.has_garden())
+        again = starsystem.StarSystem(rng=random.Random(seed))
+        self.assertTrue(again.has_garden())
+        self.assertEqual(
+            [s.get_mass() for s in system.stars],
+            [s.get_mass() for s in again.stars]
+        )
+
+    def test_require_garden_aborts(self):
+        for seed in range(20):
+            try:
+                system = starsystem.StarSystem(rng=random.Random(seed), require_garden=True)
+            except starsystem.GenerationAborted:
+                full = starsystem.StarSystem(rng=random.Random(seed))
+                self.assertFalse(full.has_garden())
+            else:
+                self.assertTrue(system.has_garden())
+
+    def test_require_garden_upgrade_aborts(self):
+        aborted = 0
+        for seed in range(20):
+            try:
+                system = starsystem.StarSystem(rng=random.Random(seed), require_garden=True, detail='stars')
+            except starsystem.GenerationAborted:
+                continue
+            try:
+                system.has_garden()
+            except starsystem.GenerationAborted:
+                aborted += 1
+                self.assertEqual(system.detail, 'stars')
+                self.assertTrue(all(star_.planetsystem is None for star_ in system.stars))
+                self.assertRaises(starsystem.GenerationAborted, system.upgrade, 'full')
+            else:
+                self.assertTrue(system.has_garden())
+        self.assertGreater(aborted, 0)
+
+    def test_lazy_details_match_eager(self):
+        def details(system):
+            result = []
+            for star_ in system.stars:
+                for orbit, body in sorted(star_.planetsystem.get_orbitcontents().items()):
+                    if body.type() == 'Terrestrial':
+                        result.append((body.get_volcanism(), body.get_rotation(), body.get_axial_tilt(),
+                                       [(moon.get_name(), moon.get_orbit()) for moon in body.moons]))
+                    if body.type() == 'Gas Giant':
+                        result.append([(moon.get_name(), moon.get_orbit()) for moon in body.get_moons()])
+            return result
+
+        eager = starsystem.StarSystem(rng=random.Random(11))
+        lazy = starsystem.StarSystem(rng=random.Random(11), lazy=True)
+        self.assertEqual(details(eager), details(lazy))
+
+    def test_detail_levels(self):
+        stars_only = starsystem.StarSystem(rng=random.Random(5), detail='stars')
+        for star_ in stars_only.stars:
+            self.assertIsNone(star_.planetsystem)
+        planets = starsystem.StarSystem(rng=random.Random(5), detail='planets')
+        full = starsystem.StarSystem(rng=random.Random(5))
+        self.assertEqual(full.detail, 'full')
+        stars_only.upgrade('planets')
+        planets.upgrade('full')
+        stars_only.upgrade('full')
+        for system in (stars_only, planets):
+            self.assertEqual(system.detail, 'full')
+            for star_, full_star in zip(system.stars, full.stars):
+                contents = sorted(star_.planetsystem.get_orbitcontents().items())
+                full_contents = sorted(full_star.planetsystem.get_orbitcontents().items())
+                self.assertEqual([(o, repr(b), b.num_moons(), b.num_moonlets()) for o, b in contents],
+                                 [(o, repr(b), b.num_moons(), b.num_moonlets()) for o, b in full_contents])
+        self.assertRaises(ValueError, starsystem.StarSystem, detail='moons')
+
+    def test_make_details(self):
+        full = starsystem.StarSystem(rng=random.Random(5))
+        for detail in starsystem.DetailLevels:
+            system = starsystem.StarSystem(rng=random.Random(5), detail=detail, lazy=True)
+            system.make_details()
+            self.assertEqual(system.detail, 'full')
+            for star_, full_star in zip(system.stars, full.stars):
+                bodies = sorted(star_.planetsystem.get_orbitcontents().items())
+                full_bodies = sorted(full_star.planetsystem.get_orbitcontents().items())
+                self.assertEqual([(o, repr(b), b.num_moons(), b.num_moonlets()) for o, b in bodies],
+                                 [(o, repr(b), b.num_moons(), b.num_moonlets()) for o, b in full_bodies])
+
+    def test_open_cluster_age_sampler(self):
+        # The rows of the age table, rolled until the age is at most 2
+        weights = {}
+        for roll, ways in roll_distribution(3, 0).items():
+            for first in range(6):
+                for second in range(6):
+                    if roll == 3:
+                        row = 'extreme'
+                    elif roll <= 6:
+                        row = 'young'
+                    elif roll <= 10 and first == second == 0:
+                        row = 'two'
+                    else:
+                        continue
+                    weights[row] = weights.get(row, 0) + ways
+        self.assertEqual(probabilities(OpenClusterAgeSampler), normalized(weights))
+        for seed in range(50):
+            system = starsystem.StarSystem(rng=random.Random(seed), open_cluster=True, detail='stars')
+            self.assertLessEqual(system.get_age(), 2)
+
+    def test_companion_orbit_samplers(self):
+        # The orbits of a trinary system, rolled until the second companion
+        # is further out than the first one and neither is 'Distant' twice
+        inner = {}
+        for roll, ways in roll_distribution(3, 0).items():
+            index = orbital_separation_index(roll)
+            if OrbSepTable[index][0] != 'Distant':
+                inner[index] = inner.get(index, 0) + ways
+        self.assertEqual(probabilities(InnerOrbSepIndexSampler), normalized(inner))
+        for first_index in inner:
+            first_multiplier = OrbSepTable[first_index][1]
+            for first_roll in range(2, 13):
+                weights = {}
+                for roll, ways in roll_distribution(3, 6).items():
+                    index = orbital_separation_index(roll)
+                    multiplier = OrbSepTable[index][1]
+                    for orbit_roll, orbit_ways in roll_distribution(2, 0).items():
+                        if multiplier >= first_multiplier and orbit_roll * multiplier > first_roll * first_multiplier:
+                            weights[(index, orbit_roll)] = weights.get((index, orbit_roll), 0) + ways * orbit_ways
+                sampler = companion_orbit_sampler(first_index, first_roll)
+                self.assertEqual(probabilities(sampler), normalized(weights))
+        for seed in range(50):
+            system = starsystem.StarSystem(rng=random.Random(seed), num_stars=3, detail='stars')
+            self.assertGreater(system.orbits[1][0], system.orbits[0][0])
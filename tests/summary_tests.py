@@ -0,0 +1,60 @@
+import random
+import unittest
+from collections import Counter
+from gurpsspace import starsystem
+from gurpsspace.summary import SystemSummary
+
+
+def bodies(system):
+    for star_ in system.stars:
+        yield from star_.planetsystem.get_orbitcontents().values()
+
+
+class TestSystemSummary(unittest.TestCase):
+
+    def test_summary(self):
+        for seed in range(30):
+            system = starsystem.StarSystem(rng=random.Random(seed))
+            summary = system.get_summary()
+            contents = list(bodies(system))
+            self.assertEqual(len(summary), len(contents))
+            self.assertEqual(dict(summary.bodies), dict(Counter(body.type() for body in contents)))
+            terrestrial = [body for body in contents if body.type() == 'Terrestrial']
+            self.assertEqual(summary.count('Terrestrial'), len(terrestrial))
+            self.assertEqual(dict(summary.world_types), dict(Counter(body.get_type() for body in terrestrial)))
+            self.assertEqual(summary.has_garden, any(body.get_type() == 'Garden' for body in terrestrial))
+            self.assertEqual(summary.has_garden, system.has_garden())
+            self.assertEqual(summary.moons, sum(body.num_moons() for body in contents if body.type() != 'Ast. Belt'))
+            if terrestrial:
+                self.assertEqual(summary.best_habitability, max(body.get_habitability() for body in terrestrial))
+            else:
+                self.assertIsNone(summary.best_habitability)
+
+    def test_lazy(self):
+        system = starsystem.StarSystem(rng=random.Random(5), lazy=True)
+        summary = system.get_summary()
+        pending = [body for body in bodies(system) if not getattr(body, 'detailed', True)]
+        self.assertTrue(pending)
+        # Reading the summary does not generate any details
+        self.assertIsNone(summary.moons)
+        self.assertIsNone(summary.best_affinity)
+        self.assertFalse(any(body.detailed for body in pending))
+        for body in pending:
+            body.make_details()
+        eager = starsystem.StarSystem(rng=random.Random(5)).get_summary()
+        self.assertEqual(summary.moons, eager.moons)
+        self.assertEqual(summary.best_affinity, eager.best_affinity)
+        self.assertEqual(summary.best_habitability, eager.best_habitability)
+
+    def test_read_only(self):
+        summary = SystemSummary()
+        self.assertEqual(len(summary), 0)
+        self.assertEqual(summary.moons, 0)
+        with self.assertRaises(TypeError):
+            summary.bodies['Terrestrial'] = 1
+        with self.assertRaises(AttributeError):
+            summary.has_garden = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import pickle
+import random
+import unittest
+from gurpsspace import starsystem
+from gurpsspace.tables import AtmCompFlags
+
+
+def all_bodies(system):
+    for star_ in system.stars:
+        yield star_
+        for body in star_.planetsystem.get_orbitcontents().values():
+            yield body
+            if body.type() == 'Terrestrial':
+                yield from body.moons
+                yield from body.moonlets
+            elif body.type() == 'Gas Giant':
+                yield from body.first_family
+                yield from body.get_moons()
+                yield from body.third_family
+
+
+class TestWorld(unittest.TestCase):
+
+    def setUp(self):
+        self.systems = [starsystem.StarSystem(rng=random.Random(seed)) for seed in range(10)]
+
+    def test_slots(self):
+        for system in self.systems:
+            for body in all_bodies(system):
+                self.assertFalse(hasattr(body, '__dict__'), type(body).__name__)
+
+    def test_shared_roller(self):
+        for system in self.systems:
+            for star_ in system.stars:
+                self.assertIs(star_.roller, system.roller)
+                # Planets and gas giants switch to a roller of their own for
+                # their details
+                for body in star_.planetsystem.get_orbitcontents().values():
+                    if body.type() == 'Ast. Belt':
+                        self.assertIs(body.roller, star_.planetsystem.roller)
+
+    def test_atmcomp(self):
+        for system in self.systems:
+            for body in all_bodies(system):
+                if not hasattr(body, 'atmcomp'):
+                    continue
+                composition = body.atmcomp
+                self.assertEqual(list(composition), list(AtmCompFlags))
+                self.assertEqual(sum(composition.values()), bin(body.atmflags).count('1'))
+                flags = body.atmflags
+                body.atmcomp = composition
+                self.assertEqual(body.atmflags, flags)
+
+    def test_parent_references(self):
+        system = starsystem.StarSystem(rng=random.Random(3))
+        planetsystem = system.stars[0].planetsystem
+        body = planetsystem.get_orbitcontents()[next(iter(planetsystem.get_orbitcontents()))]
+        self.assertIs(body.primary_star, system.stars[0])
+        self.assertIs(planetsystem.parentstar, system.stars[0])
+        # A planet system pickled on its own keeps its star
+        copied = pickle.loads(pickle.dumps(planetsystem))
+        self.assertEqual(copied.parentstar.get_mass(), system.stars[0].get_mass())
+        # Children do not keep their parents alive
+        del system
+        with self.assertRaises(ReferenceError):
+            body.primary_star
+        self.assertEqual(copied.get_orbitcontents()[body.get_orbit()].primary_star.get_age(), copied.parentstar.get_age())
+
+    def test_pickle_lazy(self):
+        system = starsystem.StarSystem(rng=random.Random(5), lazy=True)
+        copied = pickle.loads(pickle.dumps(system))
+        # Pickling does not generate the details either
+        for body in system.stars[0].planetsystem.get_orbitcontents().values():
+            self.assertFalse(getattr(body, 'detailed', False))
+        for body in copied.stars[0].planetsystem.get_orbitcontents().values():
+            if body.type() == 'Terrestrial':
+                self.assertFalse(body.detailed)
+                self.assertIsInstance(body.get_habitability(), int)
+                self.assertTrue(body.detailed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from gurpsspace import worldbatch
+from gurpsspace.tables import pressure_category, world_climate
+
+
+class TestWorldBatch(unittest.TestCase):
+
+    def setUp(self):
+        generator = np.random.default_rng(7)
+        count = 5000
+        self.batch = worldbatch.WorldBatch(orbit=generator.uniform(0.1, 20, count),
+                                           luminosity=generator.uniform(0.01, 3, count),
+                                           star_mass=generator.uniform(0.1, 2, count),
+                                           age=generator.uniform(0.5, 12, count),
+                                           size=generator.integers(0, 4, count),
+                                           rng=generator)
+
+    def test_sizes(self):
+        np.testing.assert_array_equal(worldbatch.size_codes(['Tiny', 'Medium', 'Large']), [0, 2, 3])
+        self.assertRaises(ValueError, worldbatch.WorldBatch, [[1.0]], 1.0, 1.0, 1.0, 'Small')
+
+    def test_properties(self):
+        # The categories have to agree with the scalar rules
+        for i in range(len(self.batch)):
+            world = self.batch.properties(i)
+            self.assertEqual(world['climatetype'], world_climate(world['averagesurface']))
+            if world['pressure'] > 0:
+                self.assertEqual(world['presscat'], pressure_category(world['pressure']))
+            self.assertAlmostEqual(world['surfacegravity'], world['density'] * world['diameter'])
+            self.assertTrue(0 <= world['hydrocover'] <= 100)
+            self.assertEqual(world['hasmarginal'], world['marginal'] != '')
+            if world['sizeclass'] == 'Tiny':
+                self.assertEqual(world['presscat'], 'None')
+                self.assertEqual(world['atmmass'], 0)
+
+    def test_garden_probability(self):
+        # 3d + 8 >= 18 for a Standard world at age 4
+        batch = worldbatch.WorldBatch(1.0, 1.0, 1.0, 4.0, np.full(20000, 'Standard'), rng=np.random.default_rng(1))
+        gardens = np.mean(batch.world_type == worldbatch.GARDEN)
+        self.assertAlmostEqual(gardens, 0.625, delta=0.015)
+        self.assertTrue(np.all((batch.world_type == worldbatch.GARDEN) | (batch.world_type == worldbatch.OCEAN)))
+
+
+if __name__ == '__main__':
+    unittest.main()